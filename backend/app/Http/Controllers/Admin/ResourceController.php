@@ -45,7 +45,8 @@ public function index(Request $request): JsonResponse
     public function getTasks(Request $request): JsonResponse
     {
         try {
-            $tasks = ImportTask::orderBy('created_at', 'desc')
+            $tasks = ImportTask::topLevel()
+                ->orderBy('created_at', 'desc')
                 ->paginate($request->get('per_page', 15));
 
             return response()->json([
@@ -71,7 +72,7 @@ public function getStats(): JsonResponse
             $totalResources = ResourceItem::count();
             $completedResources = ResourceItem::where('status', 'completed')->count();
             $failedResources = ResourceItem::where('status', 'error')->count();
-            $activeTasks = ImportTask::whereIn('status', ['running', 'pending'])->count();
+            $activeTasks = ImportTask::topLevel()->whereIn('status', ['running', 'pending'])->count();
             
             // 计算总存储大小
             $totalSizeBytes = ResourceItem::sum('file_size') ?? 0;
@@ -429,12 +430,12 @@ public function deleteResource(Request $request, $resourceId): JsonResponse
      */
     private function calculateSuccessRate(): float
     {
-        $totalTasks = ImportTask::count();
+        $totalTasks = ImportTask::topLevel()->count();
         if ($totalTasks === 0) {
             return 100.0;
         }
 
-        $successfulTasks = ImportTask::where('status', 'completed')->count();
+        $successfulTasks = ImportTask::topLevel()->where('status', 'completed')->count();
         return round(($successfulTasks / $totalTasks) * 100, 1);
     }
 
@@ -51,7 +51,8 @@ public function handle(): void
                 'video_title' => $result['video_info']['title'] ?? null,
                 'audio_path' => $result['audio_path'] ?? null,
                 'subtitle_path' => $result['subtitle_path'] ?? null,
-                'subtitle_text' => $result['subtitle_text'] ?? null
+                'subtitle_text' => $result['subtitle_text'] ?? null,
+                'profile_summary' => $this->readProfileSummary()
             ]);
 
             Log::info('B站视频提取任务完成', [
@@ -123,8 +124,14 @@ protected function extractVideo(): array
         // 更新进度
         $this->extractJob->updateProgress(10);
 
+        // PYTHON_PROFILE=cprofile|sample|py-spy 时对提取脚本做性能分析
+        $profileEnv = env('PYTHON_PROFILE')
+            ? ['NIHONGO_PROFILE' => env('PYTHON_PROFILE'), 'NIHONGO_PROFILE_DIR' => $this->profileDir()]
+            : [];
+
         // 执行Python脚本
         $process = Process::timeout(1500) // 25分钟超时
+            ->env($profileEnv)
             ->run($command, function (string $type, string $buffer) {
                 // 解析进度输出
                 if (preg_match('/Progress: (\d+)%/', $buffer, $matches)) {
@@ -159,6 +166,28 @@ protected function extractVideo(): array
         return $result;
     }
 
+    /**
+     * 性能分析输出目录
+     */
+    protected function profileDir(): string
+    {
+        return storage_path('app/profiles/bilibili_' . $this->extractJob->id);
+    }
+
+    /**
+     * 读取最近一次性能分析摘要（未开启分析时返回null）
+     */
+    protected function readProfileSummary(): ?array
+    {
+        $files = glob($this->profileDir() . '/*.summary.json') ?: [];
+        if (empty($files)) {
+            return null;
+        }
+
+        sort($files);
+        return json_decode(file_get_contents(end($files)), true);
+    }
+
     /**
      * 解析Python脚本输出
      */
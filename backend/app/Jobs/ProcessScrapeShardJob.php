@@ -0,0 +1,94 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Models\ImportTask;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Process;
+
+/**
+ * 抓取分片工作任务：从任务表领取父任务的分片并处理，直到没有剩余分片
+ * 可以在任意一台运行队列的机器上执行
+ * 工作进程因内存不足放回分片时派发一个替代的工作任务；其他失败由队列重试，
+ * 重试间隔长于分片租约，出错进程未完成的分片可以被重新领取
+ */
+class ProcessScrapeShardJob implements ShouldQueue
+{
+    use Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    public $timeout = 3600;
+    public $tries = 3;
+    public $backoff = 360;
+
+    /**
+     * scrape_shards.py work 因内存不足退出且仍有待处理分片时的退出码
+     */
+    const EXIT_SHARDS_REMAINING = 75;
+
+    protected ImportTask $task;
+    protected int $worker;
+
+    public function __construct(ImportTask $task, int $worker)
+    {
+        $this->task = $task;
+        $this->worker = $worker;
+    }
+
+    public function handle(): void
+    {
+        $tempDir = storage_path('app/temp');
+        if (!is_dir($tempDir)) {
+            mkdir($tempDir, 0755, true);
+        }
+
+        $configFile = $tempDir . '/scraping_config_' . $this->task->id . '_shard_' . $this->worker . '.json';
+        file_put_contents($configFile, json_encode(ProcessWebScrapingJob::scraperConfig($this->task)));
+
+        try {
+            $pythonScript = base_path('python/scrape_shards.py');
+            $command = "python \"{$pythonScript}\" work \"{$configFile}\"";
+
+            Log::info("执行分片抓取命令: {$command}");
+
+            $profileDir = storage_path('app/profiles/import_task_' . $this->task->id);
+            $profileEnv = env('PYTHON_PROFILE')
+                ? ['NIHONGO_PROFILE' => env('PYTHON_PROFILE'), 'NIHONGO_PROFILE_DIR' => $profileDir]
+                : [];
+
+            $result = Process::env($profileEnv)->timeout($this->timeout)->run($command);
+
+            if ($result->exitCode() === self::EXIT_SHARDS_REMAINING) {
+                // 放回队列的分片可能已经没有其他工作任务领取
+                Log::warning("分片工作任务 {$this->worker} 内存不足，派发替代的工作任务");
+                self::dispatch($this->task, $this->worker);
+                return;
+            }
+
+            if (!$result->successful()) {
+                Log::error("分片工作任务 {$this->worker} 失败: " . $result->errorOutput());
+                throw new \Exception("分片工作进程执行失败: " . $result->errorOutput());
+            }
+        } finally {
+            if (file_exists($configFile)) {
+                unlink($configFile);
+            }
+        }
+    }
+
+    /**
+     * 重试次数用完后父任务标记为失败
+     */
+    public function failed(\Throwable $exception): void
+    {
+        $this->task->update([
+            'status' => 'failed',
+            'error_message' => "分片工作任务 {$this->worker} 失败: " . $exception->getMessage(),
+            'logs' => array_merge($this->task->logs ?? [], ["分片工作任务 {$this->worker} 失败: " . $exception->getMessage()])
+        ]);
+    }
+}
@@ -36,35 +36,41 @@ public function handle(): void
             }
             
             $configFile = $tempDir . '/scraping_config_' . $this->task->id . '.json';
-            file_put_contents($configFile, json_encode([
-                'task_id' => $this->task->id,
-                'urls' => explode("\n", $config['urls']),
-                'max_pages' => $config['max_pages'] ?? 10,
-                'content_type' => $config['content_type'] ?? 'course',
-                'delay_ms' => $config['delay_ms'] ?? 1000,
-                'include_images' => $config['include_images'] ?? false,
-                'include_audio' => $config['include_audio'] ?? false,
-                'database_config' => [
-                    'host' => env('DB_HOST'),
-                    'database' => env('DB_DATABASE'),
-                    'username' => env('DB_USERNAME'),
-                    'password' => env('DB_PASSWORD'),
-                ]
-            ]));
+            file_put_contents($configFile, json_encode(self::scraperConfig($this->task)));
             
-            // 调用Python抓取脚本
-            $pythonScript = base_path('python/web_scraper.py');
+            // shard_workers大于1时：发现文章并切成分片，由多个队列任务并行处理
+            $shardWorkers = (int) ($config['shard_workers'] ?? 1);
+            if ($shardWorkers > 1 && ($config['crawl_depth'] ?? 0) == 0) {
+                $this->dispatchShards($configFile, $shardWorkers);
+                return;
+            }
+            
+            // 调用Python抓取脚本（async为true时使用基于aiohttp的异步抓取器）
+            $pythonScript = base_path(($config['async'] ?? false) ? 'python/async_web_scraper.py' : 'python/web_scraper.py');
             $command = "python \"{$pythonScript}\" \"{$configFile}\"";
             
             Log::info("执行抓取命令: {$command}");
             
-            $result = Process::run($command);
+            // PYTHON_PROFILE=cprofile|sample|py-spy 时对抓取脚本做性能分析
+            // 每次执行（包括重试）使用单独的目录，只汇报本次执行的摘要
+            $profileDir = storage_path('app/profiles/import_task_' . $this->task->id)
+                . '/run_' . now()->format('Ymd_His') . '_' . $this->attempts();
+            $profileEnv = env('PYTHON_PROFILE')
+                ? ['NIHONGO_PROFILE' => env('PYTHON_PROFILE'), 'NIHONGO_PROFILE_DIR' => $profileDir]
+                : [];
+            
+            $result = Process::env($profileEnv)->run($command);
             
             if ($result->successful()) {
+                $this->task->refresh();
+                $logs = array_merge($this->task->logs ?? [], ['Python脚本执行成功']);
+                foreach (glob($profileDir . '/*.summary.json') ?: [] as $summaryFile) {
+                    $logs[] = '性能分析: ' . file_get_contents($summaryFile);
+                }
                 $this->task->update([
                     'status' => 'completed',
                     'progress' => 100,
-                    'logs' => array_merge($this->task->logs ?? [], ['Python脚本执行成功'])
+                    'logs' => $logs
                 ]);
             } else {
                 throw new \Exception('Python脚本执行失败: ' . $result->errorOutput());
@@ -84,6 +90,77 @@ public function handle(): void
         }
     }
 
+    /**
+     * 传给Python抓取脚本的配置
+     */
+    public static function scraperConfig(ImportTask $task): array
+    {
+        $config = $task->config;
+        
+        return [
+            'task_id' => $task->id,
+            'urls' => explode("\n", $config['urls']),
+            'max_pages' => $config['max_pages'] ?? 10,
+            'content_type' => $config['content_type'] ?? 'course',
+            'delay_ms' => $config['delay_ms'] ?? 1000,
+            'include_images' => $config['include_images'] ?? false,
+            'include_audio' => $config['include_audio'] ?? false,
+            'discovery' => $config['discovery'] ?? 'rss',
+            'incremental' => $config['incremental'] ?? false,
+            'feed_cache_file' => storage_path('app/temp/nhk_feed_cache.json'),
+            'crawl_depth' => $config['crawl_depth'] ?? 0,
+            'memory_budget_mb' => $config['memory_budget_mb'] ?? 0,
+            'async_concurrency' => $config['async_concurrency'] ?? 100,
+            'parse_executor' => $config['parse_executor'] ?? 'thread',
+            'shard_size' => $config['shard_size'] ?? 20,
+            'shard_queue' => 'tasks',
+            'dedup' => $config['dedup'] ?? true,
+            'fingerprint_index' => storage_path('app/temp/content_fingerprints.sqlite'),
+            'boilerplate_cache' => storage_path('app/temp/boilerplate_templates.json'),
+            // 原始HTML存档没有自动清理，需要 --reprocess 离线重新提取时才开启
+            'html_archive' => ($config['archive_html'] ?? false) ? storage_path('app/scraped_html') : null,
+            'crawl_checkpoint_file' => storage_path('app/temp/crawl_frontier_' . $task->id . '.json'),
+            'prometheus_file' => env('SCRAPER_PROMETHEUS_FILE'),
+            'statsd_host' => env('STATSD_HOST'),
+            'database_config' => [
+                'host' => env('DB_HOST'),
+                'database' => env('DB_DATABASE'),
+                'username' => env('DB_USERNAME'),
+                'password' => env('DB_PASSWORD'),
+            ]
+        ];
+    }
+
+    /**
+     * 创建分片后派发分片任务；父任务由最后完成分片的工作进程标记为完成
+     */
+    protected function dispatchShards(string $configFile, int $shardWorkers): void
+    {
+        $pythonScript = base_path('python/scrape_shards.py');
+        $result = Process::timeout(600)->run("python \"{$pythonScript}\" plan \"{$configFile}\"");
+        
+        if (file_exists($configFile)) {
+            unlink($configFile);
+        }
+        if (!$result->successful()) {
+            throw new \Exception('创建抓取分片失败: ' . $result->errorOutput());
+        }
+        
+        for ($worker = 1; $worker <= $shardWorkers; $worker++) {
+            ProcessScrapeShardJob::dispatch($this->task, $worker);
+        }
+        
+        // 输出的最后一行是分片汇总
+        $outputLines = preg_split('/\R/', trim($result->output()));
+        $this->task->refresh();
+        $this->task->update([
+            'logs' => array_merge($this->task->logs ?? [], [
+                end($outputLines),
+                "已派发 {$shardWorkers} 个分片工作任务"
+            ])
+        ]);
+    }
+
     public function failed(\Throwable $exception): void
     {
         $this->task->update([
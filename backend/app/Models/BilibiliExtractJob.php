@@ -31,12 +31,14 @@ class BilibiliExtractJob extends Model
         'subtitle_path',
         'subtitle_text',
         'error_message',
+        'profile_summary',
         'completed_at'
     ];
 
     protected $casts = [
         'use_ai_subtitle' => 'boolean',
         'progress' => 'integer',
+        'profile_summary' => 'array',
         'completed_at' => 'datetime',
         'created_at' => 'datetime',
         'updated_at' => 'datetime'
@@ -13,6 +13,7 @@ class Course extends Model
         'title',
         'description',
         'day_number',
+        'source_url',
         'difficulty',
         'tags',
         'is_active'
@@ -3,7 +3,9 @@
 namespace App\Models;
 
 use Illuminate\Database\Eloquent\Factories\HasFactory;
+use Illuminate\Database\Eloquent\Builder;
 use Illuminate\Database\Eloquent\Model;
+use Illuminate\Database\Eloquent\Relations\BelongsTo;
 use Illuminate\Database\Eloquent\Relations\HasMany;
 
 class ImportTask extends Model
@@ -11,9 +13,11 @@ class ImportTask extends Model
     use HasFactory;
 
     protected $fillable = [
+        'parent_id',
         'type',
         'name',
         'status',
+        'leased_by',
         'progress',
         'total_items',
         'items_processed',
@@ -40,6 +44,30 @@ public function resources(): HasMany
         return $this->hasMany(ResourceItem::class, 'task_id');
     }
 
+    /**
+     * 分片子任务所属的父任务
+     */
+    public function parent(): BelongsTo
+    {
+        return $this->belongsTo(ImportTask::class, 'parent_id');
+    }
+
+    /**
+     * 抓取任务的分片子任务
+     */
+    public function shards(): HasMany
+    {
+        return $this->hasMany(ImportTask::class, 'parent_id');
+    }
+
+    /**
+     * 只查询顶层任务（不含分片子任务）
+     */
+    public function scopeTopLevel(Builder $query): Builder
+    {
+        return $query->whereNull('parent_id');
+    }
+
     /**
      * 添加日志
      */
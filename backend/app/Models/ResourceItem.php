@@ -15,6 +15,7 @@ class ResourceItem extends Model
         'name',
         'type',
         'source',
+        'url',
         'status',
         'progress',
         'file_path',
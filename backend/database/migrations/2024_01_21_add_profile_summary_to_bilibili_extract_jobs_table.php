@@ -0,0 +1,28 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('bilibili_extract_jobs', function (Blueprint $table) {
+            $table->json('profile_summary')->nullable()->after('error_message');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('bilibili_extract_jobs', function (Blueprint $table) {
+            $table->dropColumn('profile_summary');
+        });
+    }
+};
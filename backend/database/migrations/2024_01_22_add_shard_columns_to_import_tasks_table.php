@@ -0,0 +1,35 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('import_tasks', function (Blueprint $table) {
+            // 分片子任务指向父任务
+            $table->foreignId('parent_id')->nullable()->after('id')->constrained('import_tasks')->cascadeOnDelete();
+            // 分片: 领取该分片的工作进程；父任务: 汇总完成父任务的工作进程
+            $table->string('leased_by')->nullable()->after('status');
+
+            $table->index(['parent_id', 'status']);
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('import_tasks', function (Blueprint $table) {
+            $table->dropIndex(['parent_id', 'status']);
+            $table->dropConstrainedForeignId('parent_id');
+            $table->dropColumn('leased_by');
+        });
+    }
+};
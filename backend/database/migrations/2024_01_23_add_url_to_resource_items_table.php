@@ -0,0 +1,30 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('resource_items', function (Blueprint $table) {
+            // 抓取的文章地址，分片重新处理时按它跳过已保存的文章
+            $table->string('url', 768)->nullable()->after('source')->index();
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('resource_items', function (Blueprint $table) {
+            $table->dropIndex(['url']);
+            $table->dropColumn('url');
+        });
+    }
+};
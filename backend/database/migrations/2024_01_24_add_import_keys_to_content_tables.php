@@ -0,0 +1,47 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        // 内容导入按自然键upsert（INSERT ... ON DUPLICATE KEY UPDATE），由唯一索引保证并发导入不产生重复行
+        Schema::table('courses', function (Blueprint $table) {
+            // 课程来源文章的地址，重复导入同一篇文章时更新而不是按天数覆盖其他课程
+            $table->string('source_url', 768)->nullable()->after('day_number')->unique();
+        });
+
+        Schema::table('learning_materials', function (Blueprint $table) {
+            $table->unique(['course_id', 'title']);
+        });
+
+        Schema::table('vocabulary', function (Blueprint $table) {
+            $table->unique(['word', 'reading']);
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('vocabulary', function (Blueprint $table) {
+            $table->dropUnique(['word', 'reading']);
+        });
+
+        Schema::table('learning_materials', function (Blueprint $table) {
+            $table->dropUnique(['course_id', 'title']);
+        });
+
+        Schema::table('courses', function (Blueprint $table) {
+            $table->dropUnique(['source_url']);
+            $table->dropColumn('source_url');
+        });
+    }
+};
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步日语学习资源网页抓取器
+基于aiohttp的 JapaneseWebScraper：所有请求共享一个ClientSession，用信号量限制总并发，
+页面解析放到线程池或进程池中执行，单个进程可以同时处理数百个请求。
+配置与 web_scraper.py 相同，另外支持：
+  async_concurrency  同时进行的请求数上限（默认100，每个主机仍受自适应限速器约束）
+  parse_executor     thread 或 process（默认thread；process时各子进程独立加载模板缓存）
+  parse_workers      解析线程/进程数（默认CPU核数）
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from boilerplate import BoilerplateRemover
+from crawl_frontier import CrawlFrontier
+from job_profiler import run_profiled
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from resilient_fetch import (CHUNK_SIZE, RETRY_STATUS_CODES, CircuitBreaker, CircuitOpenError,
+                             ResponseTooLargeError)
+from site_adapters import NHK_EASY, SiteAdapter, registry
+from web_scraper import JapaneseWebScraper, find_article_links, parse_page
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPStatusError(Exception):
+    """响应状态码表示错误"""
+    pass
+
+
+class FetchResult:
+    """异步请求的结果，正文已完整读取"""
+
+    def __init__(self, url: str, status: int, headers, body: bytes, elapsed: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        # 到收到响应头为止的秒数
+        self.elapsed = elapsed
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HTTPStatusError(f"HTTP {self.status}: {self.url}")
+
+
+class AsyncResilientFetcher:
+    """ResilientFetcher的asyncio版本
+
+    重试、全抖动退避和按主机熔断的规则与同步版相同；每个请求先占用全局信号量，
+    再经过同一个自适应限速器，正文流式读取并受 max_body_bytes 限制。
+    """
+
+    def __init__(self, client: aiohttp.ClientSession, limiter: AdaptiveRateLimiter,
+                 semaphore: asyncio.Semaphore, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 max_body_bytes: Optional[int] = None):
+        self.client = client
+        self.limiter = limiter
+        self.semaphore = semaphore
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_body_bytes = max_body_bytes
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._retries: Dict[str, int] = {}
+        # 有请求结束时唤醒等待并发名额的协程，不必等到下一次轮询
+        self._released = asyncio.Condition()
+
+    @classmethod
+    def from_config(cls, client: aiohttp.ClientSession, limiter: AdaptiveRateLimiter,
+                    semaphore: asyncio.Semaphore, config: Dict,
+                    max_body_bytes: Optional[int] = None) -> 'AsyncResilientFetcher':
+        """从抓取任务配置创建（与 ResilientFetcher.from_config 使用相同的配置项）"""
+        return cls(
+            client, limiter, semaphore,
+            max_retries=config.get('max_retries', 3),
+            failure_threshold=config.get('circuit_failure_threshold', 5),
+            reset_timeout=config.get('circuit_reset_seconds', 60),
+            max_body_bytes=max_body_bytes
+        )
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    async def get(self, url: str, headers: Optional[Dict] = None) -> FetchResult:
+        host = urlparse(url).netloc
+
+        for attempt in range(self.max_retries + 1):
+            breaker = self._breaker(host)
+            if not breaker.allow():
+                raise CircuitOpenError(f"{host} 已熔断，跳过请求: {url}")
+
+            error: Optional[Exception] = None
+            result = None
+            try:
+                result = await self._request(url, headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            except Exception:
+                breaker.cancel_probe()
+                raise
+
+            retryable = error is not None or result.status in RETRY_STATUS_CODES
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if not retryable:
+                return result
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return result
+
+            self._retries[host] = self._retries.get(host, 0) + 1
+            # 全抖动指数退避，避免多个请求同时重试
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+            logger.warning(f"请求失败 ({error.__class__.__name__ if error else result.status})，"
+                           f"{delay:.1f}秒后第 {attempt + 1} 次重试: {url}")
+            await asyncio.sleep(delay)
+
+    async def _request(self, url: str, headers: Optional[Dict]) -> FetchResult:
+        async with self.semaphore:
+            await self._acquire(url)
+
+            start = time.monotonic()
+            elapsed = 0.0
+            try:
+                async with self.client.get(url, headers=headers) as response:
+                    elapsed = time.monotonic() - start
+                    declared = response.content_length
+                    if self.max_body_bytes and declared and declared > self.max_body_bytes:
+                        raise ResponseTooLargeError(f"响应声明大小 {declared} 字节超过上限 {self.max_body_bytes}: {url}")
+
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        body.extend(chunk)
+                        if self.max_body_bytes and len(body) > self.max_body_bytes:
+                            raise ResponseTooLargeError(f"响应超过上限 {self.max_body_bytes} 字节，已中止读取: {url}")
+                    result = FetchResult(url, response.status, response.headers, bytes(body), elapsed)
+            except Exception as e:
+                self.limiter.release(url, latency=elapsed or time.monotonic() - start, error=e)
+                await self._notify_released()
+                raise
+
+            self.limiter.release(
+                url,
+                status_code=result.status,
+                latency=elapsed,
+                retry_after=parse_retry_after(result.headers.get('Retry-After'))
+            )
+            await self._notify_released()
+            return result
+
+    async def _acquire(self, url: str):
+        """等待限速器放行；主机的并发名额占满时等到有请求结束或建议的等待时间到"""
+        while True:
+            wait = self.limiter.try_acquire(url)
+            if not wait:
+                return
+            async with self._released:
+                try:
+                    await asyncio.wait_for(self._released.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _notify_released(self):
+        async with self._released:
+            self._released.notify_all()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """各主机的熔断状态和重试次数"""
+        return {
+            host: {
+                'state': breaker.state,
+                'consecutive_failures': breaker.failures,
+                'trips': breaker.trips,
+                'retries': self._retries.get(host, 0)
+            }
+            for host, breaker in self._breakers.items()
+        }
+
+
+# 解析子进程中的模板去除器（进程池模式）
+_worker_boilerplate: Optional[BoilerplateRemover] = None
+
+
+def _init_parse_worker(use_boilerplate: bool, cache_file: Optional[str]):
+    """解析子进程初始化：加载模板缓存，子进程中学到的模板不写回缓存文件"""
+    global _worker_boilerplate
+    if use_boilerplate:
+        _worker_boilerplate = BoilerplateRemover(cache_file)
+        _worker_boilerplate.cache_file = None
+
+
+def _parse_in_worker(body: bytes, url: str, adapter: SiteAdapter, include_images: bool,
+                     include_audio: bool, collect_links: bool) -> Tuple[Dict, List[str]]:
+    return parse_page(body, url, adapter, include_images, include_audio, collect_links, _worker_boilerplate)
+
+
+class AsyncJapaneseWebScraper(JapaneseWebScraper):
+    """日语学习资源网页抓取器的asyncio版本
+
+    公开方法与 JapaneseWebScraper 同名，但都是协程。可以用 async with 打开会话后单独调用，
+    也可以直接 await scrape_websites()，会话和执行器在其中自动创建和关闭。
+    """
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.concurrency = config.get('async_concurrency', 100)
+        self.parse_executor = config.get('parse_executor', 'thread')
+        self.parse_workers = config.get('parse_workers') or os.cpu_count() or 1
+        # (连接超时, 读取超时)，与同步请求器的配置一致
+        self.timeout = self.fetcher.timeout
+
+        self.client: Optional[aiohttp.ClientSession] = None
+        self.async_fetcher: Optional[AsyncResilientFetcher] = None
+        self.executor: Optional[Executor] = None
+        # 去重索引、写入队列和进度更新在单线程执行器中顺序进行，写入队列满时只阻塞该线程，不阻塞事件循环
+        self.db_executor: Optional[ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> 'AsyncJapaneseWebScraper':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """创建共享的ClientSession、请求器和执行器；已经打开时不重复创建"""
+        if self.client:
+            return
+        connect_timeout, read_timeout = self.timeout
+        self.client = aiohttp.ClientSession(
+            headers={'User-Agent': self.session.headers['User-Agent']},
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            trust_env=True
+        )
+        self.async_fetcher = AsyncResilientFetcher.from_config(
+            self.client, self.rate_limiter, asyncio.Semaphore(self.concurrency), self.config,
+            max_body_bytes=self.max_body_bytes
+        )
+
+        if self.parse_executor == 'process':
+            self.executor = ProcessPoolExecutor(
+                self.parse_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_parse_worker,
+                initargs=(self.boilerplate is not None,
+                          self.boilerplate.cache_file if self.boilerplate else None)
+            )
+        else:
+            self.executor = ThreadPoolExecutor(self.parse_workers, thread_name_prefix='scraper-parse')
+        self.db_executor = ThreadPoolExecutor(1, thread_name_prefix='scraper-db')
+
+    def fetch_metrics(self) -> Dict[str, Dict]:
+        """complete_task 汇报的重试与熔断状态来自异步请求器"""
+        if self.async_fetcher:
+            return self.async_fetcher.metrics()
+        return super().fetch_metrics()
+
+    async def close(self):
+        if self.client:
+            await self.client.close()
+            self.client = None
+        for executor in (self.executor, self.db_executor):
+            if executor:
+                executor.shutdown(wait=True)
+        self.executor = None
+        self.db_executor = None
+
+    async def _in_db(self, func, *args):
+        """在数据库线程中执行（写库、更新任务进度）"""
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, func, *args)
+
+    async def _parse(self, body: bytes, url: str, adapter: SiteAdapter,
+                     collect_links: bool) -> Tuple[Dict, List[str]]:
+        loop = asyncio.get_running_loop()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # 子进程中无法记录分阶段计时，只统计整体解析时间
+            with self.metrics.timer('parse'):
+                return await loop.run_in_executor(
+                    self.executor, _parse_in_worker, body, url, adapter,
+                    self.include_images, self.include_audio, collect_links
+                )
+        return await loop.run_in_executor(self.executor, functools.partial(
+            parse_page, body, url, adapter, self.include_images, self.include_audio,
+            collect_links, self.boilerplate, self.metrics
+        ))
+
+    async def discover_nhk_articles(self, base_url: str, max_articles: int = 10) -> List[str]:
+        """发现NHK Easy News文章链接，优先使用RSS，必要时回退到解析HTML主页"""
+        with self.metrics.timer('discover'):
+            if self.discovery == 'rss':
+                article_links = await self.find_nhk_articles_from_rss(base_url, max_articles)
+                if article_links is not None:
+                    return article_links
+                logger.info("RSS不可用，回退到HTML主页解析")
+
+            return await self.find_nhk_articles(base_url, max_articles)
+
+    async def find_nhk_articles_from_rss(self, base_url: str, max_articles: int = 10) -> Optional[List[str]]:
+        """通过RSS获取文章链接（条件请求），返回None表示RSS不可用"""
+        feed_url = urljoin(base_url, 'rss/rss.xml')
+        cache = self._load_feed_cache()
+        feed_cache = cache.get(feed_url, {})
+
+        try:
+            logger.info(f"访问NHK RSS: {feed_url}")
+            result = await self.async_fetcher.get(feed_url, headers=self._feed_headers(feed_cache))
+            if result.status == 304:
+                logger.info("RSS未更新，使用缓存的文章列表")
+                entries = feed_cache.get('entries', [])
+            else:
+                result.raise_for_status()
+                limit = None if self.incremental else max_articles
+                entries = self._parse_rss_entries([result.body], limit)
+                self._store_feed_entries(feed_cache, result.headers, entries, limit)
+        except Exception as e:
+            logger.error(f"获取NHK RSS失败: {e}")
+            return None
+
+        return self._select_rss_articles(feed_url, cache, feed_cache, entries, max_articles)
+
+    async def find_nhk_articles(self, base_url: str, max_articles: int = 10) -> List[str]:
+        """解析NHK Easy主页查找文章链接"""
+        try:
+            logger.info(f"访问NHK主页: {base_url}")
+            result = await self.async_fetcher.get(base_url)
+            result.raise_for_status()
+            article_links = await asyncio.get_running_loop().run_in_executor(
+                self.executor, find_article_links, result.body, base_url
+            )
+
+            # 去重并限制数量
+            article_links = list(set(article_links))[:max_articles]
+            logger.info(f"找到 {len(article_links)} 个文章链接")
+            return article_links
+
+        except Exception as e:
+            logger.error(f"查找NHK文章链接失败: {e}")
+            return []
+
+    async def scrape_nhk_easy_news(self, url: str) -> Optional[Dict]:
+        """抓取NHK Easy News内容"""
+        return await self.scrape_page(url, NHK_EASY)
+
+    async def scrape_page(self, url: str, adapter: Optional[SiteAdapter] = None,
+                          links: Optional[List[str]] = None) -> Optional[Dict]:
+        """抓取单个页面，传入links列表时同时收集站内链接"""
+        adapter = adapter or registry.resolve(url)
+        try:
+            with self.metrics.timer('fetch'):
+                result = await self.async_fetcher.get(url)
+                result.raise_for_status()
+            self.metrics.observe('fetch.headers', result.elapsed * 1000)
+            self.metrics.count('bytes_downloaded', len(result.body))
+            self.archive_page(url, result.body, result.status, result.headers, result.elapsed * 1000, adapter)
+
+            content_data, page_links = await self._parse(result.body, url, adapter, links is not None)
+            if links is not None:
+                links.extend(page_links)
+            if adapter is NHK_EASY:
+                content_data['metadata']['published_at'] = self.article_published.get(url, '')
+            self.metrics.count('pages_fetched')
+            return content_data
+
+        except ResponseTooLargeError as e:
+            self.metrics.count('oversized_pages')
+            logger.warning(f"跳过过大的页面({adapter.name}): {e}")
+            return None
+        except Exception as e:
+            self.metrics.count('fetch_errors')
+            logger.error(f"抓取页面失败({adapter.name}) {url}: {e}")
+            return None
+
+    async def _save_if_valid(self, content_data: Optional[Dict], url: str,
+                             all_content: List[Dict], logs: List[str]) -> bool:
+        if content_data and len(content_data['content']) > 50:
+            # 过滤近似重复后保存到数据库
+            return await self._in_db(self.store_content, content_data, all_content, logs)
+        logs.append(f"抓取失败或内容太少: {url}")
+        return False
+
+    async def _scrape_many(self, urls: List[str], adapter: SiteAdapter,
+                           all_content: List[Dict], logs: List[str]):
+        """并发抓取一组页面，按完成顺序保存；超出内存预算时取消剩余请求"""
+        async def scrape(url: str) -> Tuple[str, Optional[Dict]]:
+            return url, await self.scrape_page(url, adapter)
+
+        tasks = [asyncio.create_task(scrape(url)) for url in urls]
+        try:
+            for done, future in enumerate(asyncio.as_completed(tasks), 1):
+                url, content_data = await future
+                await self._save_if_valid(content_data, url, all_content, logs)
+                await self._in_db(self.update_task_progress, len(all_content), len(urls), logs)
+                if done < len(urls) and self.memory_exhausted(logs, len(urls) - done):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def crawl_websites(self, logs: List[str]) -> List[Dict]:
+        """按优先级并发爬取站内页面，每轮从队列取出最多 async_concurrency 个URL"""
+        frontier = CrawlFrontier(
+            max_pages=self.max_pages,
+            max_depth=self.crawl_depth,
+            politeness_delay=0,
+            checkpoint_file=self.crawl_checkpoint_file
+        )
+        for url in self.urls:
+            frontier.add(url, depth=0, priority=self._crawl_priority(url, 0))
+
+        async def crawl(url: str) -> Tuple[SiteAdapter, Optional[Dict], List[str]]:
+            adapter = registry.resolve(url)
+            links = []
+            content_data = await self.scrape_page(url, adapter, links)
+            return adapter, content_data, links
+
+        all_content = []
+        max_fetches = self.max_pages * 5
+        fetches = 0
+        shed = False
+
+        while fetches < max_fetches and len(all_content) < self.max_pages:
+            if self.memory_exhausted(logs, len(frontier)):
+                shed = True
+                break
+            batch = []
+            while len(batch) < self.concurrency and fetches + len(batch) < max_fetches:
+                entry = frontier.next(wait=False)
+                if not entry:
+                    break
+                batch.append(entry)
+            if not batch:
+                break
+            fetches += len(batch)
+            logger.info(f"并发爬取 {len(batch)} 个页面 (已保存 {len(all_content)}/{self.max_pages})")
+
+            results = await asyncio.gather(*(crawl(url) for url, _ in batch))
+            for (url, depth), (adapter, content_data, links) in zip(batch, results):
+                for link in links:
+                    frontier.add(link, depth=depth + 1, priority=self._crawl_priority(link, depth + 1))
+
+                is_article = adapter is not NHK_EASY or '/article/' in url
+                saved = False
+                if is_article and len(all_content) < self.max_pages:
+                    saved = await self._save_if_valid(content_data, url, all_content, logs)
+                frontier.mark_done(url, counts_toward_budget=saved)
+            await self._in_db(self.update_task_progress, len(all_content), self.max_pages, logs)
+
+        logs.append(f"爬取结束: 请求 {fetches} 个页面，剩余待抓取 {len(frontier)} 个")
+        if shed:
+            frontier.checkpoint()
+        else:
+            frontier.clear_checkpoint()
+        return all_content
+
+    async def scrape_websites(self):
+        """抓取网站内容"""
+        logger.info("开始异步抓取网站内容...")
+
+        all_content = []
+        logs = ["开始抓取网站内容"]
+
+        opened = self.client is None
+        if opened:
+            await self.start()
+        try:
+            if self.crawl_depth > 0:
+                all_content = await self.crawl_websites(logs)
+            else:
+                for index, url in enumerate(self.urls):
+                    if self.memory_exhausted(logs, len(self.urls) - index):
+                        break
+                    try:
+                        logger.info(f"处理URL: {url}")
+                        adapter = registry.resolve(url)
+                        if adapter is NHK_EASY and '/article/' not in url:
+                            article_links = await self.discover_nhk_articles(url, self.max_pages)
+                            if not article_links:
+                                logs.append(f"在 {url} 没有找到文章链接")
+                                continue
+                            await self._scrape_many(article_links, NHK_EASY, all_content, logs)
+                        else:
+                            logger.info(f"使用站点适配器 {adapter.name} 处理: {url}")
+                            content_data = await self.scrape_page(url, adapter)
+                            await self._save_if_valid(content_data, url, all_content, logs)
+                            await self._in_db(self.update_task_progress, len(all_content), len(self.urls), logs)
+                    except Exception as e:
+                        error_msg = f"处理URL失败 {url}: {e}"
+                        logger.error(error_msg)
+                        logs.append(error_msg)
+
+            await self._in_db(self.complete_task, all_content, logs)
+        finally:
+            if opened:
+                await self.close()
+        return all_content
+
+
+def main():
+    """主函数"""
+    if len(sys.argv) != 2:
+        print("用法: python async_web_scraper.py <config_file>")
+        sys.exit(1)
+
+    config_file = sys.argv[1]
+
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        scraper = AsyncJapaneseWebScraper(config)
+        results = asyncio.run(scraper.scrape_websites())
+
+        print(f"抓取完成，共获取 {len(results)} 个资源")
+
+    except Exception as e:
+        logger.error(f"抓取过程出错: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_profiled('async_web_scraper', main)
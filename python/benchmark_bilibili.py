@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+B站提取离线基准与回归测试
+本地模拟 api.bilibili.com 的视频信息（view）和播放器字幕（player/v2）接口，
+用ffmpeg的lavfi源生成测试视频并由本地服务器提供下载，端到端运行 BilibiliAudioExtractor 的
+下载 → 截取音频 → 获取字幕，按不同片段数和起始偏移统计每段耗时和CPU开销，并校验输出。
+
+用法:
+    python benchmark_bilibili.py --duration 300 --segments 1 4 16 --offsets 0 120 240
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:  # Windows下没有resource模块
+    resource = None
+
+from bilibili_audio_extractor import BilibiliAudioExtractor
+
+BVID = 'BV1bench0001'
+AID = 170001
+CID = 270001
+# 模拟字幕每条的时长（秒）
+SUBTITLE_STEP = 2.0
+
+
+def generate_test_video(path: Path, duration: int):
+    """用lavfi的测试图案和正弦波生成带音轨的mp4"""
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=25',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+        '-t', str(duration),
+        '-c:v', 'mpeg4', '-c:a', 'aac', '-shortest',
+        '-y', str(path)
+    ]
+    subprocess.run(cmd, check=True)
+
+
+class MockBilibiliHandler(BaseHTTPRequestHandler):
+    """模拟B站接口和视频文件下载"""
+
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        base = f"//{self.headers.get('Host')}"
+
+        if parsed.path == '/x/web-interface/view':
+            if query.get('bvid', [''])[0] != BVID:
+                self._json({'code': -404, 'message': '啥都木有'})
+                return
+            self._json({'code': 0, 'message': '0', 'data': {
+                'bvid': BVID, 'aid': AID, 'cid': CID,
+                'title': 'bench', 'duration': server.duration,
+                'desc': '离线基准测试视频', 'owner': {'name': 'benchmark'}
+            }})
+        elif parsed.path == '/x/player/v2':
+            self._json({'code': 0, 'message': '0', 'data': {'subtitle': {'subtitles': [
+                {'lan': 'zh-CN', 'lan_doc': '中文（中国）', 'subtitle_url': f"{base}/subtitle/{CID}.json"}
+            ]}}})
+        elif parsed.path == f"/subtitle/{CID}.json":
+            body = []
+            start = 0.0
+            while start < server.duration:
+                body.append({'from': start, 'to': min(start + SUBTITLE_STEP, server.duration),
+                             'content': f"字幕 {len(body) + 1}"})
+                start += SUBTITLE_STEP
+            self._json({'body': body})
+        elif parsed.path == f"/video/{BVID}.mp4":
+            self._send(200, server.video_bytes, 'video/mp4')
+        else:
+            self._send(404, b'', 'text/plain')
+
+    def _json(self, data: Dict):
+        self._send(200, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # yt-dlp探测文件信息后会提前断开连接
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(video_path: Path, duration: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBilibiliHandler)
+    server.daemon_threads = True
+    server.video_bytes = video_path.read_bytes()
+    server.duration = duration
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def children_cpu() -> float:
+    """已结束子进程（ffmpeg）累计的CPU秒数"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def wav_duration(path: Path) -> float:
+    with wave.open(str(path), 'rb') as f:
+        return f.getnframes() / f.getframerate()
+
+
+def run_case(extractor: BilibiliAudioExtractor, video_path: Path, video_info: Dict,
+             segment_count: int, offset: int, segment_length: int) -> Dict:
+    """从offset开始连续截取segment_count段，每段都获取一次字幕"""
+    cut_seconds = []
+    cut_cpu = []
+    subtitle_seconds = []
+    failures = []
+
+    for i in range(segment_count):
+        start = offset + i * segment_length
+        end = start + segment_length
+        output_name = f"bench_{offset}_{segment_count}_{i:03d}.wav"
+
+        cpu_before = children_cpu()
+        started = time.perf_counter()
+        audio_path = extractor.extract_audio_segment(video_path, start, end, output_name=output_name)
+        cut_seconds.append(time.perf_counter() - started)
+        cut_cpu.append(children_cpu() - cpu_before)
+
+        started = time.perf_counter()
+        subtitle = extractor.get_subtitle_from_bilibili(video_info)
+        subtitle_seconds.append(time.perf_counter() - started)
+
+        actual = wav_duration(audio_path)
+        if abs(actual - segment_length) > 0.1:
+            failures.append(f"片段 {start}-{end}s 音频时长 {actual:.2f}s")
+        if not subtitle or '-->' not in subtitle:
+            failures.append(f"片段 {start}-{end}s 未获取到字幕")
+        audio_path.unlink()
+
+    return {
+        'segments': segment_count,
+        'offset': offset,
+        'cut_ms_per_segment': round(sum(cut_seconds) / segment_count * 1000, 1),
+        'cut_cpu_ms_per_segment': round(sum(cut_cpu) / segment_count * 1000, 1),
+        'subtitle_ms_per_segment': round(sum(subtitle_seconds) / segment_count * 1000, 1),
+        'total_seconds': round(sum(cut_seconds) + sum(subtitle_seconds), 3),
+        'failures': failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='B站提取离线基准与回归测试')
+    parser.add_argument('--duration', type=int, default=300, help='测试视频时长（秒）')
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 4, 16], help='要比较的片段数')
+    parser.add_argument('--offsets', type=int, nargs='+', default=[0, 120, 240], help='第一段的起始秒数')
+    parser.add_argument('--segment-length', type=int, default=5, help='每段时长（秒）')
+    parser.add_argument('--keep', action='store_true', help='保留临时目录')
+    parser.add_argument('--verbose', action='store_true', help='显示提取器的输出')
+    parser.add_argument('--json', default=None, help='结果另存为JSON文件')
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("未找到ffmpeg，无法生成测试视频")
+        return 1
+
+    work_dir = Path(tempfile.mkdtemp(prefix='bilibili_bench_'))
+    video_path = work_dir / 'source.mp4'
+    started = time.perf_counter()
+    generate_test_video(video_path, args.duration)
+    print(f"测试视频: {video_path} ({args.duration}s, 生成耗时 {time.perf_counter() - started:.1f}s)")
+
+    server = start_server(video_path, args.duration)
+    api_base = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['NO_PROXY'] = '127.0.0.1'
+    print(f"模拟B站接口: {api_base}")
+
+    extractor = BilibiliAudioExtractor(str(work_dir / 'downloads'), api_base=api_base)
+    output = sys.stdout if args.verbose else io.StringIO()
+    rows = []
+    failures = []
+    try:
+        with redirect_stdout(output):
+            started = time.perf_counter()
+            downloaded_path, video_info = extractor.download_video(f"{api_base}/video/{BVID}.mp4")
+            download_seconds = time.perf_counter() - started
+
+            for offset in args.offsets:
+                for segment_count in args.segments:
+                    if offset + segment_count * args.segment_length > args.duration:
+                        continue
+                    row = run_case(extractor, downloaded_path, video_info,
+                                   segment_count, offset, args.segment_length)
+                    failures.extend(row['failures'])
+                    rows.append(row)
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"下载耗时: {download_seconds:.2f}s")
+    print(f"\n{'偏移(s)':>7} {'片段数':>6} {'截取ms/段':>10} {'ffmpeg CPU ms/段':>16} {'字幕ms/段':>10} {'合计(s)':>8}")
+    for row in rows:
+        print(f"{row['offset']:>9} {row['segments']:>9} {row['cut_ms_per_segment']:>13} "
+              f"{row['cut_cpu_ms_per_segment']:>18} {row['subtitle_ms_per_segment']:>13} {row['total_seconds']:>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'download_seconds': round(download_seconds, 3),
+                       'results': rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json}")
+
+    if failures:
+        print("\n校验失败:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网页抓取器离线基准测试
+在本地启动NHK Easy替身服务器（首页取自 nhk_page_structure.html，文章页为合成页面），
+可注入延迟和错误，端到端运行 JapaneseWebScraper.scrape_websites，
+报告 页面/秒、请求延迟p50/p99 和峰值内存。同步抓取器逐个请求页面，只运行一次；
+--async 时比较每种并发设置。数据库写入替换为空实现，存档和媒体下载关闭，所有状态文件写在临时目录
+
+用法:
+    python benchmark_scraper.py --pages 50 --latency-ms 20 --error-rate 0.02
+    python benchmark_scraper.py --pages 500 --concurrency 8 32 --async   # 测试异步抓取器
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlparse
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+RECORDED_INDEX = SCRIPT_DIR / 'nhk_page_structure.html'
+# 请求通过本地服务器代理，URL保持NHK的主机名，抓取器走真实的NHK Easy适配器
+NHK_BASE_URL = 'http://www3.nhk.or.jp/news/easy/'
+
+WORDS = [
+    ('地震', 'じしん'), ('台風', 'たいふう'), ('電車', 'でんしゃ'), ('学校', 'がっこう'),
+    ('天気', 'てんき'), ('野菜', 'やさい'), ('病院', 'びょういん'), ('子ども', 'こども'),
+    ('図書館', 'としょかん'), ('会社', 'かいしゃ'), ('大雨', 'おおあめ'), ('祭り', 'まつり'),
+    ('政府', 'せいふ'), ('選手', 'せんしゅ'), ('試合', 'しあい'), ('値段', 'ねだん'),
+    ('東京', 'とうきょう'), ('大阪', 'おおさか'), ('研究', 'けんきゅう'), ('工場', 'こうじょう')
+]
+PARTICLES = ['が', 'を', 'で', 'に', 'と', 'の']
+ENDINGS = ['ありました。', '話しました。', '始まりました。', '増えています。', '考えています。']
+
+
+def article_names(count: int) -> List[str]:
+    """首页原有的文章链接 + 合成文章，共count篇"""
+    html = RECORDED_INDEX.read_text(encoding='utf-8')
+    names = []
+    for part in html.split('href="./article/')[1:]:
+        name = part.split('"', 1)[0]
+        if name not in names:
+            names.append(name)
+    names.extend(f"bench_{i:05d}.html" for i in range(max(0, count - len(names))))
+    return names[:count]
+
+
+def render_article(name: str) -> bytes:
+    """按文章名确定性地生成带<ruby>标注的文章页"""
+    rng = random.Random(hashlib.md5(name.encode('utf-8')).hexdigest())
+    paragraphs = []
+    for _ in range(rng.randint(5, 9)):
+        sentence = ''
+        for _ in range(rng.randint(2, 4)):
+            word, reading = rng.choice(WORDS)
+            sentence += f"<ruby>{word}<rt>{reading}</rt></ruby>{rng.choice(PARTICLES)}"
+        paragraphs.append(f"<p>{sentence}{rng.choice(ENDINGS)}</p>")
+    title_word, _ = rng.choice(WORDS)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title_word}のニュース | NEWS WEB EASY</title></head>
+<body>
+<header><div class="header-menu"><a href="../">トップ</a><a href="../rss/rss.xml">RSS</a></div></header>
+<main><article class="article-main">
+<h1 class="article-title">{title_word}のニュース</h1>
+<div class="article-body" id="js-article-body">{''.join(paragraphs)}</div>
+</article></main>
+<footer><p>NHKやさしいことばニュース</p></footer>
+</body></html>""".encode('utf-8')
+
+
+def render_index(names: List[str]) -> bytes:
+    """录制的首页，补充合成文章的链接"""
+    html = RECORDED_INDEX.read_text(encoding='utf-8')
+    extra = ''.join(f'<a href="./article/{name}">{name}</a>' for name in names if name.startswith('bench_'))
+    return html.replace('</body>', f'<div class="bench-articles">{extra}</div></body>').encode('utf-8')
+
+
+def render_rss(names: List[str]) -> bytes:
+    now = datetime.now(timezone.utc)
+    items = ''.join(
+        f"<item><title>{name}</title><link>{NHK_BASE_URL}article/{name}</link>"
+        f"<pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate></item>"
+        for i, name in enumerate(names)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>{items}</channel></rss>'.encode('utf-8')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """NHK Easy替身：按配置注入延迟和503错误"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        latency = max(0.0, server.rng_gauss(server.latency, server.jitter))
+        if latency:
+            time.sleep(latency)
+
+        if server.rng_random() < server.error_rate:
+            self._send(503, b'', 'text/plain', {'Retry-After': '0'})
+            return
+
+        path = urlparse(self.path).path
+        if path in ('/news/easy/', '/news/easy/index.html'):
+            self._send(200, server.index_page, 'text/html; charset=utf-8')
+        elif path == '/news/easy/rss/rss.xml':
+            self._send(200, server.rss_feed, 'application/rss+xml')
+        elif path.startswith('/news/easy/article/'):
+            self._send(200, render_article(path.rsplit('/', 1)[-1]), 'text/html; charset=utf-8')
+        else:
+            self._send(404, b'', 'text/plain')
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(pages: int, latency_ms: float, jitter_ms: float, error_rate: float, seed: int):
+    names = article_names(pages)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.index_page = render_index(names)
+    server.rss_feed = render_rss(names)
+    server.latency = latency_ms / 1000
+    server.jitter = jitter_ms / 1000
+    server.error_rate = error_rate
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def locked(method):
+        def call(*args):
+            with lock:
+                return method(*args)
+        return call
+
+    server.rng_gauss = locked(rng.gauss)
+    server.rng_random = locked(rng.random)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class NullSink:
+    """不连数据库的写入器：资源直接算作写入成功，基准只测抓取和解析"""
+
+    def __init__(self):
+        self.written = 0
+
+    def submit(self, content_data: Dict, on_done=None):
+        self.written += 1
+        if on_done:
+            on_done(True)
+
+    def update_progress(self, items_processed: int, total_items: int, logs: List[str]):
+        pass
+
+    def complete_task(self, items_processed: int, logs: List[str]):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {'written': self.written, 'failed': 0, 'batches': 0, 'max_queue_depth': 0}
+
+
+def run_scenario(proxy_url: str, options: Dict, queue):
+    """在独立进程中运行一次抓取，保证峰值内存互不影响"""
+    import logging
+    import resource
+
+    # 抓取器导入时在当前目录创建scraper.log，先切换到临时目录
+    work_dir = tempfile.mkdtemp(prefix='scraper_bench_')
+    os.chdir(work_dir)
+    os.environ['HTTP_PROXY'] = proxy_url
+    os.environ['NO_PROXY'] = ''
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+    from web_scraper import JapaneseWebScraper
+    from async_web_scraper import AsyncJapaneseWebScraper
+    logging.getLogger().setLevel(logging.WARNING)
+
+    base = AsyncJapaneseWebScraper if options['async'] else JapaneseWebScraper
+
+    class BenchScraper(base):
+        def connect_database(self):
+            self.db_sink = NullSink()
+
+    config = {
+        'urls': [NHK_BASE_URL],
+        'max_pages': options['pages'],
+        'delay_ms': options['delay_ms'],
+        'min_delay_ms': 0,
+        'max_concurrency': options['concurrency'],
+        'discovery': options['discovery'],
+        'feed_cache_file': os.path.join(work_dir, 'feed_cache.json'),
+        'fingerprint_index': os.path.join(work_dir, 'fingerprints.sqlite'),
+        'boilerplate_cache': os.path.join(work_dir, 'boilerplate.json'),
+        'crawl_checkpoint_file': os.path.join(work_dir, 'crawl_checkpoint.json'),
+        'storage_dir': os.path.join(work_dir, 'media'),
+        'html_archive': None,
+        'include_images': False,
+        'include_audio': False,
+        'async_concurrency': options['concurrency']
+    }
+
+    scraper = BenchScraper(config)
+    if options['async']:
+        start = time.perf_counter()
+        results = asyncio.run(scraper.scrape_websites())
+        elapsed = time.perf_counter() - start
+        # 异步抓取器没有requests的响应钩子，延迟取文章请求的响应头耗时直方图
+        headers = scraper.metrics.summary()['stages'].get('fetch.headers', {})
+        requests_made = sum(state['requests'] for state in scraper.rate_limiter.metrics().values())
+        p50_ms = headers.get('p50_ms', 0.0)
+        p99_ms = headers.get('p99_ms', 0.0)
+    else:
+        latencies = []
+        scraper.session.hooks['response'].append(
+            lambda response, *args, **kwargs: latencies.append(response.elapsed.total_seconds())
+        )
+        start = time.perf_counter()
+        results = scraper.scrape_websites()
+        elapsed = time.perf_counter() - start
+        requests_made = len(latencies)
+        p50_ms = percentile(latencies, 50) * 1000
+        p99_ms = percentile(latencies, 99) * 1000
+
+    queue.put({
+        'concurrency': options['concurrency'],
+        'pages': len(results),
+        'requests': requests_made,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(p50_ms, 1),
+        'p99_ms': round(p99_ms, 1),
+        # Linux下ru_maxrss单位为KB
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    })
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='网页抓取器离线基准测试')
+    parser.add_argument('--pages', type=int, default=50, help='抓取的文章数(max_pages)')
+    parser.add_argument('--latency-ms', type=float, default=20, help='服务器平均响应延迟')
+    parser.add_argument('--jitter-ms', type=float, default=5, help='延迟的标准差')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的比例')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=None,
+                        help='要比较的并发设置（max_concurrency 和 async_concurrency），仅在--async时有效，默认 1 4 8')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='使用 AsyncJapaneseWebScraper')
+    parser.add_argument('--delay-ms', type=int, default=0, help='抓取器初始请求间隔')
+    parser.add_argument('--discovery', choices=['rss', 'html'], default='rss')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', default=None, help='结果另存为JSON文件')
+    args = parser.parse_args()
+
+    server = start_server(args.pages, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    proxy_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"NHK替身服务器: {proxy_url} (延迟 {args.latency_ms}±{args.jitter_ms}ms, 错误率 {args.error_rate})")
+
+    # 同步抓取器逐个请求，并发设置不影响结果，只运行一次
+    concurrency_levels = (args.concurrency or [1, 4, 8]) if args.use_async else [1]
+    if not args.use_async and args.concurrency:
+        print("同步抓取器按顺序请求页面，忽略 --concurrency，只运行一次（比较并发请加 --async）")
+
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for concurrency in concurrency_levels:
+        queue = context.Queue()
+        options = {
+            'pages': args.pages,
+            'delay_ms': args.delay_ms,
+            'concurrency': concurrency,
+            'discovery': args.discovery,
+            'async': args.use_async
+        }
+        process = context.Process(target=run_scenario, args=(proxy_url, options, queue))
+        process.start()
+        process.join()
+        if queue.empty():
+            print(f"并发 {concurrency} 的测试进程异常退出 (exit code {process.exitcode})")
+            continue
+        rows.append(queue.get())
+
+    server.shutdown()
+
+    print(f"\n{'并发':>4} {'页面':>5} {'请求':>5} {'耗时(s)':>8} {'页面/秒':>8} {'p50(ms)':>8} {'p99(ms)':>8} {'峰值内存(MB)':>12}")
+    for row in rows:
+        print(f"{row['concurrency']:>6} {row['pages']:>7} {row['requests']:>7} {row['seconds']:>9} "
+              f"{row['pages_per_sec']:>10} {row['p50_ms']:>9} {row['p99_ms']:>9} {row['peak_rss_mb']:>14}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'results': rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
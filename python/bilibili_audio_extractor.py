@@ -14,19 +14,24 @@ import subprocess
 # import whisper  # 暂时禁用，因为Python 3.13兼容性问题
 from pathlib import Path
 from datetime import datetime, timedelta
+from urllib.parse import urljoin
 import yt_dlp
 # from pydub import AudioSegment  # 暂时禁用，因为Python 3.13兼容性问题
 import argparse
 
+from job_profiler import run_profiled
+
 class BilibiliAudioExtractor:
-    def __init__(self, output_dir="downloads"):
+    def __init__(self, output_dir="downloads", api_base=None):
         """
         初始化B站音频提取器
         
         Args:
             output_dir: 输出目录
+            api_base: B站API地址，默认读取环境变量 BILIBILI_API_BASE（离线测试时指向本地模拟服务）
         """
         self.output_dir = Path(output_dir)
+        self.api_base = (api_base or os.environ.get('BILIBILI_API_BASE') or 'https://api.bilibili.com').rstrip('/')
         self.output_dir.mkdir(exist_ok=True)
         
         # 初始化Whisper模型（用于AI字幕生成）
@@ -58,10 +63,10 @@ class BilibiliAudioExtractor:
     def get_video_info(self, video_id):
         """获取视频信息"""
         if video_id.startswith('BV'):
-            api_url = f"https://api.bilibili.com/x/web-interface/view?bvid={video_id}"
+            api_url = f"{self.api_base}/x/web-interface/view?bvid={video_id}"
         else:
             aid = video_id.replace('av', '')
-            api_url = f"https://api.bilibili.com/x/web-interface/view?aid={aid}"
+            api_url = f"{self.api_base}/x/web-interface/view?aid={aid}"
         
         try:
             response = requests.get(api_url, headers=self.headers)
@@ -89,7 +94,7 @@ class BilibiliAudioExtractor:
         """尝试获取B站原生字幕"""
         try:
             # 获取字幕列表
-            subtitle_api = f"https://api.bilibili.com/x/player/v2?cid={video_info['cid']}&aid={video_info['aid']}"
+            subtitle_api = f"{self.api_base}/x/player/v2?cid={video_info['cid']}&aid={video_info['aid']}"
             response = requests.get(subtitle_api, headers=self.headers)
             data = response.json()
             
@@ -98,7 +103,8 @@ class BilibiliAudioExtractor:
                 
                 if subtitles:
                     # 下载第一个可用字幕（通常是中文）
-                    subtitle_url = "https:" + subtitles[0]['subtitle_url']
+                    # subtitle_url是省略协议的 //host/path 形式
+                    subtitle_url = urljoin(self.api_base, subtitles[0]['subtitle_url'])
                     subtitle_response = requests.get(subtitle_url, headers=self.headers)
                     subtitle_data = subtitle_response.json()
                     
@@ -370,4 +376,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit(main()) 
\ No newline at end of file
+    exit(run_profiled('bilibili_audio_extractor', main)) 
\ No newline at end of file
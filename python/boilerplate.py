@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网页模板噪声去除
+从同一站点的多个页面中学习重复出现的区块（导航、页脚、推荐列表等）作为站点模板，
+模板缓存到磁盘，后续页面提取正文前直接删除这些区块
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 参与模板学习的区块标签
+BLOCK_TAGS = {'div', 'section', 'header', 'footer', 'nav', 'aside', 'ul', 'ol', 'li', 'dl', 'table', 'p'}
+# 任何页面都直接删除的标签
+NOISE_TAGS = ['script', 'style', 'noscript', 'iframe', 'nav', 'footer']
+# 不含正文段落（文本不少于该长度的区块）的<form>才删除；ASP.NET等页面用一个<form>包住整个正文
+FORM_TEXT_BLOCK_LENGTH = 80
+
+
+class BoilerplateRemover:
+    """按站点学习并去除模板区块
+
+    每个站点先学习 learn_pages 个页面：文本相同的区块在至少 min_ratio 比例的页面中出现
+    （且至少出现在两个页面中）即视为模板。学习完成后模板固定下来写入缓存文件，之后的页面
+    只需查表删除；需要重新学习时删除缓存文件中的对应站点即可。
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, learn_pages: int = 5,
+                 min_ratio: float = 0.6, min_text_length: int = 8):
+        self.cache_file = cache_file
+        self.learn_pages = learn_pages
+        self.min_ratio = min_ratio
+        self.min_text_length = min_text_length
+        self.sites: Dict[str, Dict] = {}
+        self._templates: Dict[str, set] = {}
+        self._dirty = False
+        # 异步抓取器在线程池中解析页面，学习过程需要加锁
+        self._lock = threading.Lock()
+
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self.sites = json.load(f)
+            except Exception as e:
+                logger.warning(f"模板缓存读取失败，将重新学习: {e}")
+
+        for host, site in self.sites.items():
+            if site.get('template') is not None:
+                self._templates[host] = set(site['template'])
+
+    def strip(self, soup, url: str) -> int:
+        """删除页面中的噪声标签和站点模板区块，返回删除的模板区块数量"""
+        for element in soup.find_all(NOISE_TAGS):
+            element.decompose()
+        for form in soup.find_all('form'):
+            if not form.decomposed and not self._has_text_block(form):
+                form.decompose()
+
+        host = urlparse(url).netloc
+        with self._lock:
+            template = self._templates.get(host)
+            if template is None:
+                self._learn(host, soup)
+                template = self._templates.get(host)
+        if template is None:
+            return 0
+
+        removed = 0
+        for key, element in self._walk(soup, template):
+            if key in template:
+                element.decompose()
+                removed += 1
+        return removed
+
+    def save(self):
+        """保存模板缓存"""
+        if not self.cache_file or not self._dirty:
+            return
+        try:
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.sites, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"模板缓存保存失败: {e}")
+
+    def _learn(self, host: str, soup):
+        site = self.sites.setdefault(host, {'pages': 0, 'counts': {}, 'template': None})
+        counts = site['counts']
+        for key in {key for key, _ in self._walk(soup)}:
+            counts[key] = counts.get(key, 0) + 1
+        site['pages'] += 1
+        self._dirty = True
+
+        if site['pages'] >= self.learn_pages:
+            min_count = max(2, self.min_ratio * site['pages'])
+            site['template'] = sorted(key for key, count in counts.items() if count >= min_count)
+            site['counts'] = {}
+            self._templates[host] = set(site['template'])
+            logger.info(f"站点 {host} 模板学习完成: {len(site['template'])} 个模板区块")
+            self.save()
+
+    def _has_text_block(self, element) -> bool:
+        """元素内是否有文本较长的区块（正文段落）"""
+        return any(
+            len(''.join(block.get_text().split())) >= FORM_TEXT_BLOCK_LENGTH
+            for block in element.find_all(list(BLOCK_TAGS))
+        )
+
+    def _walk(self, soup, stop_keys: Optional[set] = None) -> List[Tuple[str, object]]:
+        """自上而下遍历区块，返回 (区块键, 元素)；命中 stop_keys 的区块不再遍历其子元素"""
+        root = soup.body or soup
+        blocks = []
+        stack = list(reversed(root.find_all(True, recursive=False)))
+        while stack:
+            element = stack.pop()
+            if element.name in BLOCK_TAGS:
+                text = ''.join(element.get_text().split())
+                if len(text) >= self.min_text_length:
+                    key = f"{element.name}:{hashlib.md5(text.encode('utf-8')).hexdigest()[:16]}"
+                    blocks.append((key, element))
+                    if stop_keys and key in stop_keys:
+                        continue
+            stack.extend(reversed(element.find_all(True, recursive=False)))
+        return blocks
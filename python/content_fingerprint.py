@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取内容指纹与近似重复检测
+对正文字符n-gram计算MinHash签名，用LSH分桶索引保存在SQLite中，写入数据库前过滤近似重复的文章
+"""
+
+import re
+import zlib
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 哈希排列使用的梅森素数；系数在[0, _PRIME)中均匀选取，
+# 乘积按uint64回绕后再取模（与numpy的uint64运算一致），纯Python实现用_MASK模拟回绕
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+# 规范化时去掉的空白和标点
+_NOISE_PATTERN = re.compile(r'[\s\u3000-\u303f\uff01-\uff0f\uff1a-\uff20!-/:-@\[-`{-~]+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT,
+    title TEXT,
+    content_hash TEXT,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON fingerprints (content_hash);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    doc_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets ON lsh_buckets (band, bucket);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白和标点，避免排版差异影响指纹"""
+    return _NOISE_PATTERN.sub('', text or '')
+
+
+class MinHasher:
+    """字符n-gram的MinHash签名
+
+    日文没有空格分词，使用字符 shingle_size-gram；安装了numpy时向量化计算，
+    否则使用纯Python实现，两者结果一致。
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 90):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> List[int]:
+        n = self.shingle_size
+        if len(text) <= n:
+            return [zlib.crc32(text.encode('utf-8'))] if text else []
+        return list({zlib.crc32(text[i:i + n].encode('utf-8')) for i in range(len(text) - n + 1)})
+
+    def signature(self, text: str) -> List[int]:
+        hashes = self.shingles(normalize_text(text))
+        if not hashes:
+            return [_PRIME] * self.num_perm
+
+        if np is not None:
+            values = np.array(hashes, dtype=np.uint64)
+            a = np.array(self.a, dtype=np.uint64)[:, None]
+            b = np.array(self.b, dtype=np.uint64)[:, None]
+            return ((a * values + b) % np.uint64(_PRIME)).min(axis=1).tolist()
+
+        return [min(((a * h + b) & _MASK) % _PRIME for h in hashes) for a, b in zip(self.a, self.b)]
+
+
+class FingerprintIndex:
+    """磁盘上的MinHash LSH索引
+
+    签名分成 bands 段，每段 rows 个值哈希为一个桶；任一段落入同一个桶的文档成为候选，
+    再用完整签名估计Jaccard相似度，达到 threshold 即视为近似重复。
+    """
+
+    def __init__(self, index_path: str, threshold: float = 0.8, num_perm: int = 128,
+                 bands: int = 16, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+
+        self.connection = sqlite3.connect(index_path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            keys.append(hashlib.blake2b(array('Q', rows).tobytes(), digest_size=8).hexdigest())
+        return keys
+
+    def find_duplicate(self, content: str) -> Optional[Tuple[str, float]]:
+        """返回最相似的已索引文档 (url, 相似度)，没有近似重复时返回None"""
+        content_hash = hashlib.sha1(normalize_text(content).encode('utf-8')).hexdigest()
+        signature = self.hasher.signature(content)
+
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT url FROM fingerprints WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if row:
+                return row[0], 1.0
+
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                for (doc_id,) in self.connection.execute(
+                    "SELECT doc_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, key)
+                ):
+                    candidates.add(doc_id)
+
+            best = None
+            for doc_id in candidates:
+                url, blob = self.connection.execute(
+                    "SELECT url, signature FROM fingerprints WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                other = array('Q', blob)
+                similarity = sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (url, similarity)
+
+        return best
+
+    def add(self, url: str, title: str, content: str) -> int:
+        """把已保存的文章加入索引，返回文档ID"""
+        content_hash = hashlib.sha1(normalize_text(content).encode('utf-8')).hexdigest()
+        signature = self.hasher.signature(content)
+
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT INTO fingerprints (url, title, content_hash, signature) VALUES (?, ?, ?, ?)",
+                (url, title, content_hash, array('Q', signature).tobytes())
+            )
+            doc_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, key, doc_id) for band, key in enumerate(self._band_keys(signature))]
+            )
+            self.connection.commit()
+        return doc_id
+
+    def remove(self, doc_id: int):
+        """从索引中移除文档（文章最终没有保存成功时）"""
+        with self._lock:
+            self.connection.execute("DELETE FROM lsh_buckets WHERE doc_id = ?", (doc_id,))
+            self.connection.execute("DELETE FROM fingerprints WHERE doc_id = ?", (doc_id,))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
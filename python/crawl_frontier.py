@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取队列（Crawl Frontier）
+带优先级和深度限制的待抓取队列：URL规范化、布隆过滤器去重、按主机礼貌间隔、断点续抓
+"""
+
+import os
+import json
+import math
+import time
+import heapq
+import base64
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+# 规范化时去掉的跟踪参数
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化URL：小写协议和主机、去掉默认端口/片段/跟踪参数、查询参数排序"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS
+    )
+
+    return urlunparse((scheme, host, parsed.path or '/', '', urlencode(query), ''))
+
+
+class BloomFilter:
+    """布隆过滤器，用固定内存记录已见过的URL"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str) -> bool:
+        """加入集合，返回该值此前是否（可能）已存在"""
+        existed = True
+        for position in self._positions(value):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                existed = False
+                self.bits[byte] |= 1 << bit
+        return existed
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(value))
+
+    def to_dict(self) -> Dict:
+        return {
+            'size': self.size,
+            'hash_count': self.hash_count,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BloomFilter':
+        return cls.from_bytes(data['size'], data['hash_count'], base64.b64decode(data['bits']))
+
+    @classmethod
+    def from_bytes(cls, size: int, hash_count: int, bits: bytes) -> 'BloomFilter':
+        if len(bits) != (size + 7) // 8:
+            raise ValueError(f"位数组长度 {len(bits)} 与大小 {size} 不符")
+        bloom = cls.__new__(cls)
+        bloom.size = size
+        bloom.hash_count = hash_count
+        bloom.bits = bytearray(bits)
+        return bloom
+
+
+class CrawlFrontier:
+    """待抓取队列
+
+    优先级数值越大越先抓取；同一主机的两次抓取之间至少间隔 politeness_delay 秒。
+    队列和已抓取数量每 checkpoint_every 次操作写入检查点文件，进程崩溃后可以从检查点继续。
+    布隆过滤器的位数组较大，单独写入 <检查点文件>.bloom，只在有新URL时写入，
+    定期检查点中最多每 bloom_checkpoint_seconds 秒写一次；恢复时队列中的URL会重新加入过滤器，
+    最后一次写入之后才见过的已完成URL可能被重新抓取。
+    """
+
+    def __init__(self, max_pages: int = 10, max_depth: int = 2, politeness_delay: float = 1.0,
+                 checkpoint_file: Optional[str] = None, checkpoint_every: int = 10,
+                 bloom_capacity: int = 100000, bloom_checkpoint_seconds: float = 30.0):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.politeness_delay = politeness_delay
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = checkpoint_every
+        self.bloom_checkpoint_seconds = bloom_checkpoint_seconds
+
+        self._heap: List[Tuple[float, int, str, int]] = []
+        # 已取出但尚未完成的URL，写入检查点后恢复时重新入队
+        self._in_flight: Dict[str, Tuple[float, int, str, int]] = {}
+        self._sequence = 0
+        self._host_ready_at: Dict[str, float] = {}
+        self._operations = 0
+        self.seen = BloomFilter(bloom_capacity)
+        # 过滤器自上次写入后是否有新URL，以及上次写入的时间
+        self._seen_dirty = True
+        self._seen_saved_at = float('-inf')
+        self.pages_done = 0
+
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            self._load_checkpoint()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def exhausted(self) -> bool:
+        """队列为空或已达到页面预算"""
+        return not self._heap or self.pages_done >= self.max_pages
+
+    def add(self, url: str, depth: int = 0, priority: float = 0.0) -> bool:
+        """加入待抓取URL，已见过或超过深度限制时返回False"""
+        if depth > self.max_depth:
+            return False
+
+        canonical = canonicalize_url(url)
+        if self.seen.add(canonical):
+            return False
+        self._seen_dirty = True
+
+        heapq.heappush(self._heap, (-priority, self._sequence, canonical, depth))
+        self._sequence += 1
+        self._tick()
+        return True
+
+    def next(self, wait: bool = True) -> Optional[Tuple[str, int]]:
+        """取出下一个可抓取的 (url, depth)
+
+        优先返回礼貌间隔已到的主机中优先级最高的URL；所有主机都在等待时，
+        wait为True则休眠到最早可用的时间，否则返回None。
+        """
+        while not self.exhausted:
+            now = time.monotonic()
+            deferred = []
+            entry = None
+            while self._heap:
+                candidate = heapq.heappop(self._heap)
+                host = urlparse(candidate[2]).netloc
+                if self._host_ready_at.get(host, 0) <= now:
+                    entry = candidate
+                    break
+                deferred.append(candidate)
+
+            for item in deferred:
+                heapq.heappush(self._heap, item)
+
+            if entry:
+                host = urlparse(entry[2]).netloc
+                self._host_ready_at[host] = now + self.politeness_delay
+                self._in_flight[entry[2]] = entry
+                self._tick()
+                return entry[2], entry[3]
+
+            if not wait:
+                return None
+            earliest = min(self._host_ready_at.get(urlparse(item[2]).netloc, 0) for item in deferred)
+            time.sleep(max(0.0, earliest - now))
+
+        return None
+
+    def mark_done(self, url: str, counts_toward_budget: bool = True):
+        """标记URL处理完成；counts_toward_budget为False时不计入页面预算（如列表页）"""
+        self._in_flight.pop(url, None)
+        if counts_toward_budget:
+            self.pages_done += 1
+        self._tick()
+
+    @property
+    def bloom_file(self) -> Optional[str]:
+        return f"{self.checkpoint_file}.bloom" if self.checkpoint_file else None
+
+    def checkpoint(self, periodic: bool = False):
+        """写入检查点（先写临时文件再替换，避免写到一半崩溃）
+
+        periodic为True时（操作计数触发），布隆过滤器距上次写入不足 bloom_checkpoint_seconds 秒则跳过。
+        """
+        if not self.checkpoint_file:
+            return
+
+        now = time.monotonic()
+        if self._seen_dirty and (not periodic or now - self._seen_saved_at >= self.bloom_checkpoint_seconds):
+            self._write_atomic(self.bloom_file, bytes(self.seen.bits))
+            self._seen_dirty = False
+            self._seen_saved_at = now
+
+        data = {
+            'heap': self._heap + list(self._in_flight.values()),
+            'sequence': self._sequence,
+            'pages_done': self.pages_done,
+            'seen': {'size': self.seen.size, 'hash_count': self.seen.hash_count}
+        }
+        self._write_atomic(self.checkpoint_file, json.dumps(data).encode('utf-8'))
+
+    def clear_checkpoint(self):
+        """任务正常结束后删除检查点"""
+        for path in (self.checkpoint_file, self.bloom_file):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _write_atomic(self, path: str, data: bytes):
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, path)
+
+    def _tick(self):
+        self._operations += 1
+        if self.checkpoint_every and self._operations % self.checkpoint_every == 0:
+            self.checkpoint(periodic=True)
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._heap = [tuple(item) for item in data['heap']]
+            heapq.heapify(self._heap)
+            self._sequence = data['sequence']
+            self.pages_done = data['pages_done']
+            self._load_seen(data['seen'])
+            logger.info(f"从检查点恢复抓取队列: 待抓取 {len(self._heap)}, 已完成 {self.pages_done}")
+        except Exception as e:
+            logger.warning(f"检查点读取失败，重新开始: {e}")
+
+    def _load_seen(self, seen: Dict):
+        try:
+            with open(self.bloom_file, 'rb') as f:
+                self.seen = BloomFilter.from_bytes(seen['size'], seen['hash_count'], f.read())
+            self._seen_dirty = False
+        except (OSError, ValueError) as e:
+            logger.warning(f"布隆过滤器文件读取失败，只按检查点中的队列去重: {e}")
+        # 过滤器文件可能早于检查点写入，队列中的URL重新加入
+        for _, _, url, _ in self._heap:
+            if not self.seen.add(url):
+                self._seen_dirty = True
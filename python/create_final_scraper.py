@@ -7,12 +7,15 @@
 import sys
 import json
 import time
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
 import logging
 
+from rate_limiter import AdaptiveRateLimiter, RateLimitedSession
+from resilient_fetch import ResilientFetcher
+from results_store import ResultsWriter, iter_results
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -30,7 +33,11 @@ class FinalWebScraper:
     def __init__(self, config):
         self.config = config
         self.task_id = config.get('task_id', 1)
-        self.session = requests.Session()
+        # 按主机自适应限速，delay_ms 作为初始请求间隔
+        self.rate_limiter = AdaptiveRateLimiter.from_config(config)
+        self.session = RateLimitedSession(self.rate_limiter)
+        # 页面请求带重试和按主机熔断
+        self.fetcher = ResilientFetcher.from_config(self.session, config)
         
         # 设置请求头
         self.session.headers.update({
@@ -41,14 +48,16 @@ class FinalWebScraper:
             'Connection': 'keep-alive',
         })
         
-        # 存储抓取结果
-        self.scraped_items = []
+        # 抓取结果逐项追加写入文件（扩展名决定格式: .jsonl / .jsonl.zst / .parquet）
+        self.results_file = config.get('results_file', 'final_scraping_results.jsonl')
+        self.results_writer = None
+        self.total_content_length = 0
         
     def find_nhk_articles(self, base_url, max_articles=10):
         """查找NHK Easy News文章链接"""
         try:
             logger.info(f"访问NHK主页: {base_url}")
-            response = self.session.get(base_url, timeout=30)
+            response = self.fetcher.get(base_url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -75,7 +84,7 @@ class FinalWebScraper:
         """抓取单篇文章"""
         try:
             logger.info(f"抓取文章: {url}")
-            response = self.session.get(url, timeout=30)
+            response = self.fetcher.get(url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -170,8 +179,9 @@ class FinalWebScraper:
             'import_task_id': self.task_id
         }
         
-        # 添加到结果列表
-        self.scraped_items.append(save_data)
+        # 追加写入结果文件
+        self.results_writer.write(save_data)
+        self.total_content_length += len(save_data['content'])
         logger.info(f"模拟保存成功: {article_data['title'][:30]}...")
     
     def run_scraping_job(self):
@@ -179,11 +189,11 @@ class FinalWebScraper:
         try:
             urls = self.config.get('urls', [])
             max_pages = self.config.get('max_pages', 10)
-            delay_ms = self.config.get('delay_ms', 1000)
             
             logger.info(f"开始抓取任务，目标URLs: {len(urls)}, 最大页面: {max_pages}")
             
             total_processed = 0
+            self.results_writer = ResultsWriter(self.results_file, append=False)
             
             for base_url in urls:
                 logger.info(f"处理URL: {base_url}")
@@ -202,10 +212,6 @@ class FinalWebScraper:
                         if article_data:
                             self.simulate_database_save(article_data)
                             total_processed += 1
-                        
-                        # 延迟
-                        if delay_ms > 0:
-                            time.sleep(delay_ms / 1000)
                 else:
                     # 直接抓取URL
                     article_data = self.scrape_single_article(base_url)
@@ -213,29 +219,35 @@ class FinalWebScraper:
                         self.simulate_database_save(article_data)
                         total_processed += 1
             
-            # 保存结果
-            output_file = 'final_scraping_results.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.scraped_items, f, ensure_ascii=False, indent=2)
+            # 写出最后一批结果
+            self.results_writer.close()
+            output_file = self.results_writer.path
+            saved_count = self.results_writer.count
             
             logger.info(f"抓取任务完成！共处理 {total_processed} 篇文章")
             logger.info(f"结果已保存到: {output_file}")
             
             # 打印摘要报告
             print(f"\n🎉 抓取任务完成摘要:")
-            print(f"📄 成功抓取文章数: {len(self.scraped_items)}")
-            print(f"📊 平均内容长度: {sum(len(item['content']) for item in self.scraped_items) // len(self.scraped_items) if self.scraped_items else 0} 字符")
+            print(f"📄 成功抓取文章数: {saved_count}")
+            print(f"🚦 限速状态: {json.dumps(self.rate_limiter.metrics(), ensure_ascii=False)}")
+            print(f"🔁 重试与熔断状态: {json.dumps(self.fetcher.metrics(), ensure_ascii=False)}")
+            print(f"📊 平均内容长度: {self.total_content_length // saved_count if saved_count else 0} 字符")
             
-            for i, item in enumerate(self.scraped_items, 1):
+            # 从结果文件逐项读回，不在内存中保留全部结果
+            for i, item in enumerate(iter_results(output_file), 1):
                 print(f"\n{i}. {item['name'][:50]}...")
                 print(f"   📝 内容长度: {len(item['content'])} 字符")
                 print(f"   🔗 来源: {item['source_url']}")
             
-            return len(self.scraped_items)
+            return saved_count
             
         except Exception as e:
             logger.error(f"抓取任务失败: {e}")
             return 0
+        finally:
+            if self.results_writer:
+                self.results_writer.close()
 
 def main():
     """主函数 - 可以接受配置文件参数，也可以使用默认配置"""
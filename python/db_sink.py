@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取结果的数据库写入
+资源记录放进有界队列，由后台写入线程按批插入（一批一次提交），抓取线程只在队列满时等待；
+任务进度只保留最新一次，由写入线程顺带更新。连接取自 mysql.connector 连接池，
+写入线程和任务状态更新各用各的连接，一次慢提交不会拖住页面请求。
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from mysql.connector import pooling
+
+logger = logging.getLogger(__name__)
+
+INSERT_RESOURCE_SQL = """
+    INSERT INTO resource_items (name, type, source, url, content, status, metadata, created_at, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+"""
+UPDATE_RESOURCE_SQL = """
+    UPDATE resource_items
+    SET name = %s, content = %s, metadata = %s, updated_at = NOW()
+    WHERE url = %s AND type = %s
+"""
+UPDATE_PROGRESS_SQL = """
+    UPDATE import_tasks
+    SET items_processed = %s, progress = %s, logs = %s, updated_at = NOW()
+    WHERE id = %s
+"""
+COMPLETE_TASK_SQL = """
+    UPDATE import_tasks
+    SET status = %s, progress = %s, items_processed = %s, logs = %s, updated_at = NOW()
+    WHERE id = %s
+"""
+
+# resource_items.url 列的长度，更长的URL不记录（不参与按URL去重）
+MAX_URL_LENGTH = 768
+# 按URL查询已保存资源时每条语句的URL数量
+URL_LOOKUP_CHUNK = 500
+
+# 队列空闲时写入线程检查待写进度的间隔（秒）
+FLUSH_INTERVAL = 0.5
+_STOP = object()
+
+
+def create_pool(name: str, size: int) -> pooling.MySQLConnectionPool:
+    """按环境变量中的数据库配置创建连接池"""
+    return pooling.MySQLConnectionPool(
+        pool_name=name,
+        pool_size=size,
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_DATABASE', '90nihongo'),
+        user=os.getenv('DB_USERNAME', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        charset='utf8mb4'
+    )
+
+
+class DatabaseSink:
+    """带连接池和后台写入线程的数据库写入器"""
+
+    def __init__(self, pool: pooling.MySQLConnectionPool, task_id: Optional[int] = None,
+                 content_type: str = 'course', queue_size: int = 100, batch_size: int = 20,
+                 metrics=None):
+        self.pool = pool
+        self.task_id = task_id
+        self.content_type = content_type
+        self.batch_size = batch_size
+        self.metrics = metrics
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # 最新一次待写入的进度 (items_processed, progress, logs_json)
+        self._progress: Optional[Tuple[int, float, str]] = None
+        self._progress_lock = threading.Lock()
+
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+
+        self._writer = threading.Thread(target=self._run, name='scraper-db-writer', daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def connect(cls, config: Dict, metrics=None) -> 'DatabaseSink':
+        """创建连接池（写入线程 + 任务状态更新，至少2个连接）和写入器"""
+        pool = create_pool(f"scraper_{config.get('task_id') or os.getpid()}",
+                           max(2, config.get('db_pool_size', 2)))
+        return cls(
+            pool,
+            task_id=config.get('task_id'),
+            content_type=config.get('content_type', 'course'),
+            queue_size=config.get('db_queue_size', 100),
+            batch_size=config.get('db_batch_size', 20),
+            metrics=metrics
+        )
+
+    def submit(self, content_data: Dict, on_done: Optional[Callable[[bool], None]] = None):
+        """排队写入一条资源；队列满时阻塞等待。on_done(是否成功) 在写入线程中调用"""
+        start = time.perf_counter()
+        self._queue.put((content_data, on_done))
+        waited_ms = (time.perf_counter() - start) * 1000
+        if self.metrics and waited_ms >= 1:
+            self.metrics.observe('db_queue_wait', waited_ms)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def update_progress(self, items_processed: int, total_items: int, logs: List[str]):
+        """记录最新进度，由写入线程在下一批写完或空闲时更新到任务表"""
+        if not self.task_id:
+            return
+        progress = (items_processed / total_items * 100) if total_items > 0 else 0
+        # 在调用线程中序列化，写入线程不读取仍在变化的日志列表
+        with self._progress_lock:
+            self._progress = (items_processed, progress, json.dumps(logs, ensure_ascii=False))
+
+    def flush(self):
+        """等待已排队的记录全部写完（或确认失败）"""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """写完队列中剩余的记录和进度后停止写入线程"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def complete_task(self, items_processed: int, logs: List[str]):
+        """写完所有排队的记录后把任务标记为完成"""
+        self.close()
+        if not self.task_id:
+            return
+        try:
+            self._execute(COMPLETE_TASK_SQL, ('completed', 100, items_processed,
+                                              json.dumps(logs, ensure_ascii=False), self.task_id))
+        except Exception as e:
+            logger.error(f"更新任务完成状态失败: {e}")
+
+    def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        """返回其中已经保存到resource_items的URL"""
+        urls = [url for url in dict.fromkeys(urls) if url and len(url) <= MAX_URL_LENGTH]
+        found = set()
+        if not urls:
+            return found
+        connection = self.pool.get_connection()
+        try:
+            cursor = connection.cursor()
+            for start in range(0, len(urls), URL_LOOKUP_CHUNK):
+                chunk = urls[start:start + URL_LOOKUP_CHUNK]
+                cursor.execute(
+                    f"SELECT url FROM resource_items WHERE url IN ({', '.join(['%s'] * len(chunk))})", chunk
+                )
+                found.update(row[0] for row in cursor.fetchall())
+            cursor.close()
+        finally:
+            connection.close()
+        return found
+
+    def update_by_url(self, items: List[Dict]) -> int:
+        """按URL更新已保存资源的标题、正文和元数据（--reprocess重新提取后使用），返回更新的行数
+
+        直接在调用线程中执行，不经过写入队列；没有URL或数据库中没有对应记录的资源跳过。
+        """
+        rows = [
+            (content_data['title'], content_data['content'],
+             json.dumps(content_data['metadata'], ensure_ascii=False), content_data['url'], self.content_type)
+            for content_data in items
+            if content_data.get('url') and len(content_data['url']) <= MAX_URL_LENGTH
+        ]
+        if not rows:
+            return 0
+        connection = self.pool.get_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(UPDATE_RESOURCE_SQL, rows)
+                connection.commit()
+                return cursor.rowcount
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def stats(self) -> Dict:
+        return {
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                self._write_progress()
+                continue
+
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                self._write_progress()
+            except Exception as e:
+                # 写入线程不能退出，否则 flush()/close() 会一直等待
+                logger.error(f"写入线程处理批次出错: {e}")
+            finally:
+                # 停止标记也要计入，flush() 才不会一直等待
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+
+    def _row(self, content_data: Dict) -> Tuple:
+        url = content_data.get('url')
+        return (
+            content_data['title'],
+            self.content_type,
+            content_data['metadata']['source'],
+            url if url and len(url) <= MAX_URL_LENGTH else None,
+            content_data['content'],
+            'completed',
+            json.dumps(content_data['metadata'], ensure_ascii=False)
+        )
+
+    def _write_batch(self, batch: List[Tuple[Dict, Optional[Callable[[bool], None]]]]):
+        # 缺少字段或元数据无法序列化的记录单独判为失败，不影响同批的其他记录
+        rows = []
+        valid = []
+        for content_data, on_done in batch:
+            try:
+                rows.append(self._row(content_data))
+                valid.append((content_data, on_done))
+            except Exception as e:
+                logger.error(f"资源数据无效，跳过: {e}")
+                self._finish(content_data, on_done, False)
+        if not rows:
+            return
+        batch = valid
+
+        start = time.perf_counter()
+        try:
+            connection = self.pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    cursor.executemany(INSERT_RESOURCE_SQL, rows)
+                    connection.commit()
+                    results = [True] * len(rows)
+                except Exception as e:
+                    connection.rollback()
+                    logger.warning(f"批量写入 {len(rows)} 条资源失败，改为逐条写入: {e}")
+                    results = [self._insert_one(connection, cursor, row) for row in rows]
+                cursor.close()
+            finally:
+                # 归还连接池
+                connection.close()
+        except Exception as e:
+            logger.error(f"获取数据库连接失败: {e}")
+            results = [False] * len(rows)
+
+        self.batches += 1
+        if self.metrics:
+            self.metrics.observe('db_write', (time.perf_counter() - start) * 1000)
+
+        for (content_data, on_done), saved in zip(batch, results):
+            self._finish(content_data, on_done, saved)
+
+    def _finish(self, content_data: Dict, on_done: Optional[Callable[[bool], None]], saved: bool):
+        if saved:
+            self.written += 1
+            logger.info(f"成功保存资源: {content_data['title']}")
+        else:
+            self.failed += 1
+        if on_done:
+            try:
+                on_done(saved)
+            except Exception as e:
+                logger.error(f"写入回调出错: {e}")
+
+    def _insert_one(self, connection, cursor, row: Tuple) -> bool:
+        try:
+            cursor.execute(INSERT_RESOURCE_SQL, row)
+            connection.commit()
+            return True
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"保存资源到数据库失败: {row[0]}: {e}")
+            return False
+
+    def _write_progress(self):
+        with self._progress_lock:
+            progress, self._progress = self._progress, None
+        if progress is None:
+            return
+        items_processed, percent, logs_json = progress
+        try:
+            self._execute(UPDATE_PROGRESS_SQL, (items_processed, percent, logs_json, self.task_id))
+        except Exception as e:
+            logger.error(f"更新任务进度失败: {e}")
+
+    def _execute(self, sql: str, params: Tuple):
+        connection = self.pool.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql, params)
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
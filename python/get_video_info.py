@@ -11,6 +11,8 @@ import requests
 import re
 from urllib.parse import urlparse
 
+from job_profiler import run_profiled
+
 def extract_bv_id(url):
     """从B站URL中提取BV号"""
     patterns = [
@@ -138,4 +140,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_profiled('get_video_info', main) 
\ No newline at end of file
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取页面原始HTML存档
+正文按SHA-256内容寻址压缩保存（相同内容只存一份），每次请求的URL、状态码、响应头等元数据
+记入SQLite索引。修改提取逻辑后可以用 web_scraper.py --reprocess 离线重新提取，不必重新抓取。
+压缩优先使用zstandard（可选依赖），未安装时使用gzip；读取时两种格式都支持。
+"""
+
+import os
+import gzip
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 存档中保留的响应头
+KEPT_HEADERS = ('Content-Type', 'Content-Encoding', 'ETag', 'Last-Modified', 'Date', 'Server')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    status INTEGER,
+    size INTEGER NOT NULL,
+    elapsed_ms REAL,
+    headers TEXT,
+    extra TEXT,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches (url, id);
+"""
+
+
+class HtmlArchive:
+    """内容寻址的HTML存档：objects/前两位/<sha256>.zst|.gz + index.sqlite"""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self.extension = '.zst' if zstandard is not None else '.gz'
+        self.connection = sqlite3.connect(os.path.join(root_dir, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha256: str, extension: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + extension)
+
+    def put(self, url: str, body: bytes, status: Optional[int] = None, headers=None,
+            elapsed_ms: Optional[float] = None, extra: Optional[Dict] = None) -> str:
+        """保存一次请求的正文和元数据，返回正文的SHA-256"""
+        sha256 = hashlib.sha256(body).hexdigest()
+        if not any(os.path.exists(self._object_path(sha256, ext)) for ext in ('.zst', '.gz')):
+            path = self._object_path(sha256, self.extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = zstandard.ZstdCompressor().compress(body) if self.extension == '.zst' else gzip.compress(body, 6)
+            # 先写临时文件再替换，并发写入同一内容时也不会读到半个文件
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        kept = {key: headers[key] for key in KEPT_HEADERS if headers and key in headers}
+        with self._lock:
+            self.connection.execute(
+                "INSERT INTO fetches (url, sha256, status, size, elapsed_ms, headers, extra, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, sha256, status, len(body), elapsed_ms, json.dumps(kept, ensure_ascii=False),
+                 json.dumps(extra or {}, ensure_ascii=False), datetime.now().isoformat(timespec='seconds'))
+            )
+            self.connection.commit()
+        return sha256
+
+    def read(self, sha256: str) -> bytes:
+        """读取正文"""
+        path = self._object_path(sha256, '.zst')
+        if os.path.exists(path):
+            if zstandard is None:
+                raise ImportError("读取zstd压缩的存档需要安装zstandard")
+            with open(path, 'rb') as f:
+                return zstandard.ZstdDecompressor().decompress(f.read())
+        with gzip.open(self._object_path(sha256, '.gz'), 'rb') as f:
+            return f.read()
+
+    def latest(self, url_prefix: Optional[str] = None) -> Iterator[Tuple[str, str, Dict]]:
+        """每个URL最近一次成功请求的 (url, sha256, 元数据)"""
+        query = ("SELECT url, sha256, status, headers, extra, fetched_at FROM fetches WHERE id IN "
+                 "(SELECT MAX(id) FROM fetches WHERE status IS NULL OR status < 400 GROUP BY url)")
+        params = ()
+        if url_prefix:
+            query += " AND url >= ? AND url < ?"
+            params = (url_prefix, url_prefix + '\uffff')
+        with self._lock:
+            rows = self.connection.execute(query + " ORDER BY id", params).fetchall()
+        for url, sha256, status, headers, extra, fetched_at in rows:
+            yield url, sha256, {
+                'status': status,
+                'headers': json.loads(headers or '{}'),
+                'fetched_at': fetched_at,
+                **json.loads(extra or '{}')
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            fetches, urls, objects, raw_bytes = self.connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT sha256), "
+                "COALESCE(SUM(size), 0) FROM fetches"
+            ).fetchone()
+        return {'fetches': fetches, 'urls': urls, 'objects': objects, 'raw_bytes': raw_bytes}
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python入口脚本的性能分析钩子
+通过命令行 --profile[=模式] 或环境变量 NIHONGO_PROFILE 开启，包装整个运行过程：
+  cprofile  cProfile确定性分析，输出 .pstats 和按累计耗时排序的 .txt
+  sample    内置采样分析，输出折叠栈 .collapsed（可直接交给flamegraph.pl / speedscope）
+  py-spy    调用外部 py-spy 采样（未安装时退回 sample）
+无论哪种模式都会写出 .summary.json，记录墙钟时间、CPU时间和峰值内存。
+输出只写到文件和stderr，不影响脚本打印到stdout的JSON结果。
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import pstats
+import logging
+import cProfile
+import threading
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows下没有resource模块
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = 'NIHONGO_PROFILE'
+PROFILE_DIR_ENV = 'NIHONGO_PROFILE_DIR'
+PROFILE_MODES = ('cprofile', 'sample', 'py-spy')
+
+
+def pop_profile_args(argv: List[str]) -> Tuple[Optional[str], Optional[str]]:
+    """从argv中取出 --profile[=模式] 和 --profile-dir，避免干扰脚本自己的参数解析"""
+    mode = None
+    output_dir = None
+    remaining = argv[:1]
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--profile':
+            mode = 'cprofile'
+        elif arg.startswith('--profile='):
+            mode = arg.split('=', 1)[1]
+        elif arg == '--profile-dir' and i + 1 < len(argv):
+            output_dir = argv[i + 1]
+            i += 1
+        elif arg.startswith('--profile-dir='):
+            output_dir = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+        i += 1
+    argv[:] = remaining
+    return mode, output_dir
+
+
+def _normalize_mode(mode: Optional[str]) -> Optional[str]:
+    if not mode:
+        return None
+    mode = mode.strip().lower()
+    if mode in ('0', 'false', 'off', 'no'):
+        return None
+    if mode in ('1', 'true', 'on', 'yes'):
+        return 'cprofile'
+    if mode not in PROFILE_MODES:
+        logger.warning(f"未知的分析模式 {mode}，改用 cprofile")
+        return 'cprofile'
+    return mode
+
+
+class StackSampler:
+    """定时采样指定线程的调用栈，汇总为折叠栈格式（与 py-spy --format raw 相同）"""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _resource_usage() -> Dict:
+    usage = {'cpu_seconds': time.process_time()}
+    if resource is not None:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage.update({
+            'user': own.ru_utime,
+            'system': own.ru_stime,
+            'children': children.ru_utime + children.ru_stime,
+            # Linux下ru_maxrss单位为KB，macOS下为字节
+            'peak_rss_mb': own.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        })
+    return usage
+
+
+def run_profiled(name: str, func: Callable, argv: Optional[List[str]] = None):
+    """运行入口函数，按需开启性能分析并写出结果；未开启时直接调用func"""
+    argv = sys.argv if argv is None else argv
+    arg_mode, arg_dir = pop_profile_args(argv)
+    mode = _normalize_mode(arg_mode or os.environ.get(PROFILE_ENV))
+    if mode is None:
+        return func()
+
+    output_dir = arg_dir or os.environ.get(PROFILE_DIR_ENV) or 'profiles'
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.join(output_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+    files = []
+
+    profiler = None
+    sampler = None
+    py_spy = None
+    if mode == 'py-spy':
+        py_spy_path = shutil.which('py-spy')
+        if py_spy_path:
+            files.append(f"{stem}.collapsed")
+            py_spy = subprocess.Popen(
+                [py_spy_path, 'record', '--pid', str(os.getpid()), '--format', 'raw',
+                 '--rate', '200', '--output', files[-1]],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        else:
+            print("未找到py-spy，改用内置采样分析", file=sys.stderr)
+            mode = 'sample'
+    if mode == 'sample':
+        sampler = StackSampler()
+        sampler.start()
+    elif mode == 'cprofile':
+        profiler = cProfile.Profile()
+
+    exit_status = 0
+    start_usage = _resource_usage()
+    start = time.perf_counter()
+    try:
+        result = profiler.runcall(func) if profiler else func()
+        # 入口函数返回的退出码（如 sys.exit(run_profiled(...))）
+        if isinstance(result, int) and not isinstance(result, bool):
+            exit_status = result
+        return result
+    except SystemExit as e:
+        exit_status = 0 if e.code is None else e.code if isinstance(e.code, int) else 1
+        raise
+    except BaseException:
+        exit_status = 1
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        end_usage = _resource_usage()
+
+        if profiler:
+            files.append(f"{stem}.pstats")
+            profiler.dump_stats(files[-1])
+            files.append(f"{stem}.txt")
+            with open(files[-1], 'w', encoding='utf-8') as f:
+                pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(50)
+        if sampler:
+            sampler.stop()
+            files.append(f"{stem}.collapsed")
+            sampler.write(files[-1])
+        if py_spy:
+            py_spy.send_signal(signal.SIGINT)
+            try:
+                py_spy.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                py_spy.kill()
+
+        summary = {
+            'script': name,
+            'mode': mode,
+            'exit_status': exit_status,
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(end_usage['cpu_seconds'] - start_usage['cpu_seconds'], 3),
+            'files': files
+        }
+        if resource is not None:
+            summary.update({
+                'cpu_user_seconds': round(end_usage['user'] - start_usage['user'], 3),
+                'cpu_system_seconds': round(end_usage['system'] - start_usage['system'], 3),
+                # ffmpeg等子进程消耗的CPU
+                'children_cpu_seconds': round(end_usage['children'] - start_usage['children'], 3),
+                'peak_rss_mb': round(end_usage['peak_rss_mb'], 1)
+            })
+        with open(f"{stem}.summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"性能分析摘要: {json.dumps(summary, ensure_ascii=False)}", file=sys.stderr)
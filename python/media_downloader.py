@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取媒体文件下载器
+分块流式写入磁盘、按主机限制并发、按URL和内容哈希去重，大文件支持Range断点续传
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from resilient_fetch import ResponseTooLargeError
+
+logger = logging.getLogger(__name__)
+
+# 单独调用download()时，两次保存URL索引的最短间隔（秒）
+INDEX_SAVE_INTERVAL = 5.0
+
+# 单个媒体文件的默认大小上限
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+class MediaDownloader:
+    """媒体文件下载器
+
+    文件按内容SHA-256存放: <storage_dir>/<file_type>/<哈希前两位>/<哈希><扩展名>，
+    相同内容只保存一份；URL到文件的映射保存在 <storage_dir>/media_index.json。
+    超过 max_bytes 的文件（按Content-Length或实际读取的字节数）中止下载并删除临时文件。
+    """
+
+    def __init__(self, storage_dir: str = 'storage/app/public/scraped-content',
+                 session: Optional[requests.Session] = None, max_workers: int = 8,
+                 per_host_limit: int = 2, chunk_size: int = 64 * 1024, timeout: int = 30,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir = self.storage_dir / '.partial'
+        self.partial_dir.mkdir(exist_ok=True)
+
+        self.session = session or requests.Session()
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+        self._host_limits: Dict[str, threading.Semaphore] = {}
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.index_file = self.storage_dir / 'media_index.json'
+        self._index: Dict[str, Dict] = {}
+        self._index_dirty = False
+        self._index_saved_at = 0.0
+        self._save_lock = threading.Lock()
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except Exception as e:
+                logger.warning(f"媒体索引读取失败，将重新建立: {e}")
+
+    def download_many(self, urls: List[str], file_type: str) -> Dict[str, str]:
+        """并发下载多个文件，返回 URL -> 相对路径（失败的URL不包含在结果中）"""
+        unique_urls = list(dict.fromkeys(urls))
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(unique_urls)))) as executor:
+            for url, path in zip(unique_urls, executor.map(
+                    lambda u: self.download(u, file_type, save_index=False), unique_urls)):
+                if path:
+                    results[url] = path
+
+        self.save_index()
+        return results
+
+    def download(self, url: str, file_type: str, save_index: bool = True) -> Optional[str]:
+        """下载单个文件，返回相对于 storage/app/public 的路径
+
+        save_index为True时按INDEX_SAVE_INTERVAL间隔保存URL索引；
+        批量下载时由download_many在结束后统一保存。
+        """
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            cached = self._index.get(url)
+            if cached and (self.storage_dir / cached['path']).exists():
+                return self._public_path(cached['path'])
+
+            host = urlparse(url).netloc
+            with self._lock:
+                host_limit = self._host_limits.setdefault(host, threading.Semaphore(self.per_host_limit))
+
+            with host_limit:
+                try:
+                    digest, size, partial_file = self._fetch(url)
+                except Exception as e:
+                    logger.error(f"下载媒体文件失败 {url}: {e}")
+                    return None
+
+            extension = Path(urlparse(url).path).suffix or ('.jpg' if file_type == 'images' else '.mp3')
+            relative = Path(file_type) / digest[:2] / f"{digest}{extension}"
+            target = self.storage_dir / relative
+
+            if target.exists():
+                # 内容已存在（不同URL指向同一文件）
+                partial_file.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                partial_file.replace(target)
+
+            with self._lock:
+                self._index[url] = {'path': relative.as_posix(), 'sha256': digest, 'size': size}
+                self._index_dirty = True
+
+        if save_index and time.monotonic() - self._index_saved_at >= INDEX_SAVE_INTERVAL:
+            self.save_index()
+        return self._public_path(relative.as_posix())
+
+    def save_index(self):
+        """保存URL索引，没有新条目时不写入"""
+        with self._save_lock:
+            with self._lock:
+                if not self._index_dirty:
+                    return
+                data = json.dumps(self._index, ensure_ascii=False)
+                self._index_dirty = False
+                self._index_saved_at = time.monotonic()
+            temp_file = self.index_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(data)
+            temp_file.replace(self.index_file)
+
+    def _fetch(self, url: str):
+        """流式下载到临时文件，已有部分内容时使用Range续传"""
+        partial_file = self.partial_dir / hashlib.sha1(url.encode('utf-8')).hexdigest()
+        hasher = hashlib.sha256()
+        offset = partial_file.stat().st_size if partial_file.exists() else 0
+
+        headers = {}
+        if offset > 0:
+            headers['Range'] = f'bytes={offset}-'
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # 临时文件已经完整
+                response.close()
+                mode = None
+            else:
+                response.raise_for_status()
+                mode = 'ab' if offset > 0 and response.status_code == 206 else 'wb'
+
+            if mode == 'ab' or mode is None:
+                # 续传前先把已下载的部分计入哈希
+                with open(partial_file, 'rb') as f:
+                    for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                        hasher.update(chunk)
+            else:
+                offset = 0
+
+            size = offset
+            if mode is not None:
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and offset + int(declared) > self.max_bytes:
+                    partial_file.unlink(missing_ok=True)
+                    raise ResponseTooLargeError(
+                        f"媒体文件声明大小 {offset + int(declared)} 字节超过上限 {self.max_bytes}: {url}")
+                with open(partial_file, mode) as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                break
+                            f.write(chunk)
+                            hasher.update(chunk)
+                if size > self.max_bytes:
+                    # 不保留超限的临时文件，否则下次会从中间续传
+                    partial_file.unlink(missing_ok=True)
+                    raise ResponseTooLargeError(f"媒体文件超过上限 {self.max_bytes} 字节，已中止下载: {url}")
+
+        return hasher.hexdigest(), size, partial_file
+
+    def _public_path(self, relative: str) -> str:
+        """转换为与Laravel public磁盘一致的相对路径"""
+        return f"{self.storage_dir.name}/{relative}"
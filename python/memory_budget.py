@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取任务内存预算
+读取进程当前的常驻内存（RSS），超出预算时先回收垃圾，仍然超出则由抓取器停止处理剩余页面，
+以部分结果完成任务，而不是被系统OOM终止
+"""
+
+import gc
+import os
+import sys
+import logging
+from typing import Dict
+
+try:
+    import resource
+except ImportError:  # Windows下没有resource模块
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    """当前常驻内存（MB）；无法读取/proc时退回峰值内存"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # Linux下ru_maxrss单位为KB，macOS下为字节
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return 0.0
+
+
+class MemoryBudget:
+    """进程内存预算，limit_mb为0时不限制"""
+
+    def __init__(self, limit_mb: float = 0):
+        self.limit_mb = limit_mb
+        self.peak_mb = 0.0
+        self.collections = 0
+        self.exhausted = False
+
+    def exceeded(self) -> bool:
+        """检查是否超出预算；超出时先做一次完整的垃圾回收再判断"""
+        if not self.limit_mb:
+            return False
+        usage = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, usage)
+        if usage <= self.limit_mb:
+            return False
+
+        gc.collect()
+        self.collections += 1
+        usage = current_rss_mb()
+        if usage <= self.limit_mb:
+            return False
+
+        if not self.exhausted:
+            logger.warning(f"内存 {usage:.0f}MB 超出预算 {self.limit_mb}MB")
+        self.exhausted = True
+        return True
+
+    def metrics(self) -> Dict:
+        return {
+            'limit_mb': self.limit_mb,
+            'peak_rss_mb': round(max(self.peak_mb, current_rss_mb()), 1),
+            'gc_collections': self.collections,
+            'exhausted': self.exhausted
+        }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机自适应限速
+服务器响应快且稳定时逐步缩短请求间隔、提高并发；遇到429/503/超时时指数退避，并遵守Retry-After
+"""
+
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # 只有异步抓取器需要aiohttp
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# 视为服务器过载、需要退避的状态码
+THROTTLE_STATUS_CODES = (429, 502, 503, 504)
+# 视为服务器过载的网络错误
+THROTTLE_ERRORS = (requests.Timeout, requests.ConnectionError, TimeoutError)
+if aiohttp is not None:
+    THROTTLE_ERRORS += (aiohttp.ClientConnectionError,)
+# 等待并发名额时的轮询间隔（秒）
+POLL_INTERVAL = 0.05
+
+
+class HostState:
+    """单个主机的限速状态"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.concurrency = 1
+        self.in_flight = 0
+        self.next_allowed = 0.0
+        self.healthy_streak = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.total_latency = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'delay_ms': round(self.delay * 1000),
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000) if self.requests else 0,
+            'backoff_remaining_ms': max(0, round((self.next_allowed - time.monotonic()) * 1000))
+        }
+
+
+class AdaptiveRateLimiter:
+    """按主机的自适应限速器（加性增、乘性减）
+
+    每个主机维护请求间隔和并发上限：每次健康响应（延迟低于 target_latency）间隔乘以0.8，
+    连续 increase_every 次健康响应并发加1；响应变慢时间隔放大1.25倍；429/5xx/超时时间隔加倍、并发减半，
+    响应带Retry-After时在指定时间之前不再请求该主机。
+    """
+
+    def __init__(self, initial_delay: float = 1.0, min_delay: float = 0.1, max_delay: float = 60.0,
+                 max_concurrency: int = 4, target_latency: float = 2.0, increase_every: int = 3):
+        self.initial_delay = initial_delay
+        self.min_delay = min(min_delay, initial_delay)
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase_every = increase_every
+
+        self._hosts: Dict[str, HostState] = {}
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'AdaptiveRateLimiter':
+        """从抓取任务配置创建（delay_ms 作为初始间隔）"""
+        return cls(
+            initial_delay=config.get('delay_ms', 1000) / 1000,
+            min_delay=config.get('min_delay_ms', 100) / 1000,
+            max_delay=config.get('max_delay_ms', 60000) / 1000,
+            max_concurrency=config.get('max_concurrency', 4)
+        )
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.initial_delay)
+        return state
+
+    def acquire(self, url: str):
+        """等待直到可以向该主机发出请求"""
+        host = urlparse(url).netloc
+        with self._condition:
+            while True:
+                state = self._state(host)
+                now = time.monotonic()
+                if state.in_flight < state.concurrency and now >= state.next_allowed:
+                    state.in_flight += 1
+                    state.next_allowed = now + state.delay / state.concurrency
+                    return
+                timeout = state.next_allowed - now if now < state.next_allowed else None
+                self._condition.wait(timeout)
+
+    def try_acquire(self, url: str) -> float:
+        """不阻塞的acquire：成功时返回0，否则返回建议等待的秒数（供asyncio.sleep使用）"""
+        host = urlparse(url).netloc
+        with self._condition:
+            state = self._state(host)
+            now = time.monotonic()
+            if state.in_flight < state.concurrency and now >= state.next_allowed:
+                state.in_flight += 1
+                state.next_allowed = now + state.delay / state.concurrency
+                return 0.0
+            if now < state.next_allowed:
+                return state.next_allowed - now
+            return POLL_INTERVAL
+
+    def release(self, url: str, status_code: Optional[int] = None, latency: float = 0.0,
+                error: Optional[Exception] = None, retry_after: Optional[float] = None):
+        """记录请求结果并调整该主机的限速参数"""
+        host = urlparse(url).netloc
+        with self._condition:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            state.requests += 1
+            state.total_latency += latency
+
+            throttled = status_code in THROTTLE_STATUS_CODES or isinstance(error, THROTTLE_ERRORS)
+
+            if throttled:
+                state.throttled += 1
+                state.healthy_streak = 0
+                state.delay = min(self.max_delay, max(state.delay * 2, self.initial_delay))
+                state.concurrency = max(1, state.concurrency // 2)
+                wait = max(state.delay, retry_after or 0)
+                state.next_allowed = max(state.next_allowed, time.monotonic() + wait)
+                logger.warning(f"{host} 限流或超时 ({status_code or error.__class__.__name__})，"
+                               f"{wait:.1f}秒后重试，并发降为 {state.concurrency}")
+            elif error is not None or (status_code or 0) >= 400:
+                state.errors += 1
+                state.healthy_streak = 0
+            elif latency > self.target_latency:
+                state.healthy_streak = 0
+                state.delay = min(self.max_delay, state.delay * 1.25)
+            else:
+                state.healthy_streak += 1
+                state.delay = max(self.min_delay, state.delay * 0.8)
+                if state.healthy_streak >= self.increase_every:
+                    state.healthy_streak = 0
+                    state.concurrency = min(self.max_concurrency, state.concurrency + 1)
+
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """各主机当前的限速状态"""
+        with self._condition:
+            return {host: state.to_dict() for host, state in self._hosts.items()}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitedSession(requests.Session):
+    """所有请求都经过自适应限速器的会话，可直接替换 requests.Session"""
+
+    def __init__(self, limiter: AdaptiveRateLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, method, url, *args, **kwargs):
+        self.limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            self.limiter.release(url, latency=time.monotonic() - start, error=e)
+            raise
+
+        self.limiter.release(
+            url,
+            status_code=response.status_code,
+            latency=time.monotonic() - start,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
+        return response
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+带重试和熔断的页面请求
+暂时性错误（超时、连接失败、429/5xx）按指数退避加随机抖动重试；
+同一主机连续失败达到阈值后熔断，冷却期内直接失败，不再为每个URL等待超时
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 可以重试的状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# 流式读取响应体的块大小
+CHUNK_SIZE = 64 * 1024
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态"""
+    pass
+
+
+class ResponseTooLargeError(Exception):
+    """响应体超过允许的大小"""
+    pass
+
+
+class CircuitBreaker:
+    """单个主机的熔断器
+
+    closed: 正常请求；连续失败 failure_threshold 次后进入 open。
+    open: 冷却 reset_timeout 秒内所有请求直接失败；冷却结束后进入 half_open。
+    half_open: 只放行一个试探请求，成功则恢复 closed，失败则重新 open。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+        if self.state == 'half_open':
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self._probing = False
+
+    def cancel_probe(self):
+        """请求因与主机健康无关的原因失败（如URL无效）时释放试探名额"""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            if self.state != 'open':
+                self.trips += 1
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+
+class ResilientFetcher:
+    """带重试和按主机熔断的GET请求
+
+    返回最后一次的响应，由调用方决定如何处理状态码（如304、404）；
+    主机熔断时抛出 CircuitOpenError，重试用尽的网络错误原样抛出。
+    """
+
+    def __init__(self, session: requests.Session, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, timeout: Tuple[float, float] = (5, 30),
+                 failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.session = session
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._retries: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, session: requests.Session, config: Dict) -> 'ResilientFetcher':
+        """从抓取任务配置创建"""
+        return cls(
+            session,
+            max_retries=config.get('max_retries', 3),
+            timeout=(config.get('connect_timeout', 5), config.get('read_timeout', 30)),
+            failure_threshold=config.get('circuit_failure_threshold', 5),
+            reset_timeout=config.get('circuit_reset_seconds', 60)
+        )
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                breaker = self._breaker(host)
+                if not breaker.allow():
+                    raise CircuitOpenError(f"{host} 已熔断，跳过请求: {url}")
+
+            error: Optional[Exception] = None
+            response = None
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            except Exception:
+                with self._lock:
+                    breaker.cancel_probe()
+                raise
+
+            retryable = error is not None or response.status_code in RETRY_STATUS_CODES
+            with self._lock:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+            if not retryable:
+                return response
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                response.close()
+            with self._lock:
+                self._retries[host] = self._retries.get(host, 0) + 1
+            # 全抖动指数退避，避免多个请求同时重试
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+            logger.warning(f"请求失败 ({error or response.status_code})，{delay:.1f}秒后第 {attempt + 1} 次重试: {url}")
+            time.sleep(delay)
+
+    def get_body(self, url: str, max_bytes: Optional[int] = None, **kwargs) -> Tuple[requests.Response, bytes]:
+        """流式读取响应体，超过max_bytes（解压后）时中止并抛出 ResponseTooLargeError
+
+        返回的响应对象已关闭，正文只以返回的bytes保存一份。
+        """
+        response = self.get(url, stream=True, **kwargs)
+        try:
+            declared = response.headers.get('Content-Length')
+            if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ResponseTooLargeError(f"响应声明大小 {int(declared)} 字节超过上限 {max_bytes}: {url}")
+
+            body = bytearray()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                body.extend(chunk)
+                if max_bytes and len(body) > max_bytes:
+                    raise ResponseTooLargeError(f"响应超过上限 {max_bytes} 字节，已中止读取: {url}")
+            return response, bytes(body)
+        finally:
+            response.close()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """各主机的熔断状态和重试次数"""
+        with self._lock:
+            return {
+                host: {
+                    'state': breaker.state,
+                    'consecutive_failures': breaker.failures,
+                    'trips': breaker.trips,
+                    'retries': self._retries.get(host, 0)
+                }
+                for host, breaker in self._breakers.items()
+            }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取结果追加写入
+每抓取一项立即写入结果文件，按批次fsync，进程崩溃时最多丢失当前批次；
+支持 JSONL、zstd压缩的JSONL（需要zstandard）和 Parquet（需要pyarrow）
+"""
+
+import io
+import os
+import json
+import logging
+from typing import Dict, Iterator, List
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow为可选依赖
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+
+def _results_format(path: str) -> str:
+    if path.endswith('.parquet'):
+        return 'parquet'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return 'jsonl'
+
+
+def _parquet_type(values: List):
+    """由第一批的取值确定列类型：布尔、整数、浮点数，其余（包括全为None的列）按字符串保存"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return pa.bool_()
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return pa.int64()
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return pa.float64()
+    return pa.string()
+
+
+def _parquet_value(value, column_type):
+    """把值转换为列类型，无法转换时返回None"""
+    if value is None:
+        return None
+    if pa.types.is_string(column_type):
+        if isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool) != pa.types.is_boolean(column_type):
+        return None
+    if pa.types.is_boolean(column_type):
+        return value
+    if not isinstance(value, (int, float)):
+        return None
+    if pa.types.is_integer(column_type):
+        return int(value) if float(value).is_integer() else None
+    return float(value)
+
+
+class ResultsWriter:
+    """抓取结果追加写入器
+
+    格式由文件扩展名决定：.jsonl、.jsonl.zst、.parquet。缺少对应的可选依赖时
+    退回普通JSONL（文件名改为 .jsonl）。zstd格式每批写入一个独立的压缩帧，
+    已写入的帧在崩溃后仍可读取；Parquet的文件尾在关闭时才写入，崩溃后需要重新抓取。
+    Parquet的列和类型由第一批确定，之后每批都转换为该类型（第一批全为None的列按字符串保存），
+    无法转换的值和新出现的字段写为空并记录警告。
+    """
+
+    def __init__(self, path: str, batch_size: int = 20, append: bool = True):
+        self.format = _results_format(path)
+        if self.format == 'zstd' and zstandard is None:
+            logger.warning("未安装zstandard，结果改为普通JSONL格式")
+            self.format = 'jsonl'
+        elif self.format == 'parquet' and pa is None:
+            logger.warning("未安装pyarrow，结果改为普通JSONL格式")
+            self.format = 'jsonl'
+        if self.format == 'jsonl' and not path.endswith('.jsonl'):
+            path = os.path.splitext(path.replace('.jsonl.zst', '.jsonl'))[0] + '.jsonl'
+
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: List[Dict] = []
+        self._schema = None
+        self._parquet_writer = None
+        self._compressor = zstandard.ZstdCompressor() if self.format == 'zstd' else None
+        # Parquet文件无法追加，总是重新写入
+        self._file = open(path, 'ab' if append and self.format != 'parquet' else 'wb')
+
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, item: Dict):
+        self._buffer.append(item)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """写出当前批次并同步到磁盘"""
+        if not self._buffer:
+            return
+
+        if self.format == 'parquet':
+            self._write_parquet_batch()
+        else:
+            data = ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in self._buffer).encode('utf-8')
+            if self._compressor:
+                data = self._compressor.compress(data)
+            self._file.write(data)
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer = []
+
+    def _write_parquet_batch(self):
+        if self._schema is None:
+            keys = list(dict.fromkeys(key for item in self._buffer for key in item))
+            self._schema = pa.schema([
+                (key, _parquet_type([item.get(key) for item in self._buffer])) for key in keys
+            ])
+            self._parquet_writer = pq.ParquetWriter(self._file, self._schema)
+
+        columns = {}
+        for field in self._schema:
+            values = []
+            for item in self._buffer:
+                value = _parquet_value(item.get(field.name), field.type)
+                if value is None and item.get(field.name) is not None:
+                    logger.warning(f"字段 {field.name} 的值与列类型 {field.type} 不符，写为空: {item.get(field.name)!r}")
+                values.append(value)
+            columns[field.name] = values
+
+        extra = {key for item in self._buffer for key in item} - set(self._schema.names)
+        if extra:
+            logger.warning(f"Parquet结果的列已在第一批确定，忽略新字段: {', '.join(sorted(extra))}")
+        self._parquet_writer.write_table(pa.table(columns, schema=self._schema))
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        if self._parquet_writer:
+            self._parquet_writer.close()
+        self._file.close()
+        self._file = None
+
+
+def iter_results(path: str, batch_size: int = 100) -> Iterator[Dict]:
+    """逐项读取结果文件，不把整个文件载入内存"""
+    results_format = _results_format(path)
+
+    if results_format == 'parquet':
+        if pq is None:
+            raise ImportError("读取Parquet结果需要安装pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+
+    with open(path, 'rb') as raw:
+        if results_format == 'zstd':
+            if zstandard is None:
+                raise ImportError("读取zstd结果需要安装zstandard")
+            raw = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        for line in io.TextIOWrapper(raw, encoding='utf-8'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # 写入中断导致的残缺行
+                logger.warning(f"跳过无法解析的结果行: {e}")
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取任务分片
+发现阶段得到全部文章URL后按 shard_size 切成分片，分片租给多个工作进程（可以在不同机器上）处理，
+各分片的进度汇总到同一个父任务。分片队列有两种：
+  tasks       每个分片是 import_tasks 中的一个子任务（parent_id 指向父任务），多台机器共享
+  *.sqlite    本地SQLite队列，同一台机器上的多个进程共享
+工作进程在租约期（shard_lease_seconds）内没有心跳的分片会被其他进程重新领取；
+run 在每轮工作进程退出后放回它们仍持有的分片，还有其他进程持有的分片时等到完成或租约过期再结束。
+超出内存预算时工作进程把分片放回队列并以退出码 75 结束，由调用方启动替代的工作进程；
+同一分片放回 MAX_SHARD_RELEASES 次后按已处理的数量标记为失败，不再放回。
+每个工作进程各自按主机限速，N个工作进程对同一站点的请求速率约为单进程的N倍。
+
+用法:
+    python scrape_shards.py plan <config_file>              # 发现文章并创建分片
+    python scrape_shards.py work <config_file>              # 领取并处理分片，直到没有剩余分片
+    python scrape_shards.py run <config_file> --workers 4   # 本地：plan + 启动4个工作进程
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import multiprocessing
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from db_sink import create_pool
+from job_profiler import run_profiled
+from site_adapters import NHK_EASY, registry
+from web_scraper import JapaneseWebScraper
+
+logger = logging.getLogger(__name__)
+
+SHARD_TASK_TYPE = 'web-scraping-shard'
+DEFAULT_SHARD_SIZE = 20
+DEFAULT_LEASE_SECONDS = 300
+# 分片心跳和父任务进度的最短更新间隔（秒）
+HEARTBEAT_INTERVAL = 5.0
+# 分片因内存不足被放回队列的最多次数，再次不足时标记为失败
+MAX_SHARD_RELEASES = 3
+# 工作进程因内存不足结束、仍有待处理分片时的退出码（EX_TEMPFAIL）
+EXIT_SHARDS_REMAINING = 75
+ABANDONED_SHARD_ERROR = f"工作进程异常退出或租约过期，分片已放回 {MAX_SHARD_RELEASES} 次，停止重试"
+
+
+@dataclass
+class Shard:
+    """领取到的分片"""
+    shard_id: int
+    index: int
+    urls: List[str]
+    owner: str
+    published: Dict[str, str] = field(default_factory=dict)
+    # 文章URL -> 所属的RSS地址
+    feeds: Dict[str, str] = field(default_factory=dict)
+    # 此前因内存不足被放回队列的次数
+    releases: int = 0
+
+
+def split_shards(urls: List[str], shard_size: int) -> List[List[str]]:
+    shard_size = max(1, shard_size)
+    return [urls[i:i + shard_size] for i in range(0, len(urls), shard_size)]
+
+
+def progress_line(summary: Dict) -> str:
+    return (f"共 {summary['total_items']} 篇文章，{summary['shards']} 个分片: "
+            f"完成 {summary['completed']}，处理中 {summary['running']}，"
+            f"待处理 {summary['pending']}，失败 {summary['failed']}")
+
+
+def _empty_summary() -> Dict:
+    return {'shards': 0, 'pending': 0, 'running': 0, 'completed': 0, 'failed': 0,
+            'items_processed': 0, 'total_items': 0}
+
+
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    shard_index INTEGER NOT NULL,
+    urls TEXT NOT NULL,
+    published TEXT NOT NULL,
+    feeds TEXT NOT NULL DEFAULT '{}',
+    handled TEXT,
+    releases INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    leased_by TEXT,
+    items_processed INTEGER NOT NULL DEFAULT 0,
+    total_items INTEGER NOT NULL,
+    logs TEXT,
+    error_message TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shards_job ON shards (job_id, status);
+CREATE TABLE IF NOT EXISTS finished_jobs (
+    job_id INTEGER PRIMARY KEY,
+    finished_by TEXT
+);
+"""
+
+
+class LocalShardQueue:
+    """本地SQLite分片队列，领取分片时用 BEGIN IMMEDIATE 加写锁，多个进程不会领到同一个分片"""
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(LOCAL_SCHEMA)
+        # 旧版本创建的队列文件补上新增的列
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(shards)")}
+        for column, definition in (('feeds', "TEXT NOT NULL DEFAULT '{}'"), ('handled', 'TEXT'),
+                                   ('releases', 'INTEGER NOT NULL DEFAULT 0')):
+            if column not in columns:
+                self.connection.execute(f"ALTER TABLE shards ADD COLUMN {column} {definition}")
+
+    def create(self, job_id: int, shards: List[Dict]):
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.executemany(
+            "INSERT INTO shards (job_id, shard_index, urls, published, feeds, total_items, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(job_id, index, json.dumps(shard['urls']), json.dumps(shard['published'], ensure_ascii=False),
+              json.dumps(shard.get('feeds', {})), len(shard['urls']), now)
+             for index, shard in enumerate(shards)]
+        )
+        self.connection.execute("COMMIT")
+
+    def lease(self, job_id: int, owner: str) -> Optional[Shard]:
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.connection.execute(
+                "SELECT id, shard_index, urls, published, feeds, releases FROM shards WHERE job_id = ? "
+                "AND (status = 'pending' OR (status = 'running' AND updated_at < ?)) ORDER BY id LIMIT 1",
+                (job_id, now - self.lease_seconds)
+            ).fetchone()
+            if row:
+                self.connection.execute(
+                    "UPDATE shards SET status = 'running', leased_by = ?, updated_at = ? WHERE id = ?",
+                    (owner, now, row[0])
+                )
+        finally:
+            self.connection.execute("COMMIT")
+        if not row:
+            return None
+        return Shard(row[0], row[1], json.loads(row[2]), owner, json.loads(row[3]), json.loads(row[4]), row[5])
+
+    def heartbeat(self, shard: Shard, items_processed: int):
+        self.connection.execute(
+            "UPDATE shards SET items_processed = ?, updated_at = ? WHERE id = ? AND leased_by = ?",
+            (items_processed, time.time(), shard.shard_id, shard.owner)
+        )
+
+    def complete(self, shard: Shard, items_processed: int, logs: List[str], error: Optional[str] = None,
+                 handled: Optional[List[str]] = None):
+        self.connection.execute(
+            "UPDATE shards SET status = ?, items_processed = ?, logs = ?, error_message = ?, handled = ?, "
+            "updated_at = ? WHERE id = ? AND leased_by = ?",
+            ('failed' if error else 'completed', items_processed, json.dumps(logs, ensure_ascii=False),
+             error, json.dumps(handled or []), time.time(), shard.shard_id, shard.owner)
+        )
+
+    def release(self, shard: Shard):
+        """把未处理完的分片放回队列，并记录放回次数"""
+        self.connection.execute(
+            "UPDATE shards SET status = 'pending', leased_by = NULL, releases = releases + 1, updated_at = ? "
+            "WHERE id = ? AND leased_by = ?",
+            (time.time(), shard.shard_id, shard.owner)
+        )
+
+    def requeue_expired(self, job_id: int, owners: Iterable[str] = ()) -> int:
+        """把租约过期或由owners（已退出的工作进程）持有的running分片放回队列，返回放回的分片数
+
+        异常退出也计入放回次数，达到 MAX_SHARD_RELEASES 次的分片标记为失败，避免反复导致进程崩溃。
+        """
+        owners = list(owners)
+        condition = "updated_at < ?"
+        if owners:
+            condition += f" OR leased_by IN ({', '.join(['?'] * len(owners))})"
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.connection.execute(
+                "UPDATE shards SET status = CASE WHEN releases + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                "error_message = CASE WHEN releases + 1 >= ? THEN ? ELSE error_message END, "
+                "leased_by = NULL, releases = releases + 1, updated_at = ? "
+                f"WHERE job_id = ? AND status = 'running' AND ({condition})",
+                [MAX_SHARD_RELEASES, MAX_SHARD_RELEASES, ABANDONED_SHARD_ERROR, time.time(), job_id,
+                 time.time() - self.lease_seconds, *owners]
+            )
+        finally:
+            self.connection.execute("COMMIT")
+        return cursor.rowcount
+
+    def progress(self, job_id: int) -> Dict:
+        summary = _empty_summary()
+        for status, count, items, total in self.connection.execute(
+            "SELECT status, COUNT(*), SUM(items_processed), SUM(total_items) FROM shards "
+            "WHERE job_id = ? GROUP BY status", (job_id,)
+        ):
+            summary[status] = count
+            summary['shards'] += count
+            summary['items_processed'] += items or 0
+            summary['total_items'] += total or 0
+        return summary
+
+    def shard_logs(self, job_id: int) -> List[str]:
+        lines = []
+        for index, logs, error in self.connection.execute(
+            "SELECT shard_index, logs, error_message FROM shards WHERE job_id = ? ORDER BY shard_index", (job_id,)
+        ):
+            lines.extend(f"[分片 {index + 1}] {line}" for line in json.loads(logs or '[]'))
+            if error:
+                lines.append(f"[分片 {index + 1}] 失败: {error}")
+        return lines
+
+    def feed_progress(self, job_id: int) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+        """汇总所有分片的 (发布时间, 所属RSS, 已处理的URL)"""
+        published, feeds, handled = {}, {}, []
+        for shard_published, shard_feeds, shard_handled in self.connection.execute(
+            "SELECT published, feeds, handled FROM shards WHERE job_id = ?", (job_id,)
+        ):
+            published.update(json.loads(shard_published))
+            feeds.update(json.loads(shard_feeds or '{}'))
+            handled.extend(json.loads(shard_handled or '[]'))
+        return published, feeds, handled
+
+    def claim_finish(self, job_id: int, owner: str) -> bool:
+        """所有分片都已结束时，只有第一个调用的进程返回True，由它完成父任务"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            unfinished = self.connection.execute(
+                "SELECT COUNT(*) FROM shards WHERE job_id = ? AND status IN ('pending', 'running')", (job_id,)
+            ).fetchone()[0]
+            if unfinished:
+                return False
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO finished_jobs (job_id, finished_by) VALUES (?, ?)", (job_id, owner)
+            )
+            return cursor.rowcount == 1
+        finally:
+            self.connection.execute("COMMIT")
+
+    def close(self):
+        self.connection.close()
+
+
+class TaskTableShardQueue:
+    """import_tasks 中的子任务作为分片，领取时用 SELECT ... FOR UPDATE SKIP LOCKED 避免争抢（需要MySQL 8）"""
+
+    def __init__(self, pool, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.pool = pool
+        self.lease_seconds = lease_seconds
+
+    def _run(self, func):
+        """在一个池连接上执行func(connection, cursor)并提交，出错时回滚"""
+        connection = self.pool.get_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                result = func(connection, cursor)
+                connection.commit()
+                return result
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def create(self, job_id: int, shards: List[Dict]):
+        rows = [(
+            job_id, SHARD_TASK_TYPE, f"分片 {index + 1}/{len(shards)}", len(shard['urls']),
+            json.dumps({'shard_index': index, 'urls': shard['urls'], 'published': shard['published'],
+                        'feeds': shard.get('feeds', {})}, ensure_ascii=False)
+        ) for index, shard in enumerate(shards)]
+        total = sum(len(shard['urls']) for shard in shards)
+
+        def create_rows(connection, cursor):
+            cursor.executemany("""
+                INSERT INTO import_tasks (parent_id, type, name, status, total_items, config, created_at, updated_at)
+                VALUES (%s, %s, %s, 'pending', %s, %s, NOW(), NOW())
+            """, rows)
+            cursor.execute("UPDATE import_tasks SET total_items = %s, updated_at = NOW() WHERE id = %s",
+                           (total, job_id))
+        self._run(create_rows)
+
+    def lease(self, job_id: int, owner: str) -> Optional[Shard]:
+        def lease_row(connection, cursor):
+            cursor.execute("""
+                SELECT id, config FROM import_tasks
+                WHERE parent_id = %s AND type = %s
+                  AND (status = 'pending' OR (status = 'running' AND updated_at < NOW() - INTERVAL %s SECOND))
+                ORDER BY id LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, (job_id, SHARD_TASK_TYPE, int(self.lease_seconds)))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("""
+                    UPDATE import_tasks
+                    SET status = 'running', leased_by = %s, started_at = COALESCE(started_at, NOW()), updated_at = NOW()
+                    WHERE id = %s
+                """, (owner, row[0]))
+            return row
+
+        row = self._run(lease_row)
+        if not row:
+            return None
+        config = json.loads(row[1])
+        return Shard(row[0], config['shard_index'], config['urls'], owner, config.get('published', {}),
+                     config.get('feeds', {}), config.get('releases', 0))
+
+    def heartbeat(self, shard: Shard, items_processed: int):
+        progress = items_processed / len(shard.urls) * 100 if shard.urls else 0
+        self._run(lambda connection, cursor: cursor.execute("""
+            UPDATE import_tasks SET items_processed = %s, progress = %s, updated_at = NOW()
+            WHERE id = %s AND leased_by = %s
+        """, (items_processed, progress, shard.shard_id, shard.owner)))
+
+    def complete(self, shard: Shard, items_processed: int, logs: List[str], error: Optional[str] = None,
+                 handled: Optional[List[str]] = None):
+        # 已处理的URL记在子任务config中，完成父任务时汇总
+        self._run(lambda connection, cursor: cursor.execute("""
+            UPDATE import_tasks
+            SET status = %s, progress = 100, items_processed = %s, logs = %s, error_message = %s,
+                config = JSON_SET(config, '$.handled', CAST(%s AS JSON)),
+                completed_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND leased_by = %s
+        """, ('failed' if error else 'completed', items_processed, json.dumps(logs, ensure_ascii=False),
+              error, json.dumps(handled or []), shard.shard_id, shard.owner)))
+
+    def release(self, shard: Shard):
+        """把未处理完的分片放回队列，放回次数记在子任务config中"""
+        self._run(lambda connection, cursor: cursor.execute("""
+            UPDATE import_tasks
+            SET status = 'pending', leased_by = NULL, config = JSON_SET(config, '$.releases', %s), updated_at = NOW()
+            WHERE id = %s AND leased_by = %s
+        """, (shard.releases + 1, shard.shard_id, shard.owner)))
+
+    def requeue_expired(self, job_id: int, owners: Iterable[str] = ()) -> int:
+        """把租约过期或由owners（已退出的工作进程）持有的running分片放回队列，返回放回的分片数"""
+        owners = list(owners)
+        condition = "updated_at < NOW() - INTERVAL %s SECOND"
+        if owners:
+            condition += f" OR leased_by IN ({', '.join(['%s'] * len(owners))})"
+        releases = "COALESCE(JSON_EXTRACT(config, '$.releases'), 0) + 1"
+
+        def requeue(connection, cursor):
+            # MySQL按顺序赋值，config放在最后，前面的条件读到的是原来的放回次数
+            cursor.execute(f"""
+                UPDATE import_tasks
+                SET status = IF({releases} >= %s, 'failed', 'pending'),
+                    error_message = IF({releases} >= %s, %s, error_message),
+                    leased_by = NULL, config = JSON_SET(config, '$.releases', {releases}), updated_at = NOW()
+                WHERE parent_id = %s AND type = %s AND status = 'running' AND ({condition})
+            """, (MAX_SHARD_RELEASES, MAX_SHARD_RELEASES, ABANDONED_SHARD_ERROR, job_id, SHARD_TASK_TYPE,
+                  int(self.lease_seconds), *owners))
+            return cursor.rowcount
+        return self._run(requeue)
+
+    def progress(self, job_id: int) -> Dict:
+        def fetch(connection, cursor):
+            cursor.execute("""
+                SELECT status, COUNT(*), SUM(items_processed), SUM(total_items) FROM import_tasks
+                WHERE parent_id = %s AND type = %s GROUP BY status
+            """, (job_id, SHARD_TASK_TYPE))
+            return cursor.fetchall()
+
+        summary = _empty_summary()
+        for status, count, items, total in self._run(fetch):
+            summary[status] = count
+            summary['shards'] += count
+            summary['items_processed'] += int(items or 0)
+            summary['total_items'] += int(total or 0)
+        return summary
+
+    def shard_logs(self, job_id: int) -> List[str]:
+        def fetch(connection, cursor):
+            cursor.execute("""
+                SELECT config, logs, error_message FROM import_tasks
+                WHERE parent_id = %s AND type = %s ORDER BY id
+            """, (job_id, SHARD_TASK_TYPE))
+            return cursor.fetchall()
+
+        lines = []
+        for config, logs, error in self._run(fetch):
+            index = json.loads(config)['shard_index']
+            lines.extend(f"[分片 {index + 1}] {line}" for line in json.loads(logs or '[]'))
+            if error:
+                lines.append(f"[分片 {index + 1}] 失败: {error}")
+        return lines
+
+    def feed_progress(self, job_id: int) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+        """汇总所有分片的 (发布时间, 所属RSS, 已处理的URL)"""
+        def fetch(connection, cursor):
+            cursor.execute("SELECT config FROM import_tasks WHERE parent_id = %s AND type = %s",
+                           (job_id, SHARD_TASK_TYPE))
+            return cursor.fetchall()
+
+        published, feeds, handled = {}, {}, []
+        for (config,) in self._run(fetch):
+            config = json.loads(config)
+            published.update(config.get('published', {}))
+            feeds.update(config.get('feeds', {}))
+            handled.extend(config.get('handled', []))
+        return published, feeds, handled
+
+    def claim_finish(self, job_id: int, owner: str) -> bool:
+        """所有分片都已结束时，只有第一个调用的进程返回True（父任务的leased_by记录完成汇总的进程）"""
+        def claim(connection, cursor):
+            cursor.execute("SELECT leased_by FROM import_tasks WHERE id = %s FOR UPDATE", (job_id,))
+            parent = cursor.fetchone()
+            cursor.execute("""
+                SELECT COUNT(*) FROM import_tasks
+                WHERE parent_id = %s AND type = %s AND status IN ('pending', 'running')
+            """, (job_id, SHARD_TASK_TYPE))
+            if not parent or parent[0] or cursor.fetchone()[0]:
+                return False
+            cursor.execute("UPDATE import_tasks SET leased_by = %s WHERE id = %s", (owner, job_id))
+            return True
+        return self._run(claim)
+
+    def close(self):
+        pass
+
+
+def open_queue(config: Dict):
+    """按 shard_queue 配置打开分片队列：tasks 为任务表，否则为本地SQLite文件"""
+    target = config.get('shard_queue') or ('tasks' if config.get('task_id') else 'scrape_shards.sqlite')
+    lease_seconds = config.get('shard_lease_seconds', DEFAULT_LEASE_SECONDS)
+    if target == 'tasks':
+        return TaskTableShardQueue(create_pool(f"shards_{os.getpid()}", 1), lease_seconds)
+    return LocalShardQueue(target, lease_seconds)
+
+
+def job_id(config: Dict) -> int:
+    return config.get('task_id') or 0
+
+
+class ShardScraper(JapaneseWebScraper):
+    """处理分片的抓取器：进度作为心跳写入当前分片，父任务显示所有分片的汇总进度"""
+
+    def __init__(self, config: Dict, queue):
+        # 分片中已经是具体的文章URL，不再沿链接爬取
+        super().__init__(dict(config, crawl_depth=0))
+        self.queue = queue
+        self.job_id = job_id(config)
+        self.shard: Optional[Shard] = None
+        self._last_heartbeat = 0.0
+
+    def update_task_progress(self, items_processed: int, total_items: int, logs: List[str]):
+        now = time.monotonic()
+        if now - self._last_heartbeat < HEARTBEAT_INTERVAL:
+            return
+        self._last_heartbeat = now
+        self.queue.heartbeat(self.shard, items_processed)
+        self.report_progress()
+
+    def save_feed_progress(self):
+        """每个工作进程只处理部分文章，RSS增量位置由完成父任务的进程在finish_job中统一推进"""
+
+    def finish_job(self):
+        """汇总各分片已处理的文章后推进RSS增量位置"""
+        published, feeds, handled = self.queue.feed_progress(self.job_id)
+        self.article_published.update(published)
+        self.article_feed = feeds
+        self.handled_urls = set(handled)
+        super().save_feed_progress()
+
+    def report_progress(self) -> Dict:
+        summary = self.queue.progress(self.job_id)
+        super().update_task_progress(summary['items_processed'], summary['total_items'], [progress_line(summary)])
+        return summary
+
+    def saved_urls(self, urls: List[str]) -> Set[str]:
+        """已经保存到数据库的文章URL（分片此前被其他机器上的进程部分处理过）"""
+        if not self.db_sink:
+            return set()
+        try:
+            return self.db_sink.existing_urls(urls)
+        except Exception as e:
+            logger.warning(f"查询已保存的文章失败，分片中的文章全部重新抓取: {e}")
+            return set()
+
+    def process(self, shard: Shard) -> bool:
+        """
+        抓取一个分片，等写入队列清空后再把分片标记为完成
+        超出内存预算时把分片放回队列并返回False；放回次数达到上限时按已处理的数量标记为失败
+        """
+        self.shard = shard
+        self.article_published.update(shard.published)
+        self.article_feed.update(shard.feeds)
+        self._last_heartbeat = 0.0
+        all_content = []
+        logs = [f"由 {shard.owner} 处理，共 {len(shard.urls)} 篇"]
+        # 按resource_items.url跳过已保存的文章，分片在哪台机器上重新处理都一样
+        saved = self.saved_urls(shard.urls)
+        if saved:
+            self.handled_urls.update(saved)
+            logs.append(f"跳过已保存的文章 {len(saved)} 篇")
+        error = None
+        try:
+            self.scrape_articles([url for url in shard.urls if url not in saved], all_content, logs)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"处理分片 {shard.index + 1} 失败: {e}")
+        if self.db_sink:
+            self.db_sink.flush()
+        released = False
+        if self.memory_budget.exhausted and error is None:
+            if shard.releases + 1 >= MAX_SHARD_RELEASES:
+                error = f"内存不足，分片已放回 {shard.releases + 1} 次，停止重试"
+                logger.error(f"分片 {shard.index + 1} {error}")
+            else:
+                self.queue.release(shard)
+                released = True
+        if not released:
+            self.queue.complete(shard, len(saved) + len(all_content), logs, error,
+                                handled=[url for url in shard.urls if url in self.handled_urls])
+        self.report_progress()
+        return not released
+
+
+def plan(config: Dict) -> Dict:
+    """发现文章并创建分片；任务已经分过片时直接返回现有分片的进度（中断后重新运行）"""
+    if config.get('crawl_depth', 0) > 0:
+        raise ValueError("爬取模式（crawl_depth > 0）的待抓取队列在运行中增长，不能预先分片")
+
+    queue = open_queue(config)
+    try:
+        summary = queue.progress(job_id(config))
+        if summary['shards']:
+            logger.info(f"任务已有分片，继续处理: {progress_line(summary)}")
+            return summary
+
+        scraper = JapaneseWebScraper(dict(config, task_id=None))
+        urls = []
+        for url in scraper.urls:
+            adapter = registry.resolve(url)
+            if adapter is NHK_EASY and '/article/' not in url:
+                urls.extend(scraper.discover_nhk_articles(url, scraper.max_pages))
+            else:
+                urls.append(url)
+        if scraper.db_sink:
+            scraper.db_sink.close()
+        urls = list(dict.fromkeys(urls))
+
+        shards = [
+            {'urls': group,
+             'published': {url: scraper.article_published[url] for url in group if url in scraper.article_published},
+             'feeds': {url: scraper.article_feed[url] for url in group if url in scraper.article_feed}}
+            for group in split_shards(urls, config.get('shard_size', DEFAULT_SHARD_SIZE))
+        ]
+        if shards:
+            queue.create(job_id(config), shards)
+        summary = queue.progress(job_id(config))
+        logger.info(f"创建分片: {progress_line(summary)}")
+        return summary
+    finally:
+        queue.close()
+
+
+def work(config: Dict) -> Dict:
+    """
+    领取并处理分片直到没有剩余分片，最后结束的进程完成父任务
+    返回 {'processed': 处理完的分片数, 'remaining': 因内存不足停止时仍待处理的分片数}
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    queue = open_queue(config)
+    scraper = ShardScraper(config, queue)
+    processed = 0
+    remaining = 0
+    logs = []
+    try:
+        while not scraper.memory_exhausted(logs, 0):
+            shard = queue.lease(scraper.job_id, owner)
+            if not shard:
+                break
+            logger.info(f"领取分片 {shard.index + 1}（{len(shard.urls)} 篇）")
+            if scraper.process(shard):
+                processed += 1
+
+        if scraper.memory_budget.exhausted:
+            # 其他工作进程可能已经退出，由调用方为剩余的分片启动替代进程
+            remaining = queue.progress(scraper.job_id)['pending']
+        scraper.finish_run(logs)
+        if queue.claim_finish(scraper.job_id, owner):
+            scraper.finish_job()
+            summary = queue.progress(scraper.job_id)
+            final_logs = [progress_line(summary)] + queue.shard_logs(scraper.job_id)
+            if scraper.db_sink:
+                scraper.db_sink.complete_task(summary['items_processed'], final_logs)
+            logger.info(f"所有分片已完成: {progress_line(summary)}")
+    finally:
+        queue.close()
+    return {'processed': processed, 'remaining': remaining}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='抓取任务分片')
+    parser.add_argument('command', choices=['plan', 'work', 'run'])
+    parser.add_argument('config_file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='run 启动的本地工作进程数')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        if args.command in ('plan', 'run'):
+            summary = plan(config)
+            print(progress_line(summary))
+
+        if args.command == 'work':
+            result = work(config)
+            print(f"处理了 {result['processed']} 个分片")
+            if result['remaining']:
+                print(f"内存不足，还有 {result['remaining']} 个分片待处理")
+                sys.exit(EXIT_SHARDS_REMAINING)
+        elif args.command == 'run':
+            context = multiprocessing.get_context('spawn')
+            queue = open_queue(config)
+            try:
+                # 工作进程因内存不足或异常退出后，为放回队列的分片启动新一轮进程；一轮的进程全部出错时停止
+                while True:
+                    processes = [context.Process(target=work, args=(config,)) for _ in range(args.workers)]
+                    for process in processes:
+                        process.start()
+                    for process in processes:
+                        process.join()
+                    # 本轮进程都已退出，它们仍持有的分片直接放回队列
+                    requeued = queue.requeue_expired(
+                        job_id(config), [f"{socket.gethostname()}:{process.pid}" for process in processes])
+                    summary = queue.progress(job_id(config))
+                    if all(process.exitcode for process in processes):
+                        break
+                    if not requeued and not summary['pending'] and summary['running']:
+                        # 其他机器或之前崩溃的进程持有的分片：等它完成或租约过期后放回队列
+                        logger.info(f"等待其他进程持有的分片: {progress_line(summary)}")
+                    while not requeued and not summary['pending'] and summary['running']:
+                        time.sleep(HEARTBEAT_INTERVAL)
+                        requeued = queue.requeue_expired(job_id(config))
+                        summary = queue.progress(job_id(config))
+                    # 放回的分片即使都已标记为失败，也再启动一轮，由工作进程完成父任务
+                    if not requeued and not summary['pending']:
+                        break
+                    logger.info(f"仍有待处理的分片，启动新的工作进程: {progress_line(summary)}")
+                print(progress_line(summary))
+            finally:
+                queue.close()
+
+    except Exception as e:
+        logger.error(f"分片任务出错: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_profiled('scrape_shards', main)
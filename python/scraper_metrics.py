@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取流程分阶段计时
+各阶段（发现文章、请求、解析、提取、写库等）的耗时汇总为直方图，计数器记录页面数、字节数等；
+结果写入任务日志，可选导出为Prometheus文本格式文件或实时发送到StatsD
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上限（毫秒）
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """固定桶直方图，内存占用与观测次数无关"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        index = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, pct: float) -> float:
+        """按桶估算分位数（返回所在桶的上限，不超过观测到的最大值）"""
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(float(BUCKETS_MS[i]), self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 1),
+            'avg_ms': round(self.total / self.count, 1) if self.count else 0.0,
+            'min_ms': round(self.min or 0.0, 1),
+            'max_ms': round(self.max, 1),
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99)
+        }
+
+
+class StatsdClient:
+    """最简StatsD客户端（UDP，发送失败时静默忽略）"""
+
+    def __init__(self, host: str, port: int = 8125, prefix: str = 'scraper'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, name: str, value: float, metric_type: str):
+        try:
+            self.socket.sendto(f"{self.prefix}.{name}:{value:g}|{metric_type}".encode('ascii'), self.address)
+        except OSError:
+            pass
+
+
+class StageMetrics:
+    """分阶段计时和计数"""
+
+    def __init__(self, statsd: Optional[StatsdClient] = None):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.statsd = statsd
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'StageMetrics':
+        """配置了statsd_host时同时发送到StatsD"""
+        statsd = None
+        if config.get('statsd_host'):
+            statsd = StatsdClient(config['statsd_host'], config.get('statsd_port', 8125),
+                                  config.get('statsd_prefix', 'scraper'))
+        return cls(statsd)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def observe(self, stage: str, value_ms: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(value_ms)
+        if self.statsd:
+            self.statsd.send(stage, value_ms, 'ms')
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.statsd:
+            self.statsd.send(name, value, 'c')
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'stages': {stage: h.to_dict() for stage, h in self.histograms.items()},
+                'counters': dict(self.counters)
+            }
+
+    def summary_lines(self) -> List[str]:
+        """便于写入任务日志的逐阶段摘要"""
+        lines = []
+        for stage, data in self.summary()['stages'].items():
+            lines.append(f"阶段 {stage}: {data['count']} 次, 合计 {data['total_ms']}ms, "
+                         f"平均 {data['avg_ms']}ms, p50 {data['p50_ms']}ms, p99 {data['p99_ms']}ms")
+        return lines
+
+    def to_prometheus(self, prefix: str = 'scraper') -> str:
+        """Prometheus文本格式（可配合node_exporter的textfile collector使用）"""
+        lines = [f"# TYPE {prefix}_stage_duration_ms histogram"]
+        with self._lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS_MS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{prefix}_stage_duration_ms_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_duration_ms_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_stage_duration_ms_sum{{stage="{stage}"}} {histogram.total:.3f}')
+                lines.append(f'{prefix}_stage_duration_ms_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_file, path)
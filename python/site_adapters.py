@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网站适配器注册表
+按主机名路由到声明式的站点适配器，每个适配器的CSS选择器在注册时预编译
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import soupsieve
+from bs4 import Comment, NavigableString, Tag
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav')
+
+
+def extract_ruby_text(element) -> Tuple[str, List[List[str]]]:
+    """一次遍历提取正文和 [表层, 读音] 词元
+
+    <ruby>的基础文字和<rt>读音成对输出，普通文本的读音为空字符串；
+    返回的正文不含<rt>/<rp>，与 get_text(strip=True) 的拼接方式一致。
+    """
+    tokens: List[List[str]] = []
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, Tag):
+                if child.name in ('rt', 'rp', 'script', 'style'):
+                    continue
+                if child.name == 'ruby':
+                    base = ''.join(
+                        part.get_text() if isinstance(part, Tag) else str(part)
+                        for part in child.children
+                        if not (isinstance(part, Tag) and part.name in ('rt', 'rp'))
+                    ).strip()
+                    reading = ''.join(rt.get_text() for rt in child.find_all('rt')).strip()
+                    if base:
+                        tokens.append([base, reading])
+                else:
+                    walk(child)
+            elif isinstance(child, NavigableString) and not isinstance(child, Comment):
+                text = child.strip()
+                if text:
+                    tokens.append([text, ''])
+
+    walk(element)
+    return ''.join(surface for surface, _ in tokens), tokens
+
+
+@dataclass
+class SiteAdapter:
+    """站点适配器：描述一个网站的提取方式"""
+    name: str
+    source: str                          # 写入metadata的来源名称，为空时使用域名
+    hosts: List[str] = field(default_factory=list)  # 精确主机名，或以 *. 开头的子域名通配
+    path_contains: Optional[str] = None  # URL路径必须包含的片段
+    title_selectors: List[str] = field(default_factory=lambda: ['title'])
+    default_title: str = ''              # 找不到标题时使用的文字
+    content_selectors: List[str] = field(default_factory=list)
+    join_matches: bool = False           # True: 合并选择器的所有匹配；False: 只取第一个匹配
+    min_content_length: int = 0          # 合并模式下达到该长度才停止尝试后续选择器
+    body_fallback_length: int = 0        # 内容短于该长度时改用body文本，0表示不回退
+    extract_audio: bool = True
+    audio_link_keywords: Tuple[str, ...] = ()  # 额外从<a href>中识别音频链接的关键字
+    max_images: int = 5
+    max_audio: int = 3
+    ruby_tokens: bool = False            # 按<ruby>标注提取正文和读音词元
+    metadata: Dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        # 预编译选择器，提取时不再重复解析
+        self.title_plan = [soupsieve.compile(s) for s in self.title_selectors]
+        self.content_plan = [soupsieve.compile(s) for s in self.content_selectors]
+
+    def matches_path(self, url: str) -> bool:
+        return not self.path_contains or self.path_contains in url
+
+    def extract(self, soup, url: str, include_images: bool = True,
+                include_audio: bool = True) -> Dict:
+        """按提取计划从解析后的页面中提取内容"""
+        title_text = self.default_title
+        for plan in self.title_plan:
+            element = plan.select_one(soup)
+            if element:
+                title_text = element.get_text(strip=True)
+                break
+
+        content = ''
+        tokens: List[List[str]] = []
+        for plan in self.content_plan:
+            if self.join_matches:
+                elements = plan.select(soup)
+                if elements:
+                    content, tokens = self._text(elements)
+                    if len(content) > self.min_content_length:
+                        break
+            else:
+                element = plan.select_one(soup)
+                if element:
+                    content, tokens = self._text([element])
+                    break
+
+        if self.body_fallback_length and len(content) < self.body_fallback_length:
+            body = soup.find('body')
+            if body:
+                content, tokens = self._text([body])
+
+        images = []
+        if include_images:
+            for img in soup.find_all('img'):
+                src = img.get('src')
+                if src and not src.startswith('data:'):
+                    images.append(urljoin(url, src))
+
+        audio_urls = []
+        if include_audio and self.extract_audio:
+            for audio in soup.find_all(['audio', 'source']):
+                src = audio.get('src')
+                if src and any(ext in src for ext in AUDIO_EXTENSIONS):
+                    audio_urls.append(urljoin(url, src))
+
+            if self.audio_link_keywords:
+                for link in soup.find_all('a', href=True):
+                    href = link.get('href')
+                    if href and any(keyword in href for keyword in self.audio_link_keywords):
+                        audio_urls.append(urljoin(url, href))
+
+        metadata = {'source': self.source or urlparse(url).netloc}
+        metadata.update(self.metadata)
+        if any(reading for _, reading in tokens):
+            metadata['ruby_tokens'] = tokens
+
+        return {
+            'url': url,
+            'title': title_text,
+            'content': content,
+            'images': images[:self.max_images],
+            'audio': audio_urls[:self.max_audio],
+            'metadata': metadata
+        }
+
+
+    def _text(self, elements) -> Tuple[str, List[List[str]]]:
+        """多个元素的正文以空格连接；启用ruby_tokens时同时返回读音词元"""
+        if not self.ruby_tokens:
+            return ' '.join(elem.get_text(strip=True) for elem in elements), []
+
+        texts = []
+        tokens: List[List[str]] = []
+        for elem in elements:
+            text, elem_tokens = extract_ruby_text(elem)
+            texts.append(text)
+            tokens.extend(elem_tokens)
+        return ' '.join(texts), tokens
+
+
+class SiteAdapterRegistry:
+    """站点适配器注册表
+
+    精确主机名和通配后缀都放在字典中，解析时按主机名逐级去掉子域名查找，
+    查找次数只与域名层级有关，与注册的站点数量无关。
+    """
+
+    def __init__(self, default: SiteAdapter):
+        self.default = default
+        self._exact: Dict[str, List[SiteAdapter]] = {}
+        self._suffix: Dict[str, List[SiteAdapter]] = {}
+
+    def register(self, adapter: SiteAdapter) -> SiteAdapter:
+        for host in adapter.hosts:
+            host = host.lower()
+            if host.startswith('*.'):
+                self._suffix.setdefault(host[2:], []).append(adapter)
+            else:
+                self._exact.setdefault(host, []).append(adapter)
+        return adapter
+
+    def resolve(self, url: str) -> SiteAdapter:
+        """返回处理该URL的适配器，没有匹配时返回通用适配器"""
+        host = (urlparse(url).hostname or '').lower()
+
+        for adapter in self._exact.get(host, []):
+            if adapter.matches_path(url):
+                return adapter
+
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            for adapter in self._suffix.get('.'.join(labels[i:]), []):
+                if adapter.matches_path(url):
+                    return adapter
+
+        return self.default
+
+
+NHK_EASY = SiteAdapter(
+    name='nhk_easy',
+    source='NHK Easy News',
+    hosts=['*.nhk.or.jp', 'nhk.or.jp'],
+    path_contains='news/easy',
+    default_title='未知标题',
+    content_selectors=[
+        'div[id*="article"]',
+        'div[class*="article"]',
+        'div[class*="content"]',
+        'main',
+        'article',
+        '.content'
+    ],
+    join_matches=True,
+    min_content_length=100,
+    body_fallback_length=100,
+    audio_link_keywords=('.mp3', '.wav', 'audio'),
+    ruby_tokens=True,
+    metadata={'difficulty': 'easy', 'language': 'japanese'}
+)
+
+MAINICHI = SiteAdapter(
+    name='mainichi',
+    source='Mainichi News',
+    hosts=['mainichi.jp', '*.mainichi.jp'],
+    title_selectors=['h1', 'title'],
+    content_selectors=['.article-body', '.news-body', '.main-text', 'article', '.content'],
+    extract_audio=False,
+    metadata={'language': 'japanese'}
+)
+
+ASAHI = SiteAdapter(
+    name='asahi',
+    source='Asahi News',
+    hosts=['asahi.com', '*.asahi.com'],
+    title_selectors=['h1', 'title'],
+    content_selectors=['.article-body', '.news-body', '.main-text', 'article', '.content'],
+    extract_audio=False,
+    metadata={'language': 'japanese'}
+)
+
+GENERAL = SiteAdapter(
+    name='general',
+    source='',
+    title_selectors=['h1', 'title'],
+    content_selectors=[
+        'article', '.content', '.main-content', '#content', '.post-content', '.entry-content', 'main'
+    ],
+    body_fallback_length=1,
+    metadata={'language': 'japanese'}
+)
+
+registry = SiteAdapterRegistry(default=GENERAL)
+for _adapter in (NHK_EASY, MAINICHI, ASAHI):
+    registry.register(_adapter)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步抓取器的会话生命周期（不访问网络）
+"""
+
+import asyncio
+
+from async_web_scraper import AsyncJapaneseWebScraper
+from resilient_fetch import ResilientFetcher
+
+
+def make_scraper(tmp_path) -> AsyncJapaneseWebScraper:
+    return AsyncJapaneseWebScraper({
+        'urls': [],
+        'dedup': False,
+        'boilerplate': False,
+        'connect_timeout': 3,
+        'read_timeout': 7,
+        'feed_cache_file': str(tmp_path / 'feed_cache.json'),
+    })
+
+
+def test_start_keeps_sync_fetcher_and_can_run_twice(tmp_path):
+    scraper = make_scraper(tmp_path)
+
+    async def run():
+        await scraper.start()
+        client = scraper.client
+        await scraper.start()
+        assert scraper.client is client
+        await scraper.close()
+        # 关闭后可以重新打开
+        await scraper.start()
+        await scraper.close()
+
+    asyncio.run(run())
+
+    assert isinstance(scraper.fetcher, ResilientFetcher)
+    assert scraper.timeout == (3, 7)
+
+
+def test_fetch_metrics_come_from_async_fetcher(tmp_path):
+    scraper = make_scraper(tmp_path)
+
+    async def run():
+        async with scraper:
+            scraper.async_fetcher._breaker('example.com')
+            return scraper.fetch_metrics()
+
+    assert 'example.com' in asyncio.run(run())
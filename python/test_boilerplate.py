@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试网页模板噪声去除
+"""
+
+from bs4 import BeautifulSoup
+
+from boilerplate import BoilerplateRemover
+
+ARTICLE = '今日は東京で大きな祭りがありました。たくさんの人が集まって、踊りや音楽を楽しみました。' * 2
+
+
+def page(body: str) -> BeautifulSoup:
+    return BeautifulSoup(f'<html><body>{body}</body></html>', 'html.parser')
+
+
+def test_form_wrapping_the_whole_page_is_kept():
+    soup = page(f'<form id="aspnetForm"><div class="article"><p>{ARTICLE}</p></div></form>')
+
+    BoilerplateRemover().strip(soup, 'https://example.com/a')
+
+    assert ARTICLE in soup.get_text()
+
+
+def test_search_form_is_removed():
+    soup = page(f'<form><input name="q"><button>検索する</button></form><p>{ARTICLE}</p>')
+
+    BoilerplateRemover().strip(soup, 'https://example.com/a')
+
+    assert soup.find('form') is None
+    assert ARTICLE in soup.get_text()
+
+
+def test_repeated_blocks_are_learned_as_template(tmp_path):
+    remover = BoilerplateRemover(str(tmp_path / 'templates.json'), learn_pages=3)
+    menu = '<div class="menu">ホーム ニュース 天気 スポーツ</div>'
+    for i in range(3):
+        remover.strip(page(f'{menu}<p>記事{i}の本文です。{ARTICLE}</p>'), f'https://example.com/{i}')
+
+    soup = page(f'{menu}<p>新しい記事の本文です。</p>')
+    removed = BoilerplateRemover(str(tmp_path / 'templates.json')).strip(soup, 'https://example.com/new')
+
+    assert removed == 1
+    assert 'ニュース' not in soup.get_text()
+    assert '新しい記事' in soup.get_text()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试内容指纹和近似重复检测（临时目录中的SQLite索引）
+"""
+
+import random
+
+import pytest
+
+import content_fingerprint
+from content_fingerprint import FingerprintIndex, MinHasher, normalize_text
+
+KANA = 'あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん'
+
+
+def article(seed: int, length: int = 600) -> str:
+    rng = random.Random(seed)
+    return ''.join(rng.choice(KANA) for _ in range(length))
+
+
+def jaccard(hasher: MinHasher, a: str, b: str) -> float:
+    x, y = set(hasher.shingles(normalize_text(a))), set(hasher.shingles(normalize_text(b)))
+    return len(x & y) / len(x | y)
+
+
+def test_normalize_ignores_whitespace_and_punctuation():
+    assert normalize_text('今日は、 晴れです。\n') == normalize_text('今日は晴れです')
+
+
+def test_pure_python_signature_matches_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    hasher = MinHasher(num_perm=32)
+    text = article(1)
+    vectorised = hasher.signature(text)
+
+    monkeypatch.setattr(content_fingerprint, 'np', None)
+
+    assert hasher.signature(text) == vectorised
+
+
+def test_signature_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=256)
+    base = article(2)
+    edited = base[:450] + article(3, 150)
+
+    signature_a, signature_b = hasher.signature(base), hasher.signature(edited)
+    estimate = sum(x == y for x, y in zip(signature_a, signature_b)) / len(signature_a)
+
+    # 256个排列的标准误差约为0.03
+    assert abs(estimate - jaccard(hasher, base, edited)) < 0.1
+
+
+def test_exact_copy_with_different_layout_is_duplicate(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite'))
+    text = article(4)
+    index.add('https://example.com/a', 'a', text)
+
+    assert index.find_duplicate(' '.join(text[i:i + 40] for i in range(0, len(text), 40))) == \
+        ('https://example.com/a', 1.0)
+    index.close()
+
+
+def test_near_duplicate_is_found_and_removed_document_is_not(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite'))
+    text = article(5)
+    doc_id = index.add('https://example.com/a', 'a', text)
+    # 改动末尾的几个字，Jaccard相似度仍在0.9以上
+    edited = text[:-10] + article(6, 10)
+
+    url, similarity = index.find_duplicate(edited)
+    assert url == 'https://example.com/a' and similarity >= 0.8
+
+    index.remove(doc_id)
+    assert index.find_duplicate(edited) is None
+    index.close()
+
+
+def test_false_positive_rate_for_unrelated_articles_is_low(tmp_path):
+    """不相关文章的相似度远低于阈值，LSH候选经过完整签名比较后不会误判"""
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite'))
+    for seed in range(200):
+        index.add(f'https://example.com/{seed}', str(seed), article(seed))
+
+    false_positives = sum(index.find_duplicate(article(seed)) is not None for seed in range(1000, 1200))
+
+    assert false_positives == 0
+    index.close()
+
+
+def test_lsh_recall_for_similar_articles(tmp_path):
+    """16段x8行时相似度0.9的文章被选为候选的概率约为1-(1-0.9^8)^16，接近1"""
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite'))
+    texts = [article(seed) for seed in range(50)]
+    for seed, text in enumerate(texts):
+        index.add(f'https://example.com/{seed}', str(seed), text)
+
+    found = sum(index.find_duplicate(text[:-12] + article(seed + 500, 12)) is not None
+                for seed, text in enumerate(texts))
+
+    assert found >= 48
+    index.close()
+
+
+def test_bands_must_divide_permutations(tmp_path):
+    with pytest.raises(ValueError):
+        FingerprintIndex(str(tmp_path / 'fingerprints.sqlite'), num_perm=100, bands=16)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓取队列：URL规范化、布隆过滤器、优先级、礼貌间隔和检查点
+"""
+
+import json
+
+from crawl_frontier import BloomFilter, CrawlFrontier, canonicalize_url
+
+
+def test_canonical_url_drops_default_port_fragment_and_tracking():
+    assert canonicalize_url('HTTPS://Example.com:443/a?b=2&utm_source=x&a=1#top') == \
+        'https://example.com/a?a=1&b=2'
+    assert canonicalize_url('http://example.com:8080') == 'http://example.com:8080/'
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    values = [f'https://example.com/{i}' for i in range(1000)]
+    for value in values:
+        bloom.add(value)
+
+    assert all(value in bloom for value in values)
+
+
+def test_bloom_false_positive_rate_stays_near_target_at_capacity():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f'https://example.com/seen/{i}')
+
+    false_positives = sum(f'https://example.com/new/{i}' in bloom for i in range(20000))
+
+    # 期望约200个（1%），留出统计波动
+    assert false_positives / 20000 < 0.02
+
+
+def test_bloom_filter_round_trips_through_dict():
+    bloom = BloomFilter(capacity=100)
+    bloom.add('https://example.com/a')
+
+    restored = BloomFilter.from_dict(bloom.to_dict())
+
+    assert 'https://example.com/a' in restored
+    assert restored.add('https://example.com/a')
+
+
+def test_frontier_orders_by_priority_and_skips_seen_and_deep_urls():
+    frontier = CrawlFrontier(max_pages=10, max_depth=1, politeness_delay=0)
+
+    assert frontier.add('https://a.example/low', priority=1)
+    assert frontier.add('https://b.example/high', priority=5)
+    assert not frontier.add('https://a.example/low#again')
+    assert not frontier.add('https://a.example/deep', depth=2)
+
+    assert frontier.next() == ('https://b.example/high', 0)
+    assert frontier.next() == ('https://a.example/low', 0)
+    assert frontier.next() is None
+
+
+def test_frontier_defers_busy_host():
+    frontier = CrawlFrontier(politeness_delay=60)
+    frontier.add('https://a.example/1', priority=5)
+    frontier.add('https://a.example/2', priority=4)
+    frontier.add('https://b.example/1', priority=1)
+
+    assert frontier.next(wait=False)[0] == 'https://a.example/1'
+    # a.example在礼貌间隔内，先返回其他主机
+    assert frontier.next(wait=False)[0] == 'https://b.example/1'
+    assert frontier.next(wait=False) is None
+
+
+def test_page_budget_ignores_listing_pages():
+    frontier = CrawlFrontier(max_pages=1, politeness_delay=0)
+    for i in range(3):
+        frontier.add(f'https://example.com/{i}')
+
+    url, _ = frontier.next()
+    frontier.mark_done(url, counts_toward_budget=False)
+    url, _ = frontier.next()
+    frontier.mark_done(url)
+
+    assert frontier.exhausted
+
+
+def test_checkpoint_requeues_in_flight_urls(tmp_path):
+    checkpoint = str(tmp_path / 'frontier.json')
+    frontier = CrawlFrontier(politeness_delay=0, checkpoint_file=checkpoint, checkpoint_every=0)
+    for i in range(3):
+        frontier.add(f'https://example.com/{i}', priority=-i)
+    done, _ = frontier.next()
+    frontier.mark_done(done)
+    in_flight, _ = frontier.next()
+    frontier.checkpoint()
+
+    # 进程崩溃后从检查点继续
+    resumed = CrawlFrontier(politeness_delay=0, checkpoint_file=checkpoint)
+
+    assert resumed.pages_done == 1
+    assert [resumed.next()[0], resumed.next()[0]] == [in_flight, 'https://example.com/2']
+    assert not resumed.add(done)
+    resumed.clear_checkpoint()
+    assert not (tmp_path / 'frontier.json').exists()
+
+
+def test_bloom_filter_is_saved_separately_and_only_when_changed(tmp_path):
+    checkpoint = str(tmp_path / 'frontier.json')
+    frontier = CrawlFrontier(politeness_delay=0, checkpoint_file=checkpoint, checkpoint_every=1,
+                             bloom_checkpoint_seconds=3600)
+    frontier.add('https://example.com/a')
+    bloom_file = tmp_path / 'frontier.json.bloom'
+    first_write = bloom_file.stat().st_mtime_ns
+
+    # 间隔未到，定期检查点不重写过滤器，检查点JSON中也不含位数组
+    frontier.add('https://example.com/b')
+    assert bloom_file.stat().st_mtime_ns == first_write
+    assert 'bits' not in json.loads((tmp_path / 'frontier.json').read_text())['seen']
+    assert (tmp_path / 'frontier.json').stat().st_size < 1024
+
+    # 崩溃后恢复：过滤器文件中没有b，但队列中的URL重新加入过滤器
+    resumed = CrawlFrontier(politeness_delay=0, checkpoint_file=checkpoint)
+    assert not resumed.add('https://example.com/a')
+    assert not resumed.add('https://example.com/b')
+
+    # 显式检查点写入新的URL
+    frontier.checkpoint()
+    saved = BloomFilter.from_bytes(frontier.seen.size, frontier.seen.hash_count, bloom_file.read_bytes())
+    assert 'https://example.com/b' in saved
+    frontier.clear_checkpoint()
+    assert not bloom_file.exists()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据库写入器（用内存中的连接池替身代替MySQL）
+"""
+
+import time
+import threading
+
+from db_sink import DatabaseSink
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+
+    def execute(self, sql, params):
+        if 'INSERT' in sql and params[0] in self.pool.fail_titles:
+            raise RuntimeError('insert failed')
+        self.pool.statements.append((sql.split()[0], params))
+        if sql.startswith('SELECT url'):
+            self.rows = [(url,) for url in params if url in self.pool.saved_urls]
+
+    def fetchall(self):
+        return self.rows
+
+    def executemany(self, sql, rows):
+        if any(row[0] in self.pool.fail_titles for row in rows):
+            raise RuntimeError('batch failed')
+        self.pool.statements.extend((sql.split()[0], row) for row in rows)
+        self.rowcount = len(rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return FakeCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, fail_titles=(), saved_urls=()):
+        self.fail_titles = set(fail_titles)
+        self.saved_urls = set(saved_urls)
+        self.statements = []
+
+    def get_connection(self):
+        return FakeConnection(self)
+
+
+def item(title: str, **metadata) -> dict:
+    return {'title': title, 'content': '本文', 'metadata': dict({'source': 'test'}, **metadata)}
+
+
+def submit_all(sink: DatabaseSink, items) -> dict:
+    results = {}
+    for content_data in items:
+        sink.submit(content_data, lambda saved, title=content_data.get('title'): results.__setitem__(title, saved))
+    return results
+
+
+def close_within(sink: DatabaseSink, seconds: float = 5.0):
+    closer = threading.Thread(target=sink.close)
+    closer.start()
+    closer.join(seconds)
+    assert not closer.is_alive(), "写入线程没有结束"
+
+
+def test_invalid_items_fail_individually_and_writer_survives():
+    pool = FakePool()
+    sink = DatabaseSink(pool, batch_size=10)
+    missing_source = {'title': 'no-source', 'content': 'x', 'metadata': {}}
+
+    results = submit_all(sink, [item('a'), missing_source, item('bad-json', extra=object()), item('b')])
+    close_within(sink)
+
+    assert results == {'a': True, 'no-source': False, 'bad-json': False, 'b': True}
+    assert sink.stats()['written'] == 2 and sink.stats()['failed'] == 2
+
+
+def test_failed_batch_falls_back_to_single_rows():
+    pool = FakePool(fail_titles={'broken'})
+    sink = DatabaseSink(pool, batch_size=10)
+
+    results = submit_all(sink, [item('a'), item('broken'), item('b')])
+    close_within(sink)
+
+    assert results == {'a': True, 'broken': False, 'b': True}
+    assert [params[0] for kind, params in pool.statements if kind == 'INSERT'] == ['a', 'b']
+
+
+def test_writer_keeps_running_after_batch_error(monkeypatch):
+    pool = FakePool()
+    sink = DatabaseSink(pool, batch_size=10)
+    monkeypatch.setattr(sink, '_write_progress', lambda: 1 / 0)
+
+    results = submit_all(sink, [item('a')])
+    deadline = time.monotonic() + 5
+    while 'a' not in results and time.monotonic() < deadline:
+        time.sleep(0.01)
+    monkeypatch.undo()
+
+    # 出错之后排队的记录仍然写入
+    sink.submit(item('b'), lambda saved: results.__setitem__('b', saved))
+    close_within(sink)
+
+    assert results == {'a': True, 'b': True}
+
+
+def test_flush_returns_after_writer_error(monkeypatch):
+    sink = DatabaseSink(FakePool(), batch_size=10)
+    monkeypatch.setattr(sink, '_write_progress', lambda: 1 / 0)
+
+    submit_all(sink, [item('a')])
+    flusher = threading.Thread(target=sink.flush)
+    flusher.start()
+    flusher.join(5)
+
+    assert not flusher.is_alive()
+    monkeypatch.undo()
+    close_within(sink)
+
+
+def test_only_latest_progress_is_written():
+    pool = FakePool()
+    sink = DatabaseSink(pool, task_id=7, batch_size=10)
+    for processed in range(1, 6):
+        sink.update_progress(processed, 5, [f'{processed}'])
+    close_within(sink)
+
+    updates = [params for kind, params in pool.statements if kind == 'UPDATE']
+    # 写入线程合并了中间进度，最后写入的是最新一次
+    assert len(updates) < 5
+    assert updates[-1][0] == 5
+
+
+def test_rows_record_article_url():
+    pool = FakePool()
+    sink = DatabaseSink(pool, batch_size=10)
+
+    submit_all(sink, [dict(item('a'), url='https://example.com/a'), dict(item('long'), url='x' * 1000)])
+    close_within(sink)
+
+    urls = [params[3] for kind, params in pool.statements if kind == 'INSERT']
+    # 超出列长度的URL不记录
+    assert urls == ['https://example.com/a', None]
+
+
+def test_existing_urls_queries_in_chunks(monkeypatch):
+    monkeypatch.setattr('db_sink.URL_LOOKUP_CHUNK', 2)
+    pool = FakePool(saved_urls={'u1', 'u4'})
+    sink = DatabaseSink(pool)
+
+    found = sink.existing_urls(['u1', 'u2', 'u3', 'u4', 'u1', 'x' * 1000])
+
+    assert found == {'u1', 'u4'}
+    assert [len(params) for kind, params in pool.statements if kind == 'SELECT'] == [2, 2]
+    close_within(sink)
+
+
+def test_update_by_url_rewrites_saved_resources():
+    pool = FakePool()
+    sink = DatabaseSink(pool, content_type='course')
+
+    updated = sink.update_by_url([dict(item('a'), url='https://example.com/a'), item('no-url'),
+                                  dict(item('long'), url='x' * 1000)])
+
+    assert updated == 1
+    assert [(kind, params[3], params[4]) for kind, params in pool.statements] == [
+        ('UPDATE', 'https://example.com/a', 'course')]
+    close_within(sink)
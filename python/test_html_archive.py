@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试内容寻址的HTML存档
+"""
+
+import pytest
+
+import html_archive
+from html_archive import HtmlArchive
+
+PAGE = '<html><body><p>日本語のニュース</p></body></html>'.encode('utf-8')
+
+
+@pytest.fixture(params=['zstd', 'gzip'])
+def archive(request, tmp_path, monkeypatch):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+    else:
+        monkeypatch.setattr(html_archive, 'zstandard', None)
+    archive = HtmlArchive(str(tmp_path / 'archive'))
+    yield archive
+    archive.close()
+
+
+def test_identical_bodies_are_stored_once(archive, tmp_path):
+    first = archive.put('https://example.com/a', PAGE, 200)
+    second = archive.put('https://example.com/b', PAGE, 200)
+
+    assert first == second
+    assert archive.read(first) == PAGE
+    assert len(list((tmp_path / 'archive' / 'objects').rglob('*' + archive.extension))) == 1
+    assert archive.stats() == {'fetches': 2, 'urls': 2, 'objects': 1, 'raw_bytes': 2 * len(PAGE)}
+
+
+def test_latest_skips_failed_fetches_and_filters_by_prefix(archive):
+    archive.put('https://example.com/news/a', b'old', 200)
+    archive.put('https://example.com/news/a', b'new', 200, headers={'ETag': '"v2"', 'Set-Cookie': 'x'},
+                extra={'adapter': 'general'})
+    archive.put('https://example.com/news/a', b'error page', 503)
+    archive.put('https://example.com/other', PAGE, 200)
+
+    latest = list(archive.latest('https://example.com/news/'))
+
+    assert len(latest) == 1
+    url, sha256, metadata = latest[0]
+    assert url == 'https://example.com/news/a'
+    assert archive.read(sha256) == b'new'
+    assert metadata['headers'] == {'ETag': '"v2"'}
+    assert metadata['adapter'] == 'general' and metadata['status'] == 200
+
+
+def test_gzip_objects_stay_readable_after_installing_zstandard(tmp_path, monkeypatch):
+    pytest.importorskip('zstandard')
+    with monkeypatch.context() as patch:
+        patch.setattr(html_archive, 'zstandard', None)
+        archive = HtmlArchive(str(tmp_path / 'archive'))
+        sha256 = archive.put('https://example.com/a', PAGE, 200)
+        archive.close()
+
+    archive = HtmlArchive(str(tmp_path / 'archive'))
+    # 已有的gzip对象不会再以zstd重复保存
+    assert archive.put('https://example.com/a', PAGE, 200) == sha256
+    assert archive.read(sha256) == PAGE
+    assert not list((tmp_path / 'archive' / 'objects').rglob('*.zst'))
+    archive.close()
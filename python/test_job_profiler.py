@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试性能分析钩子
+"""
+
+import sys
+import json
+
+import pytest
+
+from job_profiler import pop_profile_args, run_profiled
+
+
+def summary(tmp_path) -> dict:
+    files = list(tmp_path.glob('*.summary.json'))
+    assert len(files) == 1
+    return json.loads(files[0].read_text(encoding='utf-8'))
+
+
+def test_profile_args_are_removed_from_argv():
+    argv = ['script.py', 'config.json', '--profile=sample', '--profile-dir', 'out', '-v']
+
+    assert pop_profile_args(argv) == ('sample', 'out')
+    assert argv == ['script.py', 'config.json', '-v']
+
+
+@pytest.mark.parametrize('result, status', [(None, 0), (0, 0), (1, 1), ({'ok': True}, 0)])
+def test_returned_exit_code_is_recorded(tmp_path, result, status):
+    argv = ['script.py', '--profile', f'--profile-dir={tmp_path}']
+
+    assert run_profiled('job', lambda: result, argv) == result
+    assert summary(tmp_path)['exit_status'] == status
+
+
+@pytest.mark.parametrize('code, status', [(None, 0), (2, 2), ('失败', 1)])
+def test_system_exit_code_is_recorded(tmp_path, code, status):
+    argv = ['script.py', '--profile', f'--profile-dir={tmp_path}']
+
+    with pytest.raises(SystemExit):
+        run_profiled('job', lambda: sys.exit(code), argv)
+    assert summary(tmp_path)['exit_status'] == status
+
+
+def test_runs_unprofiled_without_flag(tmp_path, monkeypatch):
+    monkeypatch.delenv('NIHONGO_PROFILE', raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    assert run_profiled('job', lambda: 3, ['script.py']) == 3
+    assert not (tmp_path / 'profiles').exists()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试媒体文件下载器（不访问网络，用内存中的会话替身返回文件内容）
+"""
+
+import json
+import hashlib
+
+import pytest
+
+from media_downloader import MediaDownloader
+from resilient_fetch import ResponseTooLargeError
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Length': str(len(body))} if headers is None else headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeSession:
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append((url, dict(headers or {})))
+        body = self.files[url]
+        if headers and 'Range' in headers:
+            offset = int(headers['Range'].split('=')[1].rstrip('-'))
+            return FakeResponse(body[offset:], 206)
+        return FakeResponse(body)
+
+
+def test_single_download_saves_index(tmp_path):
+    session = FakeSession({'https://example.com/a.jpg': b'image-a'})
+
+    path = MediaDownloader(str(tmp_path), session=session).download('https://example.com/a.jpg', 'images')
+
+    index = json.loads((tmp_path / 'media_index.json').read_text(encoding='utf-8'))
+    assert index['https://example.com/a.jpg']['sha256'] == hashlib.sha256(b'image-a').hexdigest()
+    # 新的下载器从索引命中，不再请求
+    again = MediaDownloader(str(tmp_path), session=session).download('https://example.com/a.jpg', 'images')
+    assert again == path
+    assert len(session.requests) == 1
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    session = FakeSession({'https://a.example/x.mp3': b'same', 'https://b.example/y.mp3': b'same'})
+
+    results = MediaDownloader(str(tmp_path), session=session).download_many(
+        ['https://a.example/x.mp3', 'https://b.example/y.mp3', 'https://a.example/x.mp3'], 'audio')
+
+    assert len(session.requests) == 2
+    assert len(set(results.values())) == 1
+    assert len(list((tmp_path / 'audio').rglob('*.mp3'))) == 1
+
+
+def test_partial_download_resumes_with_range(tmp_path):
+    url = 'https://example.com/long.mp3'
+    body = b'0123456789' * 100
+    session = FakeSession({url: body})
+    downloader = MediaDownloader(str(tmp_path), session=session)
+    partial = downloader.partial_dir / hashlib.sha1(url.encode('utf-8')).hexdigest()
+    partial.write_bytes(body[:300])
+
+    path = downloader.download(url, 'audio')
+
+    assert session.requests[0][1] == {'Range': 'bytes=300-'}
+    assert (tmp_path.parent / path).read_bytes() == body
+
+
+
+def test_oversized_files_are_rejected_and_partial_removed(tmp_path):
+    session = FakeSession({'https://example.com/big.mp3': b'x' * 100})
+    downloader = MediaDownloader(str(tmp_path), session=session, chunk_size=16, max_bytes=50)
+
+    assert downloader.download('https://example.com/big.mp3', 'audio') is None
+
+    # 没有Content-Length（如分块传输）时按实际读取的字节数中止
+    session.get = lambda url, headers=None, stream=False, timeout=None: FakeResponse(b'x' * 100, headers={})
+    with pytest.raises(ResponseTooLargeError):
+        downloader._fetch('https://example.com/big.mp3')
+    assert not list((tmp_path / '.partial').iterdir())
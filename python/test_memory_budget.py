@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓取任务内存预算（用替身代替进程的实际内存读数）
+"""
+
+import memory_budget
+from memory_budget import MemoryBudget, current_rss_mb
+
+
+def readings(monkeypatch, values):
+    values = list(values)
+    monkeypatch.setattr(memory_budget, 'current_rss_mb', lambda: values.pop(0) if len(values) > 1 else values[0])
+
+
+def test_unlimited_budget_never_exceeds(monkeypatch):
+    readings(monkeypatch, [10000])
+
+    assert not MemoryBudget(0).exceeded()
+
+
+def test_garbage_collection_can_bring_usage_back_under_budget(monkeypatch):
+    readings(monkeypatch, [600, 400])
+    budget = MemoryBudget(512)
+
+    assert not budget.exceeded()
+    assert budget.collections == 1 and not budget.exhausted
+    assert budget.peak_mb == 600
+
+
+def test_budget_stays_exhausted_once_exceeded(monkeypatch):
+    readings(monkeypatch, [600, 600])
+    budget = MemoryBudget(512)
+
+    assert budget.exceeded()
+    assert budget.exhausted
+    assert budget.metrics()['exhausted']
+
+
+def test_current_rss_is_positive():
+    assert current_rss_mb() > 0
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按主机自适应限速（加性增、乘性减）和Retry-After解析
+"""
+
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+URL = 'https://www3.nhk.or.jp/news/easy/'
+
+
+def make_limiter(**kwargs) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(**dict({'initial_delay': 1.0, 'min_delay': 0.1, 'max_delay': 60.0,
+                                       'max_concurrency': 4, 'target_latency': 2.0, 'increase_every': 3},
+                                      **kwargs))
+
+
+def host_state(limiter: AdaptiveRateLimiter):
+    return limiter.metrics()['www3.nhk.or.jp']
+
+
+def test_retry_after_seconds():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(' 5 ') == 5.0
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=90)
+
+    wait = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert 85 <= wait <= 90
+
+
+def test_retry_after_in_the_past_or_invalid():
+    assert parse_retry_after('Mon, 01 Jan 2001 00:00:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after(None) is None
+
+
+def test_healthy_responses_shrink_delay_and_add_concurrency():
+    limiter = make_limiter()
+    for _ in range(3):
+        limiter.release(URL, status_code=200, latency=0.1)
+
+    state = host_state(limiter)
+    assert state['delay_ms'] == 512
+    assert state['concurrency'] == 2
+
+
+def test_delay_never_drops_below_minimum_and_concurrency_is_capped():
+    limiter = make_limiter()
+    for _ in range(100):
+        limiter.release(URL, status_code=200, latency=0.1)
+
+    state = host_state(limiter)
+    assert state['delay_ms'] == 100
+    assert state['concurrency'] == 4
+
+
+def test_slow_responses_grow_delay_without_throttling():
+    limiter = make_limiter()
+    limiter.release(URL, status_code=200, latency=5.0)
+
+    state = host_state(limiter)
+    assert state['delay_ms'] == 1250
+    assert state['throttled'] == 0
+
+
+def test_throttle_doubles_delay_and_halves_concurrency():
+    limiter = make_limiter()
+    for _ in range(6):
+        limiter.release(URL, status_code=200, latency=0.1)
+    assert host_state(limiter)['concurrency'] == 3
+
+    limiter.release(URL, status_code=503)
+
+    state = host_state(limiter)
+    # 退避后的间隔不小于初始间隔
+    assert state['delay_ms'] == 1000
+    assert state['concurrency'] == 1
+    assert state['throttled'] == 1
+
+
+def test_timeout_counts_as_throttle_and_client_error_does_not():
+    limiter = make_limiter()
+    limiter.release(URL, error=requests.Timeout())
+    limiter.release(URL, status_code=404)
+
+    state = host_state(limiter)
+    assert state['throttled'] == 1
+    assert state['errors'] == 1
+    assert state['delay_ms'] == 2000
+
+
+def test_retry_after_blocks_host_until_it_passes():
+    limiter = make_limiter(max_delay=1.0)
+    limiter.release(URL, status_code=429, retry_after=30)
+
+    wait = limiter.try_acquire(URL)
+
+    assert 29 <= wait <= 30
+    assert 29000 <= host_state(limiter)['backoff_remaining_ms'] <= 30000
+
+
+def test_try_acquire_respects_concurrency():
+    limiter = make_limiter(initial_delay=0.0, min_delay=0.0)
+
+    assert limiter.try_acquire(URL) == 0.0
+    assert limiter.try_acquire(URL) > 0
+    limiter.release(URL, status_code=200, latency=0.1)
+    assert limiter.try_acquire(URL) == 0.0
+
+
+def test_hosts_are_limited_independently():
+    limiter = make_limiter()
+    limiter.release(URL, status_code=429, retry_after=30)
+
+    start = time.monotonic()
+    limiter.acquire('https://example.com/')
+
+    assert time.monotonic() - start < 1
+    assert set(limiter.metrics()) == {'www3.nhk.or.jp', 'example.com'}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试带重试和熔断的页面请求（会话替身按顺序返回响应或抛出异常，不实际等待）
+"""
+
+import pytest
+import requests
+
+import resilient_fetch
+from resilient_fetch import CircuitBreaker, CircuitOpenError, ResilientFetcher, ResponseTooLargeError
+
+URL = 'https://www3.nhk.or.jp/news/easy/'
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, body: bytes = b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """记录退避上限，不实际休眠"""
+    recorded = []
+    monkeypatch.setattr(resilient_fetch.random, 'uniform', lambda low, high: recorded.append(high) or high)
+    monkeypatch.setattr(resilient_fetch.time, 'sleep', lambda seconds: None)
+    return recorded
+
+
+def test_transient_errors_are_retried_with_exponential_backoff(delays):
+    session = FakeSession([requests.Timeout(), FakeResponse(503), FakeResponse(200)])
+    fetcher = ResilientFetcher(session, max_retries=3, backoff_base=0.5, backoff_max=10.0)
+
+    assert fetcher.get(URL).status_code == 200
+    assert session.calls == 3
+    assert delays == [0.5, 1.0]
+    assert fetcher.metrics()['www3.nhk.or.jp']['retries'] == 2
+
+
+def test_backoff_is_capped(delays):
+    session = FakeSession([FakeResponse(500)] * 6)
+    fetcher = ResilientFetcher(session, max_retries=5, backoff_base=1.0, backoff_max=4.0, failure_threshold=10)
+
+    assert fetcher.get(URL).status_code == 500
+    assert delays == [1.0, 2.0, 4.0, 4.0, 4.0]
+
+
+def test_client_errors_are_returned_without_retry(delays):
+    session = FakeSession([FakeResponse(404)])
+
+    assert ResilientFetcher(session).get(URL).status_code == 404
+    assert session.calls == 1
+
+
+def test_last_network_error_is_raised(delays):
+    session = FakeSession([requests.ConnectionError()] * 2)
+
+    with pytest.raises(requests.ConnectionError):
+        ResilientFetcher(session, max_retries=1).get(URL)
+
+
+def test_circuit_opens_after_consecutive_failures(delays):
+    session = FakeSession([FakeResponse(503)] * 3)
+    fetcher = ResilientFetcher(session, max_retries=0, failure_threshold=3)
+    for _ in range(3):
+        fetcher.get(URL)
+
+    with pytest.raises(CircuitOpenError):
+        fetcher.get(URL)
+    assert session.calls == 3
+    assert fetcher.metrics()['www3.nhk.or.jp']['state'] == 'open'
+
+
+def test_half_open_allows_single_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilient_fetch.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 61
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and breaker.trips == 2
+
+    now[0] = 122
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+
+def test_invalid_request_releases_probe(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    session = FakeSession([requests.exceptions.InvalidURL(), FakeResponse(200)])
+    fetcher = ResilientFetcher(session)
+    fetcher._breakers['www3.nhk.or.jp'] = breaker
+
+    with pytest.raises(requests.exceptions.InvalidURL):
+        fetcher.get(URL)
+    assert fetcher.get(URL).status_code == 200
+
+
+def test_body_over_cap_is_aborted():
+    declared = FakeResponse(200, b'', {'Content-Length': '2048'})
+    streamed = FakeResponse(200, b'x' * 2048)
+    fetcher = ResilientFetcher(FakeSession([declared, streamed]))
+
+    with pytest.raises(ResponseTooLargeError):
+        fetcher.get_body(URL, max_bytes=1024)
+    with pytest.raises(ResponseTooLargeError):
+        fetcher.get_body(URL, max_bytes=1024)
+    assert declared.closed and streamed.closed
+
+
+def test_body_within_cap_is_returned():
+    fetcher = ResilientFetcher(FakeSession([FakeResponse(200, b'x' * 1000)]))
+
+    response, body = fetcher.get_body(URL, max_bytes=1024)
+
+    assert body == b'x' * 1000 and response.closed
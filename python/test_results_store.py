@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓取结果的追加写入和读取（zstd和Parquet格式在安装了可选依赖时测试）
+"""
+
+import pytest
+
+import results_store
+from results_store import ResultsWriter, iter_results
+
+ITEMS = [{'name': f'記事{i}', 'source_url': f'https://example.com/{i}', 'content': '本文' * i,
+          'metadata': {'source': 'test', 'index': i}} for i in range(5)]
+
+
+def test_jsonl_round_trip_and_append(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    with ResultsWriter(path, batch_size=2) as writer:
+        for item in ITEMS[:3]:
+            writer.write(item)
+    with ResultsWriter(path) as writer:
+        for item in ITEMS[3:]:
+            writer.write(item)
+
+    assert list(iter_results(path)) == ITEMS
+
+
+def test_full_batches_are_written_before_close(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    writer = ResultsWriter(path, batch_size=2)
+    for item in ITEMS[:3]:
+        writer.write(item)
+
+    # 进程在这里崩溃时，已满的批次已经写入磁盘
+    assert list(iter_results(path)) == ITEMS[:2]
+    writer.close()
+    assert writer.count == 3
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    with ResultsWriter(str(path)) as writer:
+        writer.write(ITEMS[0])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"name": "途中')
+
+    assert list(iter_results(str(path))) == ITEMS[:1]
+
+
+def test_missing_zstandard_falls_back_to_jsonl(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, 'zstandard', None)
+
+    with ResultsWriter(str(tmp_path / 'results.jsonl.zst')) as writer:
+        writer.write(ITEMS[0])
+
+    assert writer.path == str(tmp_path / 'results.jsonl')
+    assert list(iter_results(writer.path)) == ITEMS[:1]
+
+
+def test_zstd_frames_survive_unclosed_writer(tmp_path):
+    pytest.importorskip('zstandard')
+    path = str(tmp_path / 'results.jsonl.zst')
+    writer = ResultsWriter(path, batch_size=2)
+    for item in ITEMS:
+        writer.write(item)
+
+    assert list(iter_results(path)) == ITEMS[:4]
+    writer.close()
+    assert list(iter_results(path)) == ITEMS
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'results.parquet')
+    with ResultsWriter(path, batch_size=2) as writer:
+        for item in ITEMS:
+            writer.write(item)
+
+    rows = list(iter_results(path))
+
+    assert [row['name'] for row in rows] == [item['name'] for item in ITEMS]
+    # 字典列以JSON字符串保存
+    assert rows[1]['metadata'] == '{"source": "test", "index": 1}'
+
+
+def test_parquet_columns_empty_in_first_batch_accept_later_values(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'results.parquet')
+    items = [
+        {'name': 'a', 'audio_file': None, 'word_count': 10},
+        {'name': 'b', 'audio_file': None, 'word_count': 12},
+        {'name': 'c', 'audio_file': 'c.mp3', 'word_count': 7.0},
+        {'name': 'd', 'audio_file': {'url': 'd.mp3'}, 'word_count': 'n/a', 'extra': 1},
+    ]
+    with ResultsWriter(path, batch_size=2) as writer:
+        for item in items:
+            writer.write(item)
+
+    rows = list(iter_results(path))
+
+    assert [row['audio_file'] for row in rows] == [None, None, 'c.mp3', '{"url": "d.mp3"}']
+    assert [row['word_count'] for row in rows] == [10, 12, 7, None]
+    assert 'extra' not in rows[3]
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓取任务分片（本地SQLite队列，不访问网络和MySQL）
+"""
+
+import json
+
+import scrape_shards
+from scrape_shards import MAX_SHARD_RELEASES, LocalShardQueue, ShardScraper, work
+
+FEED_URL = 'https://www3.nhk.or.jp/news/easy/rss/rss.xml'
+URLS = [f'https://www3.nhk.or.jp/news/easy/article/{i}.html' for i in range(4)]
+PUBLISHED = {url: f'2024-01-{i + 1:02d}T00:00:00+00:00' for i, url in enumerate(URLS)}
+
+
+def shard_dicts(groups):
+    return [{'urls': group, 'published': {url: PUBLISHED[url] for url in group},
+             'feeds': {url: FEED_URL for url in group}} for group in groups]
+
+
+def test_finisher_advances_feed_to_first_unhandled_article(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS[:2], URLS[2:]]))
+    first, second = queue.lease(1, 'a'), queue.lease(1, 'b')
+    queue.complete(first, 2, [], handled=URLS[:2])
+    # 第2个分片中的第1篇抓取失败
+    queue.complete(second, 1, [], handled=URLS[3:])
+
+    scraper = ShardScraper({'task_id': 1, 'dedup': False, 'boilerplate': False,
+                            'feed_cache_file': str(tmp_path / 'feed_cache.json')}, queue)
+    scraper.finish_job()
+
+    with open(tmp_path / 'feed_cache.json', encoding='utf-8') as f:
+        assert json.load(f)[FEED_URL]['last_published'] == PUBLISHED[URLS[1]]
+    queue.close()
+
+
+def test_worker_does_not_advance_feed_on_its_own(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    scraper = ShardScraper({'task_id': 1, 'dedup': False, 'boilerplate': False,
+                            'feed_cache_file': str(tmp_path / 'feed_cache.json')}, queue)
+    scraper.article_published.update(PUBLISHED)
+    scraper.article_feed.update({url: FEED_URL for url in URLS})
+    scraper.handled_urls.update(URLS)
+
+    scraper.save_feed_progress()
+
+    assert not (tmp_path / 'feed_cache.json').exists()
+    queue.close()
+
+
+def test_lease_is_exclusive_until_lease_expires(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS[:2]]))
+
+    first = queue.lease(1, 'a')
+    assert queue.lease(1, 'b') is None
+
+    queue.lease_seconds = -1
+    second = queue.lease(1, 'b')
+    assert second.shard_id == first.shard_id
+    # 租约已转给b，a的迟到结果不再写入
+    queue.complete(first, 2, [], handled=URLS[:2])
+    assert queue.progress(1)['running'] == 1
+    queue.close()
+
+
+def test_shards_of_exited_workers_and_expired_leases_are_requeued(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS[:2], URLS[2:]]))
+    queue.lease(1, 'host:1')
+    queue.lease(1, 'host:2')
+
+    # host:1 已退出，host:2 的租约还没有过期
+    assert queue.requeue_expired(1, ['host:1']) == 1
+    assert (queue.progress(1)['pending'], queue.progress(1)['running']) == (1, 1)
+
+    queue.lease_seconds = -1
+    assert queue.requeue_expired(1) == 1
+    assert queue.progress(1)['pending'] == 2
+    queue.close()
+
+
+def test_shard_that_keeps_crashing_workers_is_failed(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS[:2]]))
+
+    for attempt in range(MAX_SHARD_RELEASES):
+        queue.lease(1, f'host:{attempt}')
+        queue.requeue_expired(1, [f'host:{attempt}'])
+
+    summary = queue.progress(1)
+    assert (summary['pending'], summary['failed']) == (0, 1)
+    assert queue.claim_finish(1, 'host:9')
+    queue.close()
+
+
+def test_claim_finish_succeeds_once_after_all_shards_end(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS[:2], URLS[2:]]))
+    first, second = queue.lease(1, 'a'), queue.lease(1, 'b')
+    queue.complete(first, 2, [])
+
+    assert not queue.claim_finish(1, 'a')
+    queue.complete(second, 0, [], error='boom')
+    assert queue.claim_finish(1, 'b')
+    assert not queue.claim_finish(1, 'a')
+    queue.close()
+
+
+class FakeSink:
+    def __init__(self, saved_urls=()):
+        self.saved_urls = set(saved_urls)
+
+    def existing_urls(self, urls):
+        return self.saved_urls & set(urls)
+
+    def update_progress(self, items_processed, total_items, logs):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def make_shard_scraper(tmp_path, queue, scraped, exhaust_after=None):
+    """抓取替身：记录抓取的URL，抓到exhaust_after篇后标记内存不足"""
+    scraper = ShardScraper({'task_id': 1, 'dedup': False, 'boilerplate': False,
+                            'feed_cache_file': str(tmp_path / 'feed_cache.json')}, queue)
+
+    def scrape_articles(urls, all_content, logs, adapter=None):
+        for url in urls:
+            if scraper.memory_budget.exhausted:
+                break
+            scraped.append(url)
+            all_content.append({'url': url})
+            scraper.handled_urls.add(url)
+            if exhaust_after is not None and len(all_content) >= exhaust_after:
+                scraper.memory_budget.exhausted = True
+
+    scraper.scrape_articles = scrape_articles
+    return scraper
+
+
+def test_reprocessed_shard_skips_urls_saved_in_database(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS]))
+    scraped = []
+    scraper = make_shard_scraper(tmp_path, queue, scraped)
+    # 另一台机器上的进程已经保存了前两篇
+    scraper.db_sink = FakeSink(URLS[:2])
+
+    assert scraper.process(queue.lease(1, 'b'))
+
+    assert scraped == URLS[2:]
+    assert queue.progress(1)['items_processed'] == 4
+    assert sorted(queue.feed_progress(1)[2]) == sorted(URLS)
+    queue.close()
+
+
+def test_shard_fails_with_partial_count_after_release_limit(tmp_path):
+    queue = LocalShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.create(1, shard_dicts([URLS]))
+
+    for attempt in range(MAX_SHARD_RELEASES - 1):
+        shard = queue.lease(1, f'w{attempt}')
+        assert shard.releases == attempt
+        assert not make_shard_scraper(tmp_path, queue, [], exhaust_after=1).process(shard)
+        assert queue.progress(1)['pending'] == 1
+
+    last = make_shard_scraper(tmp_path, queue, [], exhaust_after=1)
+    assert last.process(queue.lease(1, 'last'))
+
+    summary = queue.progress(1)
+    assert summary['failed'] == 1 and summary['pending'] == 0
+    assert summary['items_processed'] == 1
+    assert queue.claim_finish(1, 'last')
+    queue.close()
+
+
+def test_worker_reports_shards_left_when_memory_runs_out(tmp_path, monkeypatch):
+    path = str(tmp_path / 'queue.sqlite')
+    queue = LocalShardQueue(path)
+    queue.create(1, shard_dicts([URLS[:2], URLS[2:]]))
+    queue.close()
+    scraped = []
+    monkeypatch.setattr(scrape_shards, 'ShardScraper',
+                        lambda config, queue: make_shard_scraper(tmp_path, queue, scraped, exhaust_after=1))
+
+    result = work({'task_id': 1, 'shard_queue': path})
+
+    # 第1个分片放回队列，第2个分片还没有被领取
+    assert result == {'processed': 0, 'remaining': 2}
+    assert scraped == URLS[:1]
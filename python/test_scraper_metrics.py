@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分阶段计时的直方图、Prometheus导出和StatsD发送
+"""
+
+import socket
+
+from scraper_metrics import Histogram, StageMetrics, StatsdClient
+
+
+def test_percentiles_use_bucket_bounds_capped_at_max():
+    histogram = Histogram()
+    for value in [3] * 90 + [40] * 9 + [700]:
+        histogram.observe(value)
+
+    data = histogram.to_dict()
+
+    assert data['p50_ms'] == 5.0
+    assert data['p99_ms'] == 50.0
+    assert histogram.percentile(100) == 700
+    assert data['min_ms'] == 3 and data['max_ms'] == 700
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_values_above_last_bucket_report_max():
+    histogram = Histogram()
+    histogram.observe(45000)
+
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(50) == 45000
+
+
+def test_prometheus_buckets_are_cumulative(tmp_path):
+    metrics = StageMetrics()
+    for value in (3, 8, 8, 20000):
+        metrics.observe('fetch', value)
+    metrics.count('pages', 4)
+
+    metrics.write_prometheus(str(tmp_path / 'scraper.prom'))
+    lines = (tmp_path / 'scraper.prom').read_text(encoding='utf-8').splitlines()
+
+    assert 'scraper_stage_duration_ms_bucket{stage="fetch",le="5"} 1' in lines
+    assert 'scraper_stage_duration_ms_bucket{stage="fetch",le="10"} 3' in lines
+    assert 'scraper_stage_duration_ms_bucket{stage="fetch",le="10000"} 3' in lines
+    assert 'scraper_stage_duration_ms_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'scraper_stage_duration_ms_count{stage="fetch"} 4' in lines
+    assert 'scraper_pages_total 4' in lines
+
+
+def test_timer_and_counters_are_sent_to_statsd():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(2)
+    metrics = StageMetrics.from_config({'statsd_host': '127.0.0.1', 'statsd_port': receiver.getsockname()[1]})
+
+    with metrics.timer('parse'):
+        pass
+    metrics.count('pages')
+
+    packets = [receiver.recv(1024).decode('ascii') for _ in range(2)]
+    assert packets[0].startswith('scraper.parse:') and packets[0].endswith('|ms')
+    assert packets[1] == 'scraper.pages:1|c'
+    assert metrics.summary()['stages']['parse']['count'] == 1
+    receiver.close()
+
+
+def test_statsd_send_errors_are_ignored():
+    client = StatsdClient('127.0.0.1', 9)
+    client.socket.close()
+
+    client.send('pages', 1, 'c')
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试站点适配器注册表和<ruby>读音提取
+"""
+
+from bs4 import BeautifulSoup
+
+from site_adapters import GENERAL, MAINICHI, NHK_EASY, extract_ruby_text, registry
+
+NHK_PAGE = """
+<html><head><title>ニュース</title></head><body>
+<div id="js-article-body">
+  <p><ruby>日本<rt>にほん</rt></ruby>の<ruby>天気<rp>(</rp><rt>てんき</rt><rp>)</rp></ruby>は
+  <ruby>晴<rt>は</rt></ruby>れです。<!-- 広告 --><script>var x = 1;</script></p>
+</div>
+</body></html>
+"""
+
+
+def soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, 'html.parser')
+
+
+def test_ruby_text_pairs_base_with_reading():
+    text, tokens = extract_ruby_text(soup(NHK_PAGE).find('div'))
+
+    assert text == '日本の天気は晴れです。'
+    assert tokens == [['日本', 'にほん'], ['の', ''], ['天気', 'てんき'], ['は', ''], ['晴', 'は'], ['れです。', '']]
+
+
+def test_ruby_text_matches_get_text_without_readings():
+    element = soup(NHK_PAGE).find('div')
+    for tag in element.find_all(['rt', 'rp', 'script']):
+        tag.decompose()
+
+    assert extract_ruby_text(soup(NHK_PAGE).find('div'))[0] == element.get_text(strip=True)
+
+
+def test_ruby_with_several_bases_joins_readings():
+    _, tokens = extract_ruby_text(soup('<p><ruby>漢<rt>かん</rt>字<rt>じ</rt></ruby></p>').p)
+
+    assert tokens == [['漢字', 'かんじ']]
+
+
+def test_nhk_adapter_stores_ruby_tokens_in_metadata():
+    url = 'https://www3.nhk.or.jp/news/easy/k10000000000000/k10000000000000.html'
+    adapter = registry.resolve(url)
+    assert adapter is NHK_EASY
+
+    result = adapter.extract(soup(NHK_PAGE.replace('晴れです。', '晴れです。' + 'あ' * 100)), url)
+
+    assert result['content'].startswith('日本の天気は晴れです。')
+    assert ['天気', 'てんき'] in result['metadata']['ruby_tokens']
+
+
+def test_adapters_without_ruby_tokens_keep_plain_text():
+    result = GENERAL.extract(soup(NHK_PAGE), 'https://example.com/a')
+
+    assert 'ruby_tokens' not in result['metadata']
+    assert result['metadata']['source'] == 'example.com'
+
+
+def test_registry_routes_by_host_and_path():
+    assert registry.resolve('https://mainichi.jp/articles/1') is MAINICHI
+    assert registry.resolve('https://www.mainichi.jp/articles/1') is MAINICHI
+    assert registry.resolve('https://www3.nhk.or.jp/news/easy/') is NHK_EASY
+    # 路径不是news/easy的NHK页面使用通用适配器
+    assert registry.resolve('https://www3.nhk.or.jp/news/') is GENERAL
+    assert registry.resolve('https://notmainichi.jp/') is GENERAL
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抓取器的RSS发现和增量位置（不访问网络；数据库不可用时抓取器照常创建）
+"""
+
+import json
+
+from web_scraper import JapaneseWebScraper
+
+FEED_URL = 'https://www3.nhk.or.jp/news/easy/rss/rss.xml'
+
+
+def make_scraper(tmp_path, **config) -> JapaneseWebScraper:
+    return JapaneseWebScraper(dict({
+        'urls': [],
+        'dedup': False,
+        'boilerplate': False,
+        'feed_cache_file': str(tmp_path / 'feed_cache.json'),
+        'fingerprint_index': str(tmp_path / 'fingerprints.sqlite'),
+    }, **config))
+
+
+def entries(count: int):
+    return [{'url': f'https://www3.nhk.or.jp/news/easy/article/{i}.html', 'title': str(i),
+             'published': f'2024-01-{i + 1:02d}T00:00:00+00:00'} for i in range(count)]
+
+
+def feed_cache(tmp_path) -> dict:
+    with open(tmp_path / 'feed_cache.json', encoding='utf-8') as f:
+        return json.load(f)[FEED_URL]
+
+
+def select(scraper: JapaneseWebScraper, items, max_articles: int):
+    cache = scraper._load_feed_cache()
+    return scraper._select_rss_articles(FEED_URL, cache, cache.get(FEED_URL, {}), items, max_articles)
+
+
+def test_discovery_does_not_advance_last_published(tmp_path):
+    scraper = make_scraper(tmp_path, incremental=True)
+
+    assert len(select(scraper, entries(3), 10)) == 3
+    assert 'last_published' not in feed_cache(tmp_path)
+
+
+def test_last_published_stops_before_first_unhandled_article(tmp_path):
+    scraper = make_scraper(tmp_path, incremental=True)
+    links = select(scraper, entries(4), 10)
+    # 第3篇抓取失败
+    scraper.handled_urls.update([links[0], links[1], links[3]])
+
+    scraper.save_feed_progress()
+
+    assert feed_cache(tmp_path)['last_published'] == '2024-01-02T00:00:00+00:00'
+    # 下次增量抓取从失败的文章开始
+    retry = make_scraper(tmp_path, incremental=True)
+    assert select(retry, entries(4), 10) == links[2:]
+
+
+def test_articles_with_same_time_advance_together(tmp_path):
+    scraper = make_scraper(tmp_path, incremental=True)
+    items = entries(2)
+    items[1]['published'] = items[0]['published']
+    links = select(scraper, items, 10)
+    scraper.handled_urls.add(links[0])
+
+    scraper.save_feed_progress()
+
+    assert 'last_published' not in feed_cache(tmp_path)
+
+
+def test_truncated_feed_is_cached_without_validators(tmp_path):
+    """截断的条目列表不保存校验值，之后的任务不会因304只看到部分文章"""
+    scraper = make_scraper(tmp_path)
+    headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    truncated, full = {}, {}
+
+    scraper._store_feed_entries(truncated, headers, entries(5), limit=5)
+    scraper._store_feed_entries(full, headers, entries(3), limit=5)
+
+    assert truncated['etag'] is None and truncated['last_modified'] is None
+    assert full['etag'] == '"v1"'
+    assert len(truncated['entries']) == 5
+
+
+class FakeFeedResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeFeedFetcher:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def get(self, url, **kwargs):
+        return FakeFeedResponse(self.body)
+
+
+def rss(count: int) -> bytes:
+    items = ''.join(f'<item><title>{i}</title><link>https://www3.nhk.or.jp/news/easy/article/{i}.html</link>'
+                    f'<pubDate>Mon, 01 Jan 2024 00:00:00 +0000</pubDate></item>' for i in range(count))
+    return f'<?xml version="1.0"?><rss><channel>{items}</channel></rss>'.encode('utf-8')
+
+
+def test_oversized_feed_falls_back_to_html(tmp_path):
+    scraper = make_scraper(tmp_path, incremental=True, max_body_bytes=10 * 1024)
+    scraper.fetcher = FakeFeedFetcher(rss(500))
+
+    assert scraper.find_nhk_articles_from_rss('https://www3.nhk.or.jp/news/easy/', 10) is None
+
+
+def test_feed_within_cap_is_parsed(tmp_path):
+    scraper = make_scraper(tmp_path, incremental=True, max_body_bytes=10 * 1024)
+    scraper.fetcher = FakeFeedFetcher(rss(5))
+
+    assert len(scraper.find_nhk_articles_from_rss('https://www3.nhk.or.jp/news/easy/', 10)) == 5
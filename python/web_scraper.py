@@ -5,17 +5,35 @@
 支持NHK Easy News新的网站结构
 """
 
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-import mysql.connector
 import json
-import time
 import logging
 import sys
 import os
-from typing import Dict, List, Optional
-from datetime import datetime
+import time
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import parsedate_to_datetime
+from contextlib import nullcontext
+from itertools import groupby
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+
+from boilerplate import BoilerplateRemover
+from content_fingerprint import FingerprintIndex
+from crawl_frontier import CrawlFrontier
+from db_sink import DatabaseSink
+from html_archive import HtmlArchive
+from job_profiler import run_profiled
+from media_downloader import MediaDownloader
+from memory_budget import MemoryBudget
+from rate_limiter import AdaptiveRateLimiter, RateLimitedSession
+from resilient_fetch import ResilientFetcher, ResponseTooLargeError
+from results_store import ResultsWriter
+from scraper_metrics import StageMetrics
+from site_adapters import NHK_EASY, SiteAdapter, registry
 
 # 配置日志
 logging.basicConfig(
@@ -28,6 +46,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 爬取时跳过的媒体文件链接
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.mp4', '.m4a', '.wav', '.pdf', '.zip')
+
+def find_article_links(body: bytes, base_url: str) -> List[str]:
+    """从NHK Easy主页中查找文章链接 - 支持新的网站结构"""
+    soup = BeautifulSoup(body, 'html.parser')
+    article_links = []
+    
+    # 查找article链接 - 支持新的链接格式
+    for link in soup.find_all('a', href=True):
+        href = link.get('href')
+        # 支持新格式: ./article/disaster_xxx.html 和旧格式: /news/easy/article/
+        if href and 'article' in href and (
+            href.startswith('./article/') or 
+            '/news/easy/article/' in href
+        ):
+            article_links.append(urljoin(base_url, href))
+    soup.decompose()
+    return article_links
+
+def extract_site_links(soup, url: str, adapter: SiteAdapter) -> List[str]:
+    """提取同一主机、同一适配器负责的页面链接"""
+    host = urlparse(url).netloc
+    links = []
+    for link in soup.find_all('a', href=True):
+        full_url = urljoin(url, link['href'])
+        parsed = urlparse(full_url)
+        if parsed.scheme not in ('http', 'https') or parsed.netloc != host:
+            continue
+        if parsed.path.lower().endswith(MEDIA_EXTENSIONS):
+            continue
+        # 按名称比较，适配器在进程池中解析时是副本
+        if registry.resolve(full_url).name == adapter.name:
+            links.append(full_url)
+    return links
+
+def parse_page(body: bytes, url: str, adapter: SiteAdapter, include_images: bool, include_audio: bool,
+               collect_links: bool = False, boilerplate: Optional[BoilerplateRemover] = None,
+               metrics: Optional[StageMetrics] = None) -> Tuple[Dict, List[str]]:
+    """解析页面并按站点适配器提取内容，返回 (内容, 站内链接)；解析树用完立即释放"""
+    timer = metrics.timer if metrics else (lambda stage: nullcontext())
+    with timer('parse'):
+        soup = BeautifulSoup(body, 'html.parser')
+    try:
+        links = []
+        if collect_links:
+            with timer('links'):
+                links = extract_site_links(soup, url, adapter)
+        if boilerplate:
+            with timer('boilerplate'):
+                boilerplate.strip(soup, url)
+        with timer('extract'):
+            content_data = adapter.extract(soup, url, include_images, include_audio)
+        return content_data, links
+    finally:
+        # 立即释放解析树，不等到垃圾回收
+        soup.decompose()
+
 class JapaneseWebScraper:
     """日语学习资源网页抓取器"""
     
@@ -40,75 +116,265 @@ class JapaneseWebScraper:
         self.delay_ms = config.get('delay_ms', 1000)
         self.include_images = config.get('include_images', False)
         self.include_audio = config.get('include_audio', False)
+        # 文章发现方式: rss(优先RSS，失败时回退HTML) 或 html
+        self.discovery = config.get('discovery', 'rss')
+        # 增量抓取时只处理上次抓取之后发布的文章
+        self.incremental = config.get('incremental', False)
+        self.feed_cache_file = config.get('feed_cache_file', 'nhk_feed_cache.json')
+        # 文章URL -> RSS中的发布时间 / 所属的RSS地址
+        self.article_published: Dict[str, str] = {}
+        self.article_feed: Dict[str, str] = {}
+        # 已保存或判定为重复的文章URL，任务结束时据此推进RSS增量位置
+        self.handled_urls: Set[str] = set()
+        # 爬取深度，大于0时从种子URL出发沿站内链接爬取（0为只抓取种子URL）
+        self.crawl_depth = config.get('crawl_depth', 0)
+        # 抓取队列检查点文件，任务中断后重新运行时从这里继续
+        self.crawl_checkpoint_file = config.get('crawl_checkpoint_file')
         
-        # 设置请求会话
-        self.session = requests.Session()
+        # 单个页面解压后的最大字节数，超过时放弃该页面
+        self.max_body_bytes = config.get('max_body_bytes', 5 * 1024 * 1024)
+        # 任务内存预算（MB），超出时停止处理剩余页面；0为不限制
+        self.memory_budget = MemoryBudget(config.get('memory_budget_mb', 0))
+        
+        # 分阶段计时和计数，任务结束时写入日志
+        self.metrics = StageMetrics.from_config(config)
+        self.prometheus_file = config.get('prometheus_file')
+        
+        # 设置请求会话，所有请求按主机自适应限速（delay_ms 作为初始间隔）
+        self.rate_limiter = AdaptiveRateLimiter.from_config(config)
+        self.session = RateLimitedSession(self.rate_limiter)
+        # 页面请求带重试和按主机熔断
+        self.fetcher = ResilientFetcher.from_config(self.session, config)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
-        # 数据库连接
-        self.db_connection = None
+        # 近似重复检测索引，dedup为False时不检测
+        self.fingerprint_index = None
+        if config.get('dedup', True):
+            self.fingerprint_index = FingerprintIndex(
+                config.get('fingerprint_index', 'content_fingerprints.sqlite'),
+                threshold=config.get('dedup_threshold', 0.8)
+            )
+        
+        # 站点模板噪声去除，boilerplate为False时不处理
+        self.boilerplate = None
+        if config.get('boilerplate', True):
+            self.boilerplate = BoilerplateRemover(config.get('boilerplate_cache', 'boilerplate_templates.json'))
+        
+        # 原始HTML存档目录，设置后保存每个抓取到的页面，供 --reprocess 离线重新提取
+        self.archive = HtmlArchive(config['html_archive']) if config.get('html_archive') else None
+        
+        # 媒体文件下载器（仅在需要下载图片或音频时创建）
+        self.media_downloader = None
+        if self.include_images or self.include_audio:
+            self.media_downloader = MediaDownloader(
+                config.get('storage_dir', 'storage/app/public/scraped-content'),
+                session=self.session,
+                max_bytes=config.get('max_media_mb', 100) * 1024 * 1024
+            )
+        
+        # 数据库写入（连接池 + 后台写入线程），页面请求和写库互不等待
+        self.db_sink: Optional[DatabaseSink] = None
         self.connect_database()
     
     def connect_database(self):
-        """连接数据库"""
+        """创建数据库连接池和写入线程"""
         try:
             # 从环境变量读取数据库配置
-            self.db_connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                database=os.getenv('DB_DATABASE', '90nihongo'),
-                user=os.getenv('DB_USERNAME', 'root'),
-                password=os.getenv('DB_PASSWORD', ''),
-                charset='utf8mb4'
-            )
+            self.db_sink = DatabaseSink.connect(self.config, metrics=self.metrics)
             logger.info("数据库连接成功")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
-            self.db_connection = None
+            self.db_sink = None
     
     def update_task_progress(self, items_processed: int, total_items: int, logs: List[str]):
-        """更新任务进度"""
-        if not self.db_connection or not self.task_id:
+        """更新任务进度（由写入线程合并写入）"""
+        if not self.db_sink:
             return
+        self.db_sink.update_progress(items_processed, total_items, logs)
+    
+    def discover_nhk_articles(self, base_url: str, max_articles: int = 10) -> List[str]:
+        """发现NHK Easy News文章链接，优先使用RSS，必要时回退到解析HTML主页"""
+        with self.metrics.timer('discover'):
+            if self.discovery == 'rss':
+                article_links = self.find_nhk_articles_from_rss(base_url, max_articles)
+                if article_links is not None:
+                    return article_links
+                logger.info("RSS不可用，回退到HTML主页解析")
             
+            return self.find_nhk_articles(base_url, max_articles)
+    
+    def find_nhk_articles_from_rss(self, base_url: str, max_articles: int = 10) -> Optional[List[str]]:
+        """通过RSS获取文章链接（条件请求 + 增量解析）
+        
+        返回None表示RSS不可用，需要回退到HTML解析。
+        """
+        feed_url = urljoin(base_url, 'rss/rss.xml')
+        cache = self._load_feed_cache()
+        feed_cache = cache.get(feed_url, {})
+        
         try:
-            cursor = self.db_connection.cursor()
-            progress = (items_processed / total_items * 100) if total_items > 0 else 0
-            
-            # 更新任务状态
-            cursor.execute("""
-                UPDATE import_tasks 
-                SET items_processed = %s, progress = %s, logs = %s, updated_at = NOW()
-                WHERE id = %s
-            """, (items_processed, progress, json.dumps(logs, ensure_ascii=False), self.task_id))
-            
-            self.db_connection.commit()
-            cursor.close()
-            
+            logger.info(f"访问NHK RSS: {feed_url}")
+            with self.fetcher.get(feed_url, headers=self._feed_headers(feed_cache), stream=True) as response:
+                if response.status_code == 304:
+                    logger.info("RSS未更新，使用缓存的文章列表")
+                    entries = feed_cache.get('entries', [])
+                else:
+                    response.raise_for_status()
+                    # 增量模式需要完整的条目列表来和上次的位置比较
+                    limit = None if self.incremental else max_articles
+                    entries = self._parse_rss_entries(response.iter_content(chunk_size=4096), limit,
+                                                      self.max_body_bytes)
+                    self._store_feed_entries(feed_cache, response.headers, entries, limit)
         except Exception as e:
-            logger.error(f"更新任务进度失败: {e}")
+            logger.error(f"获取NHK RSS失败: {e}")
+            return None
+        
+        return self._select_rss_articles(feed_url, cache, feed_cache, entries, max_articles)
+    
+    def _feed_headers(self, feed_cache: Dict) -> Dict:
+        """RSS条件请求头"""
+        headers = {}
+        if feed_cache.get('etag'):
+            headers['If-None-Match'] = feed_cache['etag']
+        if feed_cache.get('last_modified'):
+            headers['If-Modified-Since'] = feed_cache['last_modified']
+        return headers
+    
+    def _select_rss_articles(self, feed_url: str, cache: Dict, feed_cache: Dict, entries: List[Dict],
+                             max_articles: int) -> Optional[List[str]]:
+        """从RSS条目中选出本次要抓取的文章，并更新RSS缓存
+        
+        增量位置(last_published)在任务结束时由save_feed_progress按实际保存的文章推进。
+        """
+        if not entries:
+            return None
+        
+        if self.incremental:
+            # 增量模式从最早的未处理文章开始，保证被数量限制截断的文章下次还能抓到
+            last_published = feed_cache.get('last_published') or ''
+            entries = sorted(
+                (e for e in entries if e['published'] and e['published'] > last_published),
+                key=lambda e: e['published']
+            )
+        
+        article_links = []
+        for entry in entries:
+            if len(article_links) >= max_articles:
+                break
+            if entry['url'] not in article_links:
+                article_links.append(entry['url'])
+                self.article_published[entry['url']] = entry['published']
+                self.article_feed[entry['url']] = feed_url
+        
+        cache[feed_url] = feed_cache
+        self._save_feed_cache(cache)
+        
+        logger.info(f"RSS中找到 {len(article_links)} 个文章链接")
+        return article_links
+    
+    def _store_feed_entries(self, feed_cache: Dict, headers, entries: List[Dict], limit: Optional[int]):
+        """缓存RSS条目和条件请求的校验值
+        
+        条目在limit处截断时不保存ETag/Last-Modified：缓存文件由多个任务共享，
+        之后max_pages更大的任务收到304时只能看到截断后的列表。
+        """
+        truncated = limit is not None and len(entries) >= limit
+        feed_cache.update({
+            'etag': None if truncated else headers.get('ETag'),
+            'last_modified': None if truncated else headers.get('Last-Modified'),
+            'entries': entries
+        })
+    
+    def _parse_rss_entries(self, chunks, limit: Optional[int], max_bytes: Optional[int] = None) -> List[Dict]:
+        """边下载边解析RSS条目，取够数量后停止读取；读取超过max_bytes时抛出 ResponseTooLargeError"""
+        parser = ET.XMLPullParser(events=('end',))
+        entries = []
+        received = 0
+        
+        for chunk in chunks:
+            received += len(chunk)
+            if max_bytes and received > max_bytes:
+                raise ResponseTooLargeError(f"RSS超过上限 {max_bytes} 字节，已中止读取")
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if element.tag != 'item':
+                    continue
+                link = (element.findtext('link') or '').strip()
+                if link:
+                    entries.append({
+                        'url': link,
+                        'title': (element.findtext('title') or '').strip(),
+                        'published': self._parse_pub_date(element.findtext('pubDate'))
+                    })
+                element.clear()
+                if limit is not None and len(entries) >= limit:
+                    return entries
+        
+        return entries
+    
+    def _parse_pub_date(self, value: Optional[str]) -> str:
+        """RSS发布时间转换为UTC的ISO格式（便于直接比较先后），无法解析时返回空字符串"""
+        if not value:
+            return ''
+        try:
+            return parsedate_to_datetime(value.strip()).astimezone(timezone.utc).isoformat()
+        except (TypeError, ValueError):
+            return ''
+    
+    def save_feed_progress(self):
+        """把RSS增量位置推进到已处理文章的发布时间
+        
+        按发布时间从早到晚推进，停在第一篇没有保存（抓取或写入失败、未处理）的文章之前，
+        这些文章在下次增量抓取时重试。
+        """
+        feeds: Dict[str, List[Tuple[str, str]]] = {}
+        for url, feed_url in self.article_feed.items():
+            if self.article_published.get(url):
+                feeds.setdefault(feed_url, []).append((self.article_published[url], url))
+        if not feeds:
+            return
+        
+        cache = self._load_feed_cache()
+        for feed_url, articles in feeds.items():
+            last_published = None
+            for published, group in groupby(sorted(articles), key=lambda article: article[0]):
+                # 同一发布时间的文章全部处理完才能越过该时间
+                if any(url not in self.handled_urls for _, url in group):
+                    break
+                last_published = published
+            if last_published:
+                feed_cache = cache.setdefault(feed_url, {})
+                feed_cache['last_published'] = max(last_published, feed_cache.get('last_published') or '')
+        self._save_feed_cache(cache)
+    
+    def _load_feed_cache(self) -> Dict:
+        if not self.feed_cache_file or not os.path.exists(self.feed_cache_file):
+            return {}
+        try:
+            with open(self.feed_cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"RSS缓存读取失败: {e}")
+            return {}
+    
+    def _save_feed_cache(self, cache: Dict):
+        if not self.feed_cache_file:
+            return
+        try:
+            with open(self.feed_cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"RSS缓存保存失败: {e}")
     
     def find_nhk_articles(self, base_url: str, max_articles: int = 10) -> List[str]:
         """查找NHK Easy News文章链接 - 支持新的网站结构"""
         try:
             logger.info(f"访问NHK主页: {base_url}")
-            response = self.session.get(base_url, timeout=30)
+            response, body = self.fetcher.get_body(base_url, self.max_body_bytes)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            article_links = []
-            
-            # 查找article链接 - 支持新的链接格式
-            for link in soup.find_all('a', href=True):
-                href = link.get('href')
-                # 支持新格式: ./article/disaster_xxx.html 和旧格式: /news/easy/article/
-                if href and 'article' in href and (
-                    href.startswith('./article/') or 
-                    '/news/easy/article/' in href
-                ):
-                    full_url = urljoin(base_url, href)
-                    article_links.append(full_url)
+            article_links = find_article_links(body, base_url)
             
             # 去重并限制数量
             article_links = list(set(article_links))[:max_articles]
@@ -122,112 +388,199 @@ class JapaneseWebScraper:
     
     def scrape_nhk_easy_news(self, url: str) -> Optional[Dict]:
         """抓取NHK Easy News内容"""
+        return self.scrape_page(url, NHK_EASY)
+    
+    def scrape_page(self, url: str, adapter: Optional[SiteAdapter] = None,
+                    links: Optional[List[str]] = None) -> Optional[Dict]:
+        """抓取单个页面，按站点适配器的提取计划提取内容
+        
+        传入links列表时，同时收集页面中由同一适配器处理的站内链接。
+        """
+        adapter = adapter or registry.resolve(url)
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            with self.metrics.timer('fetch'):
+                response, body = self.fetcher.get_body(url, self.max_body_bytes)
+                response.raise_for_status()
+            # 到收到响应头为止的时间（包含DNS、建立连接/TLS和服务器处理）
+            self.metrics.observe('fetch.headers', response.elapsed.total_seconds() * 1000)
+            self.metrics.count('bytes_downloaded', len(body))
+            self.archive_page(url, body, response.status_code, response.headers,
+                              response.elapsed.total_seconds() * 1000, adapter)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 提取标题
-            title = soup.find('title')
-            title_text = title.get_text(strip=True) if title else "未知标题"
-            
-            # 提取正文内容 - 尝试多种选择器
-            content = ""
-            content_selectors = [
-                'div[id*="article"]',
-                'div[class*="article"]', 
-                'div[class*="content"]',
-                'main',
-                'article',
-                '.content'
-            ]
-            
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = ' '.join([elem.get_text(strip=True) for elem in elements])
-                    if len(content) > 100:
-                        break
+            content_data, page_links = parse_page(
+                body, url, adapter, self.include_images, self.include_audio,
+                collect_links=links is not None, boilerplate=self.boilerplate, metrics=self.metrics
+            )
+            if links is not None:
+                links.extend(page_links)
+            if adapter is NHK_EASY:
+                content_data['metadata']['published_at'] = self.article_published.get(url, '')
+            self.metrics.count('pages_fetched')
+            return content_data
             
-            # 如果还没有找到内容，提取body
-            if len(content) < 100:
-                body = soup.find('body')
-                if body:
-                    content = body.get_text(strip=True)
+        except ResponseTooLargeError as e:
+            self.metrics.count('oversized_pages')
+            logger.warning(f"跳过过大的页面({adapter.name}): {e}")
+            return None
+        except Exception as e:
+            self.metrics.count('fetch_errors')
+            logger.error(f"抓取页面失败({adapter.name}) {url}: {e}")
+            return None
+    
+    def archive_page(self, url: str, body: bytes, status: int, headers, elapsed_ms: float,
+                     adapter: SiteAdapter):
+        """把页面原文存入HTML存档，存档失败不影响抓取"""
+        if not self.archive:
+            return
+        try:
+            with self.metrics.timer('archive'):
+                self.archive.put(url, body, status, headers, elapsed_ms, extra={
+                    'adapter': adapter.name,
+                    'published_at': self.article_published.get(url, '')
+                })
+        except Exception as e:
+            logger.warning(f"保存HTML存档失败 {url}: {e}")
+    
+    def crawl_websites(self, logs: List[str]) -> List[Dict]:
+        """从种子URL出发按优先级爬取站内页面
+        
+        文章页优先于列表页，越浅的页面越优先；max_pages限制保存的资源数量，
+        crawl_depth限制链接深度。NHK Easy只保存文章页，列表页仅用于发现链接。
+        """
+        frontier = CrawlFrontier(
+            max_pages=self.max_pages,
+            max_depth=self.crawl_depth,
+            # 请求间隔由会话的自适应限速器控制
+            politeness_delay=0,
+            checkpoint_file=self.crawl_checkpoint_file
+        )
+        for url in self.urls:
+            frontier.add(url, depth=0, priority=self._crawl_priority(url, 0))
+        
+        all_content = []
+        # 列表页不计入页面预算，限制总请求数防止在没有文章的站点上无限爬取
+        max_fetches = self.max_pages * 5
+        fetches = 0
+        
+        shed = False
+        while fetches < max_fetches:
+            if self.memory_exhausted(logs, len(frontier)):
+                shed = True
+                break
+            entry = frontier.next()
+            if not entry:
+                break
+            url, depth = entry
+            fetches += 1
             
-            # 提取图片
-            images = []
-            if self.include_images:
-                for img in soup.find_all('img'):
-                    src = img.get('src')
-                    if src and not src.startswith('data:'):
-                        full_url = urljoin(url, src)
-                        images.append(full_url)
+            adapter = registry.resolve(url)
+            logger.info(f"爬取页面 (深度 {depth}, 已保存 {len(all_content)}/{self.max_pages}): {url}")
             
-            # 提取音频链接
-            audio_urls = []
-            if self.include_audio:
-                for audio in soup.find_all(['audio', 'source']):
-                    src = audio.get('src')
-                    if src and ('.mp3' in src or '.wav' in src):
-                        full_url = urljoin(url, src)
-                        audio_urls.append(full_url)
-                
-                # 查找音频播放按钮或链接
-                for link in soup.find_all('a', href=True):
-                    href = link.get('href')
-                    if href and ('.mp3' in href or '.wav' in href or 'audio' in href):
-                        full_url = urljoin(url, href)
-                        audio_urls.append(full_url)
+            links = []
+            content_data = self.scrape_page(url, adapter, links)
+            for link in links:
+                frontier.add(link, depth=depth + 1, priority=self._crawl_priority(link, depth + 1))
             
-            return {
-                'url': url,
-                'title': title_text,
-                'content': content,
-                'images': images[:5],  # 限制图片数量
-                'audio': audio_urls[:3],  # 限制音频数量
-                'metadata': {
-                    'source': 'NHK Easy News',
-                    'difficulty': 'easy',
-                    'language': 'japanese'
-                }
-            }
+            is_article = adapter is not NHK_EASY or '/article/' in url
+            saved = False
+            if is_article:
+                if content_data and len(content_data['content']) > 50:
+                    saved = self.store_content(content_data, all_content, logs)
+                else:
+                    logs.append(f"抓取失败或内容太少: {url}")
             
-        except Exception as e:
-            logger.error(f"抓取NHK Easy News失败 {url}: {e}")
-            return None
+            frontier.mark_done(url, counts_toward_budget=saved)
+            self.update_task_progress(len(all_content), self.max_pages, logs)
+        
+        logs.append(f"爬取结束: 请求 {fetches} 个页面，剩余待抓取 {len(frontier)} 个")
+        if shed:
+            # 保留检查点，内存释放后重新运行任务可以继续
+            frontier.checkpoint()
+        else:
+            frontier.clear_checkpoint()
+        return all_content
+    
+    def memory_exhausted(self, logs: List[str], remaining: int) -> bool:
+        """超出内存预算时停止处理剩余页面，以已抓取的部分结果完成任务"""
+        if self.memory_budget.exhausted:
+            return True
+        if not self.memory_budget.exceeded():
+            return False
+        logs.append(f"内存超出预算 {self.memory_budget.limit_mb}MB，跳过剩余 {remaining} 个页面")
+        return True
+    
+    def _crawl_priority(self, url: str, depth: int) -> float:
+        """文章页优先，其次按深度由浅到深"""
+        return (10 if '/article/' in url else 0) - depth
+    
+    def store_content(self, content_data: Dict, all_content: List[Dict], logs: List[str]) -> bool:
+        """过滤近似重复后保存资源，返回内容是否被采用"""
+        if self.fingerprint_index:
+            with self.metrics.timer('dedup'):
+                duplicate = self.fingerprint_index.find_duplicate(content_data['content'])
+            if duplicate:
+                self.handled_urls.add(content_data['url'])
+                self.metrics.count('duplicates')
+                duplicate_url, similarity = duplicate
+                logs.append(f"跳过重复内容: {content_data['title']} (与 {duplicate_url} 相似度 {similarity:.2f})")
+                return False
+        
+        all_content.append(content_data)
+        doc_id = None
+        if self.fingerprint_index:
+            # 入队时就加入索引，仍在写入队列中的文章也参与后续去重；保存失败时再移除
+            doc_id = self.fingerprint_index.add(content_data['url'], content_data['title'], content_data['content'])
+        
+        def on_saved(saved: bool):
+            if saved:
+                self.handled_urls.add(content_data['url'])
+                self.metrics.count('pages_saved')
+                logs.append(f"成功抓取并保存: {content_data['title']}")
+            else:
+                if doc_id is not None:
+                    self.fingerprint_index.remove(doc_id)
+                logs.append(f"抓取成功但保存失败: {content_data['title']}")
+        
+        self.save_resource_to_database(content_data, on_saved)
+        return True
+    
+    def download_media(self, content_data: Dict):
+        """并发下载文章中的图片和音频，结果记录到metadata['media_files']"""
+        if not self.media_downloader:
+            return
+        
+        media_files = {}
+        for key, file_type in (('images', 'images'), ('audio', 'audio')):
+            urls = content_data.get(key) or []
+            if urls:
+                downloaded = self.media_downloader.download_many(urls, file_type)
+                media_files[key] = [
+                    {'original_url': url, 'local_path': local_path}
+                    for url, local_path in downloaded.items()
+                ]
+        
+        if media_files:
+            content_data['metadata']['media_files'] = media_files
     
-    def save_resource_to_database(self, content_data: Dict):
-        """保存资源到数据库"""
-        if not self.db_connection:
+    def save_resource_to_database(self, content_data: Dict, on_done=None) -> bool:
+        """下载媒体文件后把资源放进写入队列，返回是否已排队；写入结果通过on_done(是否成功)回调"""
+        if not self.db_sink:
             logger.error("数据库连接不可用")
+            if on_done:
+                on_done(False)
             return False
             
         try:
-            cursor = self.db_connection.cursor()
-            
-            # 插入资源数据
-            cursor.execute("""
-                INSERT INTO resource_items (name, type, source, content, status, metadata, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW())
-            """, (
-                content_data['title'],
-                self.content_type,
-                content_data['metadata']['source'],
-                content_data['content'],
-                'completed',
-                json.dumps(content_data['metadata'], ensure_ascii=False)
-            ))
-            
-            self.db_connection.commit()
-            cursor.close()
+            with self.metrics.timer('media'):
+                self.download_media(content_data)
             
-            logger.info(f"成功保存资源: {content_data['title']}")
+            self.db_sink.submit(content_data, on_done)
             return True
             
         except Exception as e:
             logger.error(f"保存资源到数据库失败: {e}")
+            if on_done:
+                on_done(False)
             return False
     
     def scrape_websites(self):
@@ -237,83 +590,222 @@ class JapaneseWebScraper:
         all_content = []
         logs = ["开始抓取网站内容"]
         
-        for url in self.urls:
+        if self.crawl_depth > 0:
+            all_content = self.crawl_websites(logs)
+            self.complete_task(all_content, logs)
+            return all_content
+        
+        for index, url in enumerate(self.urls):
+            if self.memory_exhausted(logs, len(self.urls) - index):
+                break
             try:
                 logger.info(f"处理URL: {url}")
                 
-                # 根据URL类型选择抓取方法
-                if 'nhk.or.jp' in url and 'news/easy' in url:
+                # 根据站点适配器选择抓取方法，NHK Easy首页需要先发现文章
+                adapter = registry.resolve(url)
+                if adapter is NHK_EASY and '/article/' not in url:
                     # NHK Easy News - 查找文章链接
-                    article_links = self.find_nhk_articles(url, self.max_pages)
+                    article_links = self.discover_nhk_articles(url, self.max_pages)
                     
                     if not article_links:
                         logs.append(f"在 {url} 没有找到文章链接")
                         continue
                     
                     # 抓取每篇文章
-                    for i, article_url in enumerate(article_links):
-                        logger.info(f"抓取文章 {i+1}/{len(article_links)}: {article_url}")
-                        
-                        content_data = self.scrape_nhk_easy_news(article_url)
-                        if content_data and len(content_data['content']) > 50:
-                            all_content.append(content_data)
-                            
-                            # 保存到数据库
-                            if self.save_resource_to_database(content_data):
-                                logs.append(f"成功抓取并保存: {content_data['title']}")
-                            else:
-                                logs.append(f"抓取成功但保存失败: {content_data['title']}")
-                        else:
-                            logs.append(f"抓取失败或内容太少: {article_url}")
-                        
-                        # 更新进度
-                        self.update_task_progress(len(all_content), len(article_links), logs)
-                        
-                        # 延迟
-                        if self.delay_ms > 0:
-                            time.sleep(self.delay_ms / 1000)
+                    self.scrape_articles(article_links, all_content, logs, NHK_EASY)
                 
                 else:
-                    # 其他网站的通用抓取逻辑
-                    logger.info(f"使用通用抓取逻辑处理: {url}")
-                    # 这里可以添加其他网站的抓取逻辑
+                    # 其他网站直接抓取该页面
+                    logger.info(f"使用站点适配器 {adapter.name} 处理: {url}")
+                    content_data = self.scrape_page(url, adapter)
+                    if content_data and len(content_data['content']) > 50:
+                        self.store_content(content_data, all_content, logs)
+                    else:
+                        logs.append(f"抓取失败或内容太少: {url}")
+                    
+                    self.update_task_progress(len(all_content), len(self.urls), logs)
                     
             except Exception as e:
                 error_msg = f"处理URL失败 {url}: {e}"
                 logger.error(error_msg)
                 logs.append(error_msg)
         
-        # 完成抓取
-        if self.db_connection and self.task_id:
-            try:
-                cursor = self.db_connection.cursor()
-                cursor.execute("""
-                    UPDATE import_tasks 
-                    SET status = %s, progress = %s, items_processed = %s, logs = %s, updated_at = NOW()
-                    WHERE id = %s
-                """, ('completed', 100, len(all_content), json.dumps(logs, ensure_ascii=False), self.task_id))
-                
-                self.db_connection.commit()
-                cursor.close()
-                
-            except Exception as e:
-                logger.error(f"更新任务完成状态失败: {e}")
+        self.complete_task(all_content, logs)
+        return all_content
+    
+    def scrape_articles(self, article_links: List[str], all_content: List[Dict], logs: List[str],
+                        adapter: Optional[SiteAdapter] = None):
+        """依次抓取并保存一组文章页，adapter为None时按URL选择站点适配器"""
+        for i, article_url in enumerate(article_links):
+            if self.memory_exhausted(logs, len(article_links) - i):
+                break
+            logger.info(f"抓取文章 {i+1}/{len(article_links)}: {article_url}")
+            
+            content_data = self.scrape_page(article_url, adapter)
+            if content_data and len(content_data['content']) > 50:
+                # 过滤近似重复后保存到数据库
+                self.store_content(content_data, all_content, logs)
+            else:
+                logs.append(f"抓取失败或内容太少: {article_url}")
+            
+            # 更新进度
+            self.update_task_progress(len(all_content), len(article_links), logs)
+    
+    def complete_task(self, all_content: List[Dict], logs: List[str]):
+        """更新任务为完成状态"""
+        self.finish_run(logs)
+        
+        if self.db_sink:
+            self.db_sink.complete_task(len(all_content), logs)
         
         logger.info(f"抓取完成，共获取 {len(all_content)} 个资源")
-        return all_content
+    
+    def fetch_metrics(self) -> Dict[str, Dict]:
+        """页面请求的重试与熔断状态"""
+        return self.fetcher.metrics()
+    
+    def finish_run(self, logs: List[str]):
+        """写完排队的资源，保存模板缓存，把限速、重试和阶段耗时等统计写入日志"""
+        # 先写完队列中的资源，计数和日志才是最终结果
+        if self.db_sink:
+            self.db_sink.close()
+        if self.boilerplate:
+            self.boilerplate.save()
+        self.save_feed_progress()
+        
+        rate_metrics = self.rate_limiter.metrics()
+        logger.info(f"限速状态: {json.dumps(rate_metrics, ensure_ascii=False)}")
+        logs.append(f"限速状态: {json.dumps(rate_metrics, ensure_ascii=False)}")
+        fetch_metrics = self.fetch_metrics()
+        logger.info(f"重试与熔断状态: {json.dumps(fetch_metrics, ensure_ascii=False)}")
+        logs.append(f"重试与熔断状态: {json.dumps(fetch_metrics, ensure_ascii=False)}")
+        if self.memory_budget.limit_mb:
+            logs.append(f"内存: {json.dumps(self.memory_budget.metrics(), ensure_ascii=False)}")
+        if self.db_sink:
+            logs.append(f"数据库写入: {json.dumps(self.db_sink.stats(), ensure_ascii=False)}")
+        if self.archive:
+            logs.append(f"HTML存档: {json.dumps(self.archive.stats(), ensure_ascii=False)}")
+        stage_metrics = self.metrics.summary()
+        logger.info(f"阶段耗时: {json.dumps(stage_metrics, ensure_ascii=False)}")
+        logs.extend(self.metrics.summary_lines())
+        logs.append(f"计数: {json.dumps(stage_metrics['counters'], ensure_ascii=False)}")
+        if self.prometheus_file:
+            try:
+                self.metrics.write_prometheus(self.prometheus_file)
+            except Exception as e:
+                logger.warning(f"写入Prometheus指标文件失败: {e}")
+
+# 重新提取子进程中的存档、模板去除器和提取选项
+_reprocess_state: Dict = {}
+
+def _init_reprocess_worker(archive_dir: str, use_boilerplate: bool, cache_file: Optional[str],
+                           include_images: bool, include_audio: bool):
+    """重新提取子进程初始化：加载模板缓存，子进程中学到的模板不写回缓存文件"""
+    boilerplate = None
+    if use_boilerplate:
+        boilerplate = BoilerplateRemover(cache_file)
+        boilerplate.cache_file = None
+    _reprocess_state.update(
+        archive=HtmlArchive(archive_dir),
+        boilerplate=boilerplate,
+        include_images=include_images,
+        include_audio=include_audio
+    )
+
+def _reprocess_page(item: Tuple[str, str, Dict]) -> Optional[Dict]:
+    """从存档读取页面并重新提取，内容太少或提取失败时返回None"""
+    url, sha256, meta = item
+    try:
+        body = _reprocess_state['archive'].read(sha256)
+        adapter = registry.resolve(url)
+        content_data, _ = parse_page(
+            body, url, adapter, _reprocess_state['include_images'], _reprocess_state['include_audio'],
+            boilerplate=_reprocess_state['boilerplate']
+        )
+    except Exception as e:
+        logger.error(f"重新提取失败 {url}: {e}")
+        return None
+    if len(content_data['content']) <= 50:
+        return None
+    if adapter is NHK_EASY:
+        content_data['metadata']['published_at'] = meta.get('published_at', '')
+    content_data['metadata']['archive'] = {'sha256': sha256, 'fetched_at': meta['fetched_at']}
+    return content_data
+
+def reprocess_archive(config: Dict) -> int:
+    """用当前的提取逻辑重新处理HTML存档中的页面（不发送网络请求），结果写入文件，返回结果数
+    
+    每个URL只处理最近一次成功抓取的版本，reprocess_prefix可以限定URL前缀。
+    reprocess_update_db为True时，同时按URL更新数据库中已保存的资源（不新增记录）；
+    否则只写结果文件，需要时再用 test/content_importer.py --summary-file 导入。
+    """
+    archive_dir = config['html_archive']
+    archive = HtmlArchive(archive_dir)
+    pages = list(archive.latest(config.get('reprocess_prefix')))
+    archive.close()
+    output = config.get('reprocess_output', 'reprocessed_results.jsonl')
+    workers = config.get('parse_workers') or os.cpu_count() or 1
+    logger.info(f"重新提取 {len(pages)} 个存档页面，进程数 {workers}")
+    
+    # 按URL更新数据库中已保存的资源，与结果文件同批写入
+    sink = DatabaseSink.connect(config) if config.get('reprocess_update_db') else None
+    pending = []
+    updated = 0
+    
+    start = time.perf_counter()
+    skipped = 0
+    try:
+        # spawn启动的子进程不继承父进程的数据库连接和日志文件句柄
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_reprocess_worker,
+            initargs=(archive_dir, config.get('boilerplate', True),
+                      config.get('boilerplate_cache', 'boilerplate_templates.json'),
+                      config.get('include_images', False), config.get('include_audio', False))
+        ) as executor, ResultsWriter(output, append=False) as writer:
+            for content_data in executor.map(_reprocess_page, pages, chunksize=max(1, len(pages) // (workers * 4))):
+                if not content_data:
+                    skipped += 1
+                    continue
+                writer.write(content_data)
+                if sink:
+                    pending.append(content_data)
+                    if len(pending) >= sink.batch_size:
+                        updated += sink.update_by_url(pending)
+                        pending = []
+            if sink and pending:
+                updated += sink.update_by_url(pending)
+    finally:
+        if sink:
+            sink.close()
+    
+    elapsed = time.perf_counter() - start
+    logger.info(f"重新提取完成: {writer.count} 个资源写入 {writer.path}，跳过 {skipped} 个，"
+                f"耗时 {elapsed:.2f}s ({len(pages) / elapsed if elapsed else 0:.1f} 页/秒)")
+    if sink:
+        logger.info(f"数据库中更新了 {updated} 个已保存的资源")
+    return writer.count
 
 def main():
     """主函数"""
-    if len(sys.argv) != 2:
-        print("用法: python web_scraper_fixed.py <config_file>")
+    reprocess = len(sys.argv) == 3 and sys.argv[1] == '--reprocess'
+    if len(sys.argv) != 2 and not reprocess:
+        print("用法: python web_scraper_fixed.py [--reprocess] <config_file>")
         sys.exit(1)
     
-    config_file = sys.argv[1]
+    config_file = sys.argv[-1]
     
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
             config = json.load(f)
         
+        if reprocess:
+            # 只读取HTML存档，设置reprocess_update_db时才连接数据库
+            count = reprocess_archive(config)
+            print(f"重新提取完成，共获取 {count} 个资源")
+            return
+        
         scraper = JapaneseWebScraper(config)
         results = scraper.scrape_websites()
         
@@ -324,4 +816,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    run_profiled('web_scraper', main) 
\ No newline at end of file
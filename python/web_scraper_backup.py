@@ -13,10 +13,11 @@ import mysql.connector
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
-import uuid
 import logging
 from typing import Dict, List, Optional
 
+from media_downloader import MediaDownloader
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -53,6 +54,7 @@ class JapaneseWebScraper:
         # 存储目录
         self.storage_dir = Path('storage/app/public/scraped-content')
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.media_downloader = MediaDownloader(str(self.storage_dir), session=self.session)
         
     def connect_database(self):
         """连接数据库"""
@@ -303,29 +305,16 @@ class JapaneseWebScraper:
             return self.scrape_general_content(url)
     
     def download_media_file(self, url: str, file_type: str) -> Optional[str]:
-        """下载媒体文件"""
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # 生成文件名
-            file_extension = Path(urlparse(url).path).suffix or ('.jpg' if file_type == 'image' else '.mp3')
-            filename = f"{uuid.uuid4()}{file_extension}"
-            file_path = self.storage_dir / file_type / filename
-            
-            # 创建目录
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 保存文件
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-            
-            # 返回相对路径
-            return str(file_path.relative_to(Path('storage/app/public')))
-            
-        except Exception as e:
-            logger.error(f"下载媒体文件失败 {url}: {e}")
-            return None
+        """下载媒体文件（经download_many下载，结束后保存URL索引）"""
+        return self.media_downloader.download_many([url], file_type).get(url)
+    
+    def download_media_files(self, urls: List[str], file_type: str) -> List[Dict]:
+        """并发下载一组媒体文件"""
+        downloaded = self.media_downloader.download_many(urls, file_type)
+        return [
+            {'original_url': url, 'local_path': local_path}
+            for url, local_path in downloaded.items()
+        ]
     
     def save_resource_to_database(self, content_data: Dict):
         """保存抓取的资源到数据库"""
@@ -340,22 +329,10 @@ class JapaneseWebScraper:
             downloaded_audio = []
             
             if self.config.get('include_images', False) and content_data.get('images'):
-                for img_url in content_data['images']:
-                    local_path = self.download_media_file(img_url, 'images')
-                    if local_path:
-                        downloaded_images.append({
-                            'original_url': img_url,
-                            'local_path': local_path
-                        })
+                downloaded_images = self.download_media_files(content_data['images'], 'images')
             
             if self.config.get('include_audio', False) and content_data.get('audio'):
-                for audio_url in content_data['audio']:
-                    local_path = self.download_media_file(audio_url, 'audio')
-                    if local_path:
-                        downloaded_audio.append({
-                            'original_url': audio_url,
-                            'local_path': local_path
-                        })
+                downloaded_audio = self.download_media_files(content_data['audio'], 'audio')
             
             # 插入资源记录
             cursor.execute("""
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+内容导入流程基准测试
+用合成语料（synthetic_corpus.py）端到端运行 ContentImporter.run_full_import，
+导入接口由本地模拟的 /api/admin/content/batch/{type} 提供，
+分别统计 加载 → 转换 → 导出 → 导入 各阶段耗时、每秒处理项数和峰值内存。
+
+用法:
+    python benchmark_import.py --sizes 1000 10000 100000 --json results.json
+    python benchmark_import.py --sizes 1000 10000 --baseline results.json   # 与上次结果比较
+"""
+
+import csv
+import io
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+import functools
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List
+
+from aiohttp import web
+
+from synthetic_corpus import generate_corpus
+
+STAGES = ('load', 'transform', 'export', 'import')
+
+
+class StageTimer:
+    """累计各阶段耗时；阶段嵌套调用（如转换词汇时重新索引）只计最外层"""
+
+    def __init__(self):
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self._active = set()
+
+    def wrap(self, stage: str, method):
+        @functools.wraps(method)
+        def sync_wrapper(*args, **kwargs):
+            if stage in self._active:
+                return method(*args, **kwargs)
+            self._active.add(stage)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self._active.discard(stage)
+
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+
+        return async_wrapper if asyncio.iscoroutinefunction(method) else sync_wrapper
+
+    def wrap_batches(self, stage: str, method):
+        """异步生成器：只统计等待下一批数据的时间"""
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            iterator = method(*args, **kwargs).__aiter__()
+            while True:
+                start = time.perf_counter()
+                try:
+                    batch = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    self.seconds[stage] += time.perf_counter() - start
+                yield batch
+        return wrapper
+
+
+def instrument(importer, timer: StageTimer):
+    transformer = importer.transformer
+    transformer.iter_scraped_content = timer.wrap_batches('load', transformer.iter_scraped_content)
+    for name in ('score_documents', 'transform_to_courses', 'transform_to_materials',
+                 'index_vocabulary', 'transform_to_vocabulary'):
+        setattr(transformer, name, timer.wrap('transform', getattr(transformer, name)))
+    if importer.deduplicator:
+        importer.deduplicator.deduplicate = timer.wrap('transform', importer.deduplicator.deduplicate)
+    for name in ('export_courses', 'export_materials', 'export_vocabulary'):
+        setattr(importer.exporter, name, timer.wrap('export', getattr(importer.exporter, name)))
+    importer.importer.import_csv_files = timer.wrap('import', importer.importer.import_csv_files)
+
+
+def create_mock_api(received: Dict[str, int], latency_ms: float) -> web.Application:
+    """模拟后台批量导入接口：解析上传的CSV并返回导入行数"""
+    async def batch_import(request: web.Request) -> web.Response:
+        content_type = request.match_info['type']
+        reader = await request.multipart()
+        rows = 0
+        async for part in reader:
+            if part.name == 'file':
+                data = await part.read()
+                rows = sum(1 for _ in csv.reader(io.StringIO(data.decode('utf-8-sig')))) - 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        received[content_type] = received.get(content_type, 0) + max(rows, 0)
+        return web.json_response({'success': True, 'imported': max(rows, 0)})
+
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post('/api/admin/content/batch/{type}', batch_import)
+    return app
+
+
+def run_import(scraped_dir: str, output_dir: str, api_url: str, options: Dict, queue):
+    """在独立进程中运行一次导入，保证峰值内存互不影响"""
+    import resource
+    from content_importer import ContentImporter
+
+    logging.getLogger().setLevel(logging.WARNING)
+    importer = ContentImporter(scraped_dir, output_dir, tokenizer=options['tokenizer'])
+    importer.importer.api_base_url = api_url
+    timer = StageTimer()
+    instrument(importer, timer)
+
+    start = time.perf_counter()
+    report = asyncio.run(importer.run_full_import(options['batch_size']))
+    elapsed = time.perf_counter() - start
+    if importer.deduplicator:
+        importer.deduplicator.close()
+
+    queue.put({
+        'items': report['source_items'],
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(report['source_items'] / elapsed, 1) if elapsed else 0.0,
+        'stages': {stage: round(seconds, 3) for stage, seconds in timer.seconds.items()},
+        'transformed': report['transformed'],
+        'import_results': {key: value for key, value in report['import_results'].items() if key != 'errors'},
+        'errors': len(report['import_results'].get('errors', [])),
+        # Linux下ru_maxrss单位为KB
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    })
+
+
+def compare_with_baseline(rows: List[Dict], baseline_file: str, tolerance: float) -> List[str]:
+    """与基线结果比较，返回退化说明（吞吐下降或峰值内存上升超过容差）"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {row['items']: row for row in json.load(f)['results']}
+
+    regressions = []
+    for row in rows:
+        base = baseline.get(row['items'])
+        if not base:
+            continue
+        if row['items_per_sec'] < base['items_per_sec'] * (1 - tolerance):
+            regressions.append(f"{row['items']} 项: 吞吐 {row['items_per_sec']}/s，基线 {base['items_per_sec']}/s")
+        if row['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{row['items']} 项: 峰值内存 {row['peak_rss_mb']}MB，基线 {base['peak_rss_mb']}MB")
+    return regressions
+
+
+async def run_benchmark(args) -> List[Dict]:
+    received: Dict[str, int] = {}
+    runner = web.AppRunner(create_mock_api(received, args.api_latency_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    api_url = f"http://127.0.0.1:{port}/api"
+    print(f"模拟导入接口: {api_url}/admin/content/batch/{{type}}")
+
+    context = multiprocessing.get_context('spawn')
+    loop = asyncio.get_running_loop()
+    rows = []
+    try:
+        for size in args.sizes:
+            work_dir = Path(tempfile.mkdtemp(prefix='import_bench_'))
+            try:
+                start = time.perf_counter()
+                generate_corpus(str(work_dir / 'content'), size, seed=args.seed)
+                generate_seconds = time.perf_counter() - start
+
+                received.clear()
+                queue = context.Queue()
+                options = {'batch_size': args.batch_size, 'tokenizer': args.tokenizer}
+                process = context.Process(
+                    target=run_import,
+                    args=(str(work_dir / 'content'), str(work_dir / 'import_data'), api_url, options, queue)
+                )
+                process.start()
+                # 等待子进程期间事件循环继续处理模拟接口的请求
+                await loop.run_in_executor(None, process.join)
+                if queue.empty():
+                    print(f"{size} 项的测试进程异常退出 (exit code {process.exitcode})")
+                    continue
+                row = queue.get()
+                row['generate_seconds'] = round(generate_seconds, 3)
+                row['api_received'] = dict(received)
+                rows.append(row)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        await runner.cleanup()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='内容导入流程基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='语料规模（内容项数）')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--tokenizer', choices=['sudachi', 'mecab', 'regex'], default='regex',
+                        help='分词器（默认正则，结果不受本机安装的词典影响）')
+    parser.add_argument('--api-latency-ms', type=float, default=0, help='模拟接口的响应延迟')
+    parser.add_argument('--seed', type=int, default=90)
+    parser.add_argument('--json', default=None, help='结果另存为JSON文件')
+    parser.add_argument('--baseline', default=None, help='与之前 --json 保存的结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='判定为退化的相对变化')
+    args = parser.parse_args()
+
+    rows = asyncio.run(run_benchmark(args))
+
+    print(f"\n{'项数':>8} {'耗时(s)':>8} {'项/秒':>8} {'加载':>7} {'转换':>7} {'导出':>7} {'导入':>7} "
+          f"{'课程':>5} {'材料':>7} {'词汇':>6} {'峰值内存(MB)':>12}")
+    for row in rows:
+        stages = row['stages']
+        transformed = row['transformed']
+        print(f"{row['items']:>10} {row['seconds']:>9} {row['items_per_sec']:>10} {stages['load']:>9} "
+              f"{stages['transform']:>9} {stages['export']:>9} {stages['import']:>9} "
+              f"{transformed['courses']:>7} {transformed['materials']:>9} {transformed['vocabulary']:>8} "
+              f"{row['peak_rss_mb']:>14}")
+        if row['errors']:
+            print(f"  导入错误 {row['errors']} 个")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'results': rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(rows, args.baseline, args.tolerance)
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n与基线相比没有超出容差的退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+数据库直写工具
+绕过Laravel批量导入API，将ImportableContent按批次直接写入courses、learning_materials、vocabulary表
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 与Laravel迁移保持一致的最小表结构，仅用于SQLite替身测试
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    description TEXT NOT NULL,
+    day_number INTEGER NOT NULL,
+    source_url VARCHAR(768) UNIQUE,
+    difficulty VARCHAR(20) NOT NULL,
+    tags TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS learning_materials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    content TEXT NOT NULL,
+    media_url VARCHAR(255),
+    duration_minutes INTEGER,
+    metadata TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE (course_id, title)
+);
+CREATE TABLE IF NOT EXISTS vocabulary (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word VARCHAR(255) NOT NULL,
+    reading VARCHAR(255) NOT NULL,
+    meaning TEXT NOT NULL,
+    part_of_speech VARCHAR(255) NOT NULL,
+    example_sentence TEXT,
+    example_reading VARCHAR(255),
+    example_meaning TEXT,
+    jlpt_level VARCHAR(2) NOT NULL,
+    tags TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE (word, reading)
+);
+"""
+
+# 单条语句的绑定参数上限：旧版SQLite默认999，MySQL为65535
+MAX_BIND_PARAMS = {'sqlite': 999, 'mysql': 65535}
+# 直写的词汇还没有释义和例句，用标签标记，便于之后查找补充
+PENDING_TAG = '待补充'
+
+
+class DirectDatabaseSink:
+    """数据库直写器
+
+    使用多行 INSERT ... ON DUPLICATE KEY UPDATE（SQLite为 ON CONFLICT）按自然键upsert：
+    courses按source_url（来源文章地址），learning_materials按(course_id, title)，vocabulary按(word, reading)，
+    各自由唯一索引保证（见 2024_01_24_add_import_keys_to_content_tables 迁移），并发导入也不会产生重复行。
+    没有来源地址的课程没有自然键，总是插入新行。
+    """
+
+    def __init__(self, connection, dialect: str = 'mysql', batch_size: int = 500):
+        self.connection = connection
+        self.dialect = dialect
+        self.batch_size = batch_size
+        self.placeholder = '?' if dialect == 'sqlite' else '%s'
+        self.max_params = MAX_BIND_PARAMS.get(dialect, 999)
+
+    @classmethod
+    def from_env(cls, batch_size: int = 500) -> 'DirectDatabaseSink':
+        """使用与抓取器相同的环境变量连接MySQL"""
+        import mysql.connector
+
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            database=os.getenv('DB_DATABASE', '90nihongo'),
+            user=os.getenv('DB_USERNAME', 'root'),
+            password=os.getenv('DB_PASSWORD', ''),
+            charset='utf8mb4'
+        )
+        return cls(connection, 'mysql', batch_size)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str, batch_size: int = 500) -> 'DirectDatabaseSink':
+        """连接SQLite替身数据库（不存在的表会自动创建）"""
+        connection = sqlite3.connect(db_path, check_same_thread=False)
+        connection.executescript(SQLITE_SCHEMA)
+        return cls(connection, 'sqlite', batch_size)
+
+    def close(self):
+        """关闭数据库连接"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def load_all(self, courses: List, materials: List, vocabulary: List,
+                 course_ids: Optional[Dict[str, int]] = None) -> Dict:
+        """写入全部内容，返回与DatabaseImporter.import_csv_files相同结构的结果
+
+        分批调用时传入同一个course_ids字典，后续批次的材料可以关联到之前批次的课程。
+        """
+        results = {
+            'courses': 0,
+            'materials': 0,
+            'vocabulary': 0,
+            'errors': []
+        }
+
+        if course_ids is None:
+            course_ids = {}
+        try:
+            course_ids.update(self.load_courses(courses))
+            results['courses'] = len(courses)
+        except Exception as e:
+            self.connection.rollback()
+            results['errors'].append(f"课程导入失败: {e}")
+
+        try:
+            if materials:
+                results['materials'] = self.load_materials(materials, course_ids)
+        except Exception as e:
+            self.connection.rollback()
+            results['errors'].append(f"学习材料导入失败: {e}")
+
+        try:
+            if vocabulary:
+                results['vocabulary'] = self.load_vocabulary(vocabulary)
+        except Exception as e:
+            self.connection.rollback()
+            results['errors'].append(f"词汇导入失败: {e}")
+
+        return results
+
+    def load_courses(self, courses: List) -> Dict[str, int]:
+        """写入课程，返回 原始URL和'#天数' -> course_id 的映射（供材料关联使用）"""
+        now = self._now()
+        rows = []
+        for course in courses:
+            metadata = course.metadata or {}
+            rows.append((
+                course.title,
+                course.content[:200] + '...' if len(course.content) > 200 else course.content,
+                course.day_number or 0,
+                metadata.get('original_url') or None,
+                course.level,
+                json.dumps(['日语学习', metadata.get('category', '')], ensure_ascii=False),
+                1,
+                now,
+                now
+            ))
+
+        # 重复导入时保留课程原来的天数
+        ids = self._upsert(
+            'courses',
+            ['title', 'description', 'day_number', 'source_url', 'difficulty', 'tags', 'is_active',
+             'created_at', 'updated_at'],
+            ['source_url'],
+            ['title', 'description', 'difficulty', 'tags', 'updated_at'],
+            rows
+        )
+
+        course_ids = {}
+        for course, course_id in zip(courses, ids):
+            url = (course.metadata or {}).get('original_url')
+            if url:
+                course_ids[url] = course_id
+            course_ids[f'#{course.day_number or 0}'] = course_id
+
+        logger.info(f"课程直写完成: {len(ids)} 条")
+        return course_ids
+
+    def load_materials(self, materials: List, course_ids: Dict[str, int]) -> int:
+        """写入学习材料，按原始URL或metadata中的course_day关联本次导入的课程
+
+        本次导入中没有的课程按来源地址从courses表查询；仍无法关联的材料会使整批失败，
+        不按天数或位置猜测课程（不同批次导入的课程天数会重复）。
+        """
+        missing_urls = {
+            (material.metadata or {}).get('original_url') for material in materials
+            if (material.metadata or {}).get('original_url') not in course_ids
+            and f"#{(material.metadata or {}).get('course_day')}" not in course_ids
+        }
+        missing_urls.discard(None)
+        if missing_urls:
+            cursor = self.connection.cursor()
+            try:
+                existing = self._fetch_existing_ids(cursor, 'courses', ['source_url'],
+                                                    [(url,) for url in missing_urls])
+            finally:
+                cursor.close()
+            for (url,), course_id in existing.items():
+                course_ids[url] = course_id
+
+        now = self._now()
+        rows = []
+        unlinked = []
+        for material in materials:
+            metadata = material.metadata or {}
+            course_id = course_ids.get(metadata.get('original_url')) or \
+                course_ids.get(f"#{metadata.get('course_day')}")
+            if course_id is None:
+                unlinked.append(material.title)
+                continue
+            rows.append((
+                course_id,
+                material.title,
+                metadata.get('material_type', 'text'),
+                material.content,
+                material.audio_file or None,
+                metadata.get('duration_minutes', 5),
+                json.dumps(metadata, ensure_ascii=False),
+                now,
+                now
+            ))
+
+        if unlinked:
+            raise ValueError(f"{len(unlinked)} 个学习材料无法关联课程: {', '.join(unlinked[:5])}")
+
+        ids = self._upsert(
+            'learning_materials',
+            ['course_id', 'title', 'type', 'content', 'media_url', 'duration_minutes', 'metadata',
+             'created_at', 'updated_at'],
+            ['course_id', 'title'],
+            ['type', 'content', 'media_url', 'duration_minutes', 'metadata', 'updated_at'],
+            rows
+        )
+
+        logger.info(f"学习材料直写完成: {len(ids)} 条")
+        return len(ids)
+
+    def load_vocabulary(self, vocabulary: List) -> int:
+        """写入词汇
+
+        新词汇的释义为空字符串（meaning列不允许NULL）、例句为NULL，并带上 PENDING_TAG 标签；
+        平台上已有的词汇只更新updated_at，不覆盖已经补充的释义和例句。
+        """
+        now = self._now()
+        rows = []
+        for vocab in vocabulary:
+            metadata = vocab.metadata or {}
+            rows.append((
+                vocab.title,
+                metadata.get('reading', ''),
+                '',
+                metadata.get('part_of_speech', ''),
+                None,
+                vocab.jlpt_level or 'N5',
+                json.dumps(['基础词汇', PENDING_TAG], ensure_ascii=False),
+                now,
+                now
+            ))
+
+        ids = self._upsert(
+            'vocabulary',
+            ['word', 'reading', 'meaning', 'part_of_speech', 'example_sentence', 'jlpt_level', 'tags',
+             'created_at', 'updated_at'],
+            ['word', 'reading'],
+            ['updated_at'],
+            rows
+        )
+
+        logger.info(f"词汇直写完成: {len(ids)} 条")
+        return len(ids)
+
+    def _upsert(self, table: str, columns: List[str], key_columns: List[str], update_columns: List[str],
+                rows: List[Tuple]) -> List[int]:
+        """按自然键批量upsert，键冲突时只更新update_columns，返回与rows一一对应的主键id
+
+        键为NULL的行不会与已有行冲突，逐行插入并取lastrowid；其余行写入后再按键查询id。
+        """
+        if not rows:
+            return []
+
+        key_index = [columns.index(c) for c in key_columns]
+        if self.dialect == 'sqlite':
+            conflict = (f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+                        + ', '.join(f"{c} = excluded.{c}" for c in update_columns))
+        else:
+            conflict = " ON DUPLICATE KEY UPDATE " + ', '.join(f"{c} = VALUES({c})" for c in update_columns)
+        row_placeholder = '(' + ', '.join([self.placeholder] * len(columns)) + ')'
+        insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+
+        ids: List[Optional[int]] = [None] * len(rows)
+        # 多行INSERT的参数个数为 列数 x 行数，批次大小受绑定参数上限限制
+        batch_size = max(1, min(self.batch_size, self.max_params // len(columns)))
+        cursor = self.connection.cursor()
+        try:
+            for start in range(0, len(rows), batch_size):
+                keyed = []
+                for position in range(start, min(start + batch_size, len(rows))):
+                    if any(rows[position][i] is None for i in key_index):
+                        cursor.execute(insert_sql + row_placeholder, rows[position])
+                        ids[position] = cursor.lastrowid
+                    else:
+                        keyed.append(position)
+
+                if keyed:
+                    # 同一批次内重复的键按顺序更新，最终保留最后一次出现的值
+                    values = []
+                    for position in keyed:
+                        values.extend(rows[position])
+                    cursor.execute(insert_sql + ', '.join([row_placeholder] * len(keyed)) + conflict, values)
+
+                    existing = self._fetch_existing_ids(
+                        cursor, table, key_columns,
+                        list(dict.fromkeys(tuple(rows[p][i] for i in key_index) for p in keyed))
+                    )
+                    for position in keyed:
+                        ids[position] = existing[tuple(rows[position][i] for i in key_index)]
+
+                self.connection.commit()
+        finally:
+            cursor.close()
+
+        return ids
+
+    def _fetch_existing_ids(self, cursor, table: str, key_columns: List[str],
+                            keys: List[Tuple]) -> Dict[Tuple, int]:
+        """批量查询自然键对应的主键id，按绑定参数上限分段查询"""
+        existing = {}
+        if not keys:
+            return existing
+
+        condition = '(' + ' AND '.join(f"{c} = {self.placeholder}" for c in key_columns) + ')'
+        chunk_size = max(1, self.max_params // len(key_columns))
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            params = []
+            for key in chunk:
+                params.extend(key)
+
+            cursor.execute(
+                f"SELECT id, {', '.join(key_columns)} FROM {table} WHERE "
+                + ' OR '.join([condition] * len(chunk)),
+                params
+            )
+            for row in cursor.fetchall():
+                existing[tuple(row[1:])] = row[0]
+        return existing
+
+    def _now(self) -> str:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
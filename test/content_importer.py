@@ -10,7 +10,7 @@ import aiohttp
 import aiofiles
 import csv
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 import logging
 from dataclasses import dataclass, asdict
 import re
@@ -18,6 +18,11 @@ import uuid
 from datetime import datetime
 import argparse
 
+from difficulty_scorer import DifficultyScorer
+from summary_reader import find_summary_file, iter_summary_items
+from vocabulary_dedup import VocabularyDeduplicator
+from vocabulary_index import VocabularyIndex, get_tokenizer
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,36 +42,79 @@ class ImportableContent:
 class ContentTransformer:
     """内容转换器"""
     
-    def __init__(self, scraped_dir: str):
+    def __init__(self, scraped_dir: str, tokenizer: Optional[str] = None,
+                 vocabulary_per_document: int = 50, summary_file: Optional[str] = None):
         self.scraped_dir = Path(scraped_dir)
-        self.summary_file = self.scraped_dir / "summary.json"
+        # 指定的汇总/结果文件优先，其次使用可追加的 summary.jsonl
+        self.summary_file = (Path(summary_file) if summary_file else None) or \
+            find_summary_file(self.scraped_dir) or self.scraped_dir / "summary.json"
+        # 语料级词频索引，分词器在进程内只加载一次
+        self.vocabulary_index = VocabularyIndex(get_tokenizer(tokenizer))
+        self.vocabulary_per_document = vocabulary_per_document
+        # 难度特征按文档哈希缓存，课程和材料转换共用
+        self.difficulty_scorer = DifficultyScorer()
     
     async def load_scraped_content(self) -> List[Dict]:
         """加载爬取的内容"""
+        items = []
+        async for batch in self.iter_scraped_content():
+            items.extend(batch)
+        return items
+    
+    async def iter_scraped_content(self, batch_size: int = 500) -> AsyncIterator[List[Dict]]:
+        """按批次流式读取爬取的内容，内存占用与批次大小相关而与总量无关"""
         if not self.summary_file.exists():
             raise FileNotFoundError(f"找不到汇总文件: {self.summary_file}")
         
-        async with aiofiles.open(self.summary_file, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            summary = json.loads(content)
+        batch = []
+        async for item in iter_summary_items(self.summary_file):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+    
+    def _item_text(self, item: Dict) -> Optional[str]:
+        """内容项的正文：结果文件中内联的content，或text_file指向的文件"""
+        if item.get('content') is not None:
+            return item['content'].strip()
+        text_file = item.get('text_file')
+        if not text_file or not Path(text_file).exists():
+            return None
+        with open(text_file, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    
+    def _document_id(self, item: Dict) -> Optional[str]:
+        """词频索引中的文档标识"""
+        return item.get('text_file') or item.get('url')
+    
+    def score_documents(self, items: List[Dict]):
+        """一次性批量计算所有文章的难度特征，后续判断难度时直接命中缓存"""
+        texts = []
+        for item in items:
+            text = self._item_text(item)
+            if text:
+                texts.append(text)
         
-        return summary.get('items', [])
+        if texts:
+            self.difficulty_scorer.score_batch(texts)
     
-    def transform_to_courses(self, items: List[Dict]) -> List[ImportableContent]:
-        """将内容转换为课程格式"""
+    def transform_to_courses(self, items: List[Dict], start_day: int = 1) -> List[ImportableContent]:
+        """将内容转换为课程格式，分批转换时通过start_day延续天数"""
         courses = []
-        day_counter = 1
+        day_counter = start_day
+        if day_counter > 90:
+            return courses
         
         for item in items:
             if item['category'] in ['news', 'lesson', 'article']:
                 # 过滤太短或太长的内容
-                text_file = item.get('text_file')
-                if not text_file or not Path(text_file).exists():
+                content = self._item_text(item)
+                if content is None:
                     continue
                 
-                with open(text_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                
                 word_count = len(content.split())
                 if word_count < 50 or word_count > 500:  # 适合的长度范围
                     continue
@@ -85,7 +133,8 @@ class ContentTransformer:
                         'source': item.get('source'),
                         'original_url': item.get('url'),
                         'word_count': word_count,
-                        'category': item.get('category')
+                        'category': item.get('category'),
+                        'text_features': self.difficulty_scorer.features(content).to_dict()
                     }
                 )
                 courses.append(course)
@@ -96,17 +145,27 @@ class ContentTransformer:
         
         return courses
     
-    def transform_to_materials(self, items: List[Dict]) -> List[ImportableContent]:
-        """将内容转换为学习材料格式"""
+    def transform_to_materials(self, items: List[Dict], courses: Optional[List[ImportableContent]] = None,
+                               start_day: int = 1) -> List[ImportableContent]:
+        """将内容转换为学习材料格式
+        
+        courses为同一批内容转换出的课程，start_day为其中第一门课程的天数。每个材料在metadata中
+        记录所属课程的天数(course_day)：本身是课程的内容属于该课程，其余内容属于内容流中
+        在它之前最近的课程（之前没有课程时属于第1天），与分批大小无关。
+        """
         materials = []
+        course_days = {
+            (course.metadata or {}).get('original_url'): course.day_number for course in courses or []
+        }
+        current_day = start_day - 1
         
         for item in items:
-            text_file = item.get('text_file')
-            if not text_file or not Path(text_file).exists():
-                continue
+            if item.get('url') and item.get('url') in course_days:
+                current_day = course_days[item['url']]
             
-            with open(text_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            content = self._item_text(item)
+            if content is None:
+                continue
             
             # 根据内容长度和类型决定是否作为学习材料
             word_count = len(content.split())
@@ -126,7 +185,9 @@ class ContentTransformer:
                     'source': item.get('source'),
                     'material_type': material_type,
                     'duration_minutes': max(1, word_count // 100),  # 估算阅读时间
-                    'original_url': item.get('url')
+                    'original_url': item.get('url'),
+                    'course_day': max(current_day, 1),
+                    'text_features': self.difficulty_scorer.features(content).to_dict()
                 }
             )
             materials.append(material)
@@ -137,6 +198,10 @@ class ContentTransformer:
         """将内容转换为词汇格式"""
         vocabulary = []
         
+        # 先为所有文章建立词频索引（已索引的文章不会重复分词）
+        self.index_vocabulary(items)
+        top_words = self.vocabulary_index.top_terms(self.vocabulary_per_document)
+        
         for item in items:
             if item['category'] == 'pronunciation':
                 # 单词发音项目
@@ -153,7 +218,7 @@ class ContentTransformer:
                     audio_file=item.get('audio_file'),
                     metadata={
                         'source': item.get('source'),
-                        'reading': self._extract_reading(word),
+                        'reading': self.vocabulary_index.get_reading(word) or self._extract_reading(word),
                         'part_of_speech': self._guess_part_of_speech(word),
                         'country': item.get('country', ''),
                         'pronunciation_quality': item.get('rates', 0)
@@ -161,29 +226,40 @@ class ContentTransformer:
                 )
                 vocabulary.append(vocab)
             
-            else:
+            elif self._document_id(item) in top_words:
                 # 从文章中提取词汇
-                text_file = item.get('text_file')
-                if text_file and Path(text_file).exists():
-                    extracted_vocab = self._extract_vocabulary_from_text(text_file, item)
-                    vocabulary.extend(extracted_vocab)
+                words = top_words[self._document_id(item)]
+                vocabulary.extend(self._extract_vocabulary_from_text(words, item))
         
         return vocabulary
     
+    def index_vocabulary(self, items: List[Dict]):
+        """将文章加入语料词频索引，每篇文章只读取和分词一次"""
+        for item in items:
+            if item['category'] == 'pronunciation':
+                continue
+            document_id = self._document_id(item)
+            if not document_id or document_id in self.vocabulary_index.documents:
+                continue
+            text = self._item_text(item)
+            if text is not None:
+                # 抓取时提取的ruby读音词元（NHK Easy等带振假名的页面）
+                ruby_tokens = item.get('ruby_tokens') or (item.get('metadata') or {}).get('ruby_tokens')
+                self.vocabulary_index.add_document(document_id, text, ruby_tokens)
+    
     def _determine_level(self, content: str, source: str) -> str:
         """确定内容难度等级"""
         # 简单的难度判断逻辑
         if 'easy' in source.lower() or 'beginner' in source.lower():
             return 'beginner'
         
-        # 基于汉字密度判断
-        kanji_count = len(re.findall(r'[\u4e00-\u9faf]', content))
-        total_chars = len(content)
+        # 基于汉字密度判断（特征已批量计算并缓存）
+        features = self.difficulty_scorer.features(content)
         
-        if total_chars == 0:
+        if features.total_chars == 0:
             return 'beginner'
         
-        kanji_ratio = kanji_count / total_chars
+        kanji_ratio = features.kanji_ratio
         
         if kanji_ratio < 0.1:
             return 'beginner'
@@ -236,35 +312,25 @@ class ContentTransformer:
         else:
             return '名词'
     
-    def _extract_vocabulary_from_text(self, text_file: str, item: Dict) -> List[ImportableContent]:
-        """从文本中提取词汇"""
+    def _extract_vocabulary_from_text(self, words: List[str], item: Dict) -> List[ImportableContent]:
+        """将文章的Top-K词汇转换为词汇条目"""
         vocabulary = []
         
-        with open(text_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 提取日语词汇（简化版）
-        # 这里可以使用更复杂的形态学分析
-        words = re.findall(r'[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+', content)
-        
-        unique_words = list(set(words))[:50]  # 限制数量
-        
-        for word in unique_words:
-            if len(word) >= 2 and len(word) <= 10:  # 合理的词长
-                vocab = ImportableContent(
-                    title=word,
-                    content=word,
-                    content_type='vocabulary',
-                    level='vocabulary',
-                    jlpt_level=self._guess_jlpt_level(word),
-                    metadata={
-                        'source': item.get('source'),
-                        'extracted_from': item.get('title'),
-                        'reading': self._extract_reading(word),
-                        'part_of_speech': self._guess_part_of_speech(word)
-                    }
-                )
-                vocabulary.append(vocab)
+        for word in words:
+            vocab = ImportableContent(
+                title=word,
+                content=word,
+                content_type='vocabulary',
+                level='vocabulary',
+                jlpt_level=self._guess_jlpt_level(word),
+                metadata={
+                    'source': item.get('source'),
+                    'extracted_from': item.get('title'),
+                    'reading': self.vocabulary_index.get_reading(word) or self._extract_reading(word),
+                    'part_of_speech': self._guess_part_of_speech(word)
+                }
+            )
+            vocabulary.append(vocab)
         
         return vocabulary
 
@@ -274,9 +340,11 @@ class CSVExporter:
     def __init__(self, output_dir: str = "import_data"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        # 分批追加导出时延续材料的课程编号
+        self.materials_written = 0
     
-    async def export_courses(self, courses: List[ImportableContent]) -> str:
-        """导出课程到CSV"""
+    async def export_courses(self, courses: List[ImportableContent], append: bool = False) -> str:
+        """导出课程到CSV，append为True时追加到已有文件"""
         csv_file = self.output_dir / "courses.csv"
         
         fieldnames = [
@@ -284,9 +352,10 @@ class CSVExporter:
             'tags', 'is_active', 'content', 'audio_file', 'source'
         ]
         
-        async with aiofiles.open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        async with aiofiles.open(csv_file, 'a' if append else 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
-            await f.write(','.join(fieldnames) + '\n')
+            if not append:
+                await f.write(','.join(fieldnames) + '\n')
             
             for course in courses:
                 row = {
@@ -308,8 +377,8 @@ class CSVExporter:
         logger.info(f"课程CSV导出完成: {csv_file}")
         return str(csv_file)
     
-    async def export_materials(self, materials: List[ImportableContent]) -> str:
-        """导出学习材料到CSV"""
+    async def export_materials(self, materials: List[ImportableContent], append: bool = False) -> str:
+        """导出学习材料到CSV，append为True时追加到已有文件"""
         csv_file = self.output_dir / "materials.csv"
         
         fieldnames = [
@@ -317,11 +386,15 @@ class CSVExporter:
             'duration_minutes', 'metadata', 'audio_file'
         ]
         
-        async with aiofiles.open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        async with aiofiles.open(csv_file, 'a' if append else 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
-            await f.write(','.join(fieldnames) + '\n')
+            if not append:
+                await f.write(','.join(fieldnames) + '\n')
+            
+            if not append:
+                self.materials_written = 0
             
-            for i, material in enumerate(materials, 1):
+            for i, material in enumerate(materials, self.materials_written + 1):
                 row = {
                     'course_id': i,  # 简化关联
                     'title': material.title,
@@ -335,12 +408,14 @@ class CSVExporter:
                 
                 line = ','.join([f'"{str(v).replace('"', '""')}"' for v in row.values()])
                 await f.write(line + '\n')
+            
+            self.materials_written += len(materials)
         
         logger.info(f"学习材料CSV导出完成: {csv_file}")
         return str(csv_file)
     
-    async def export_vocabulary(self, vocabulary: List[ImportableContent]) -> str:
-        """导出词汇到CSV"""
+    async def export_vocabulary(self, vocabulary: List[ImportableContent], append: bool = False) -> str:
+        """导出词汇到CSV，append为True时追加到已有文件"""
         csv_file = self.output_dir / "vocabulary.csv"
         
         fieldnames = [
@@ -348,9 +423,10 @@ class CSVExporter:
             'example_sentence', 'jlpt_level', 'tags', 'audio_file'
         ]
         
-        async with aiofiles.open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        async with aiofiles.open(csv_file, 'a' if append else 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
-            await f.write(','.join(fieldnames) + '\n')
+            if not append:
+                await f.write(','.join(fieldnames) + '\n')
             
             for vocab in vocabulary:
                 metadata = vocab.metadata or {}
@@ -376,6 +452,23 @@ class DatabaseImporter:
     
     def __init__(self, api_base_url: str = "http://localhost:8000/api"):
         self.api_base_url = api_base_url
+        # 上次导入中API报告失败的行号(从1开始，与CSV数据行顺序一致)，按内容类型记录
+        self.failed_rows: Dict[str, Set[int]] = {}
+    
+    async def fetch_vocabulary_keys(self) -> List[Tuple[str, str]]:
+        """通过API读取平台上已有词汇的 (word, reading) 键，API不可用时返回空列表"""
+        url = f"{self.api_base_url}/admin/content/vocabulary"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        raise Exception(f"API错误 ({response.status}): {await response.text()}")
+                    result = await response.json()
+        except Exception as e:
+            logger.warning(f"读取平台词汇失败，只按本地索引去重: {e}")
+            return []
+        
+        return [(vocab['word'], vocab.get('reading') or '') for vocab in result.get('data', [])]
     
     async def import_csv_files(self, csv_dir: str) -> Dict:
         """导入CSV文件到数据库"""
@@ -395,7 +488,8 @@ class DatabaseImporter:
                     result = await self._import_csv_to_api(
                         session, courses_csv, 'course'
                     )
-                    results['courses'] = result.get('imported', 0)
+                    results['courses'] = self._imported_count(result)
+                    self.failed_rows['course'] = self._failed_rows(result)
                 except Exception as e:
                     results['errors'].append(f"课程导入失败: {e}")
             
@@ -406,7 +500,8 @@ class DatabaseImporter:
                     result = await self._import_csv_to_api(
                         session, materials_csv, 'material'
                     )
-                    results['materials'] = result.get('imported', 0)
+                    results['materials'] = self._imported_count(result)
+                    self.failed_rows['material'] = self._failed_rows(result)
                 except Exception as e:
                     results['errors'].append(f"学习材料导入失败: {e}")
             
@@ -417,12 +512,28 @@ class DatabaseImporter:
                     result = await self._import_csv_to_api(
                         session, vocabulary_csv, 'vocabulary'
                     )
-                    results['vocabulary'] = result.get('imported', 0)
+                    results['vocabulary'] = self._imported_count(result)
+                    self.failed_rows['vocabulary'] = self._failed_rows(result)
                 except Exception as e:
                     results['errors'].append(f"词汇导入失败: {e}")
         
         return results
     
+    def _imported_count(self, result: Dict) -> int:
+        """API返回的成功行数"""
+        if 'imported' in result:
+            return result['imported']
+        return (result.get('data') or {}).get('success_count', 0)
+    
+    def _failed_rows(self, result: Dict) -> Set[int]:
+        """从API的错误信息(第N行: ...)中取出失败的行号"""
+        rows = set()
+        for error in (result.get('data') or {}).get('errors', []):
+            match = re.match(r'第(\d+)行', str(error))
+            if match:
+                rows.add(int(match.group(1)))
+        return rows
+    
     async def _import_csv_to_api(self, session: aiohttp.ClientSession, 
                                 csv_file: Path, content_type: str) -> Dict:
         """通过API导入CSV文件"""
@@ -449,51 +560,107 @@ class DatabaseImporter:
 class ContentImporter:
     """主导入工具"""
     
-    def __init__(self, scraped_dir: str, output_dir: str = "import_data"):
-        self.transformer = ContentTransformer(scraped_dir)
+    def __init__(self, scraped_dir: str, output_dir: str = "import_data", sink=None,
+                 tokenizer: Optional[str] = None, vocabulary_index: Optional[str] = "",
+                 summary_file: Optional[str] = None):
+        self.transformer = ContentTransformer(scraped_dir, tokenizer, summary_file=summary_file)
         self.exporter = CSVExporter(output_dir)
         self.importer = DatabaseImporter()
+        # 可选的数据库直写器(DirectDatabaseSink)，设置后跳过CSV导出和API导入
+        self.sink = sink
+        # 词汇去重索引，默认保存在导出目录中；传入None关闭去重
+        self.deduplicator = None
+        if vocabulary_index is not None:
+            self.deduplicator = VocabularyDeduplicator(
+                vocabulary_index or str(self.exporter.output_dir / "vocabulary_keys.sqlite")
+            )
     
-    async def run_full_import(self) -> Dict:
-        """执行完整的导入流程"""
+    async def run_full_import(self, batch_size: int = 500) -> Dict:
+        """执行完整的导入流程
+        
+        课程和材料按批次流式加载、转换并导出，内存中只保留当前批次；
+        词汇依赖全语料的词频，在所有批次索引完成后统一提取，因此词频索引(每篇文章的词频)
+        和词汇引用会随语料规模增长，不受batch_size限制。
+        """
         logger.info("开始内容导入流程...")
         
-        # 1. 加载爬取的内容
-        logger.info("加载爬取的内容...")
-        items = await self.transformer.load_scraped_content()
-        logger.info(f"加载了 {len(items)} 项内容")
+        # 1-3. 流式加载、转换并导出课程和材料
+        logger.info(f"流式加载爬取的内容: {self.transformer.summary_file}")
+        source_items = 0
+        course_count = 0
+        material_count = 0
+        vocabulary_items = []
+        course_ids = {}
+        csv_files = {}
+        import_results = {'courses': 0, 'materials': 0, 'vocabulary': 0, 'errors': []}
+        
+        async for items in self.transformer.iter_scraped_content(batch_size):
+            source_items += len(items)
+            self.transformer.score_documents(items)
+            courses = self.transformer.transform_to_courses(items, start_day=course_count + 1)
+            materials = self.transformer.transform_to_materials(items, courses, start_day=course_count + 1)
+            self.transformer.index_vocabulary(items)
+            vocabulary_items.extend(self._vocabulary_refs(items))
+            course_count += len(courses)
+            material_count += len(materials)
+            
+            if self.sink:
+                batch_results = await asyncio.to_thread(
+                    self.sink.load_all, courses, materials, [], course_ids
+                )
+                self._merge_results(import_results, batch_results)
+            else:
+                if courses:
+                    csv_files['courses'] = await self.exporter.export_courses(
+                        courses, append='courses' in csv_files)
+                if materials:
+                    csv_files['materials'] = await self.exporter.export_materials(
+                        materials, append='materials' in csv_files)
+        
+        logger.info(f"加载了 {source_items} 项内容")
+        
+        # 4. 基于全语料词频提取词汇
+        vocabulary = self.transformer.transform_to_vocabulary(vocabulary_items)
+        extracted_vocabulary = len(vocabulary)
+        if self.deduplicator:
+            # 平台上已有的词汇（包括其他途径导入的）同样跳过
+            if self.sink:
+                self.deduplicator.seed_from_platform(self.sink.connection)
+            else:
+                self.deduplicator.seed_keys(await self.importer.fetch_vocabulary_keys())
+            vocabulary = self.deduplicator.deduplicate(vocabulary)
+        
+        logger.info(f"转换完成: {course_count} 课程, {material_count} 材料, {len(vocabulary)} 词汇")
         
-        # 2. 转换内容
-        logger.info("转换内容格式...")
-        courses = self.transformer.transform_to_courses(items)
-        materials = self.transformer.transform_to_materials(items)
-        vocabulary = self.transformer.transform_to_vocabulary(items)
+        if self.sink:
+            # 直接批量写入数据库
+            logger.info("直接写入数据库...")
+            batch_results = await asyncio.to_thread(self.sink.load_all, [], [], vocabulary)
+            self._merge_results(import_results, batch_results)
+        else:
+            if vocabulary:
+                csv_files['vocabulary'] = await self.exporter.export_vocabulary(vocabulary)
+            
+            # 5. 导入数据库
+            logger.info("导入到数据库...")
+            import_results = await self.importer.import_csv_files(self.exporter.output_dir)
         
-        logger.info(f"转换完成: {len(courses)} 课程, {len(materials)} 材料, {len(vocabulary)} 词汇")
+        # 只记录确认写入的词汇，之后的运行不再重复导入；失败的词汇下次运行重试
+        if self.deduplicator:
+            confirmed = self._confirmed_vocabulary(vocabulary, import_results)
+            if confirmed:
+                self.deduplicator.mark_imported(confirmed)
         
-        # 3. 导出CSV
-        logger.info("导出CSV文件...")
-        csv_files = {}
-        if courses:
-            csv_files['courses'] = await self.exporter.export_courses(courses)
-        if materials:
-            csv_files['materials'] = await self.exporter.export_materials(materials)
-        if vocabulary:
-            csv_files['vocabulary'] = await self.exporter.export_vocabulary(vocabulary)
-        
-        # 4. 导入数据库
-        logger.info("导入到数据库...")
-        import_results = await self.importer.import_csv_files(self.exporter.output_dir)
-        
-        # 5. 生成报告
+        # 6. 生成报告
         report = {
             'timestamp': datetime.now().isoformat(),
-            'source_items': len(items),
+            'source_items': source_items,
             'transformed': {
-                'courses': len(courses),
-                'materials': len(materials),
+                'courses': course_count,
+                'materials': material_count,
                 'vocabulary': len(vocabulary)
             },
+            'vocabulary_extracted': extracted_vocabulary,
             'csv_files': csv_files,
             'import_results': import_results
         }
@@ -505,23 +672,85 @@ class ContentImporter:
         
         logger.info(f"导入完成! 报告保存到: {report_file}")
         return report
+    
+    def _confirmed_vocabulary(self, vocabulary: List[ImportableContent], import_results: Dict) -> List[ImportableContent]:
+        """导入结果确认已写入的词汇
+        
+        直写时词汇写入出错则整体记为失败；通过API导入时排除API报告失败的行。
+        """
+        if not vocabulary or not import_results.get('vocabulary'):
+            return []
+        if self.sink:
+            return vocabulary
+        failed = self.importer.failed_rows.get('vocabulary', set())
+        return [vocab for row, vocab in enumerate(vocabulary, 1) if row not in failed]
+    
+    def _vocabulary_refs(self, items: List[Dict]) -> List[Dict]:
+        """保留词汇提取所需的字段，避免在流式处理中持有完整的内容项"""
+        refs = []
+        for item in items:
+            if item['category'] == 'pronunciation':
+                refs.append(item)
+            elif item.get('text_file') or item.get('url'):
+                # 内联正文的内容项已在流式处理中索引，这里只保留文档标识
+                refs.append({
+                    'category': item['category'],
+                    'title': item.get('title'),
+                    'source': item.get('source'),
+                    'text_file': item.get('text_file'),
+                    'url': item.get('url')
+                })
+        return refs
+    
+    def _merge_results(self, total: Dict, batch: Dict):
+        """合并分批导入的结果"""
+        for key in ('courses', 'materials', 'vocabulary'):
+            total[key] += batch.get(key, 0)
+        total['errors'].extend(batch.get('errors', []))
 
 async def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='日语学习内容导入工具')
     parser.add_argument('--scraped-dir', default='japanese_content', 
                        help='爬取内容目录')
+    parser.add_argument('--summary-file', default=None,
+                       help='直接读取的汇总/结果文件(.json/.jsonl/.jsonl.zst/.parquet)，默认在爬取目录中查找')
     parser.add_argument('--output-dir', default='import_data', 
                        help='导出目录')
     parser.add_argument('--api-url', default='http://localhost:8000/api',
                        help='API基础URL')
+    parser.add_argument('--direct-db', action='store_true',
+                       help='绕过API，直接批量写入MySQL(读取DB_HOST等环境变量)')
+    parser.add_argument('--sqlite', default=None,
+                       help='直接写入指定的SQLite文件(用于本地测试)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                       help='每批处理的内容项数/直写模式下每批写入的行数。课程和材料逐批处理；'
+                            '词汇依赖全语料词频，词频索引和词汇引用在全部批次完成前一直保留在内存中')
+    parser.add_argument('--tokenizer', choices=['sudachi', 'mecab', 'regex'], default=None,
+                       help='词汇提取使用的分词器(默认自动选择)')
+    parser.add_argument('--vocabulary-index', default='',
+                       help='词汇去重索引文件(默认: <output-dir>/vocabulary_keys.sqlite)')
+    parser.add_argument('--no-vocabulary-dedup', action='store_true',
+                       help='关闭词汇去重')
     
     args = parser.parse_args()
     
-    importer = ContentImporter(args.scraped_dir, args.output_dir)
+    sink = None
+    if args.sqlite or args.direct_db:
+        from bulk_loader import DirectDatabaseSink
+        if args.sqlite:
+            sink = DirectDatabaseSink.from_sqlite(args.sqlite, args.batch_size)
+        else:
+            sink = DirectDatabaseSink.from_env(args.batch_size)
+    
+    importer = ContentImporter(
+        args.scraped_dir, args.output_dir, sink=sink, tokenizer=args.tokenizer,
+        vocabulary_index=None if args.no_vocabulary_dedup else args.vocabulary_index,
+        summary_file=args.summary_file
+    )
     
     try:
-        report = await importer.run_full_import()
+        report = await importer.run_full_import(args.batch_size)
         
         print(f"\n=== 导入完成 ===")
         print(f"源内容项: {report['source_items']}")
@@ -533,9 +762,17 @@ async def main():
     except Exception as e:
         logger.error(f"导入失败: {e}")
         return 1
+    finally:
+        if sink:
+            sink.close()
+        if importer.deduplicator:
+            importer.deduplicator.close()
     
     return 0
 
 if __name__ == "__main__":
     import sys
-    sys.exit(asyncio.run(main())) 
\ No newline at end of file
+    # 性能分析钩子与抓取脚本共用，位于 python/ 目录
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'python'))
+    from job_profiler import run_profiled
+    sys.exit(run_profiled('content_importer', lambda: asyncio.run(main()))) 
\ No newline at end of file
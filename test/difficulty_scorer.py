@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+文本难度特征计算工具
+一次NumPy遍历批量统计所有文档的字符类别分布，并按文档哈希缓存结果
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 小学1-2年级汉字（教育汉字），用于估算汉字的基础程度
+GRADE_1_KANJI = (
+    '一右雨円王音下火花貝学気九休玉金空月犬見五口校左三山子四糸字耳七車手十出女小上森人水'
+    '正生青夕石赤千川先早草足村大男竹中虫町天田土二日入年白八百文木本名目立力林六'
+)
+GRADE_2_KANJI = (
+    '引羽雲園遠何科夏家歌画回会海絵外角楽活間丸岩顔汽記帰弓牛魚京強教近兄形計元言原戸古午後'
+    '語工公広交光考行高黄合谷国黒今才細作算止市矢姉思紙寺自時室社弱首秋週春書少場色食心新親'
+    '図数西声星晴切雪船線前組走多太体台地池知茶昼長鳥朝直通弟店点電刀冬当東答頭同道読内南肉'
+    '馬売買麦半番父風分聞米歩母方北毎妹万明鳴毛門夜野友用曜来里理話'
+)
+BASIC_KANJI_CODES = np.array(sorted(ord(c) for c in GRADE_1_KANJI + GRADE_2_KANJI), dtype=np.uint32)
+
+# 句子结束符
+SENTENCE_END_CODES = np.array(sorted(ord(c) for c in '。．！？!?\n'), dtype=np.uint32)
+
+# 字符类别编号
+OTHER, KANJI, HIRAGANA, KATAKANA, LATIN = range(5)
+CLASS_COUNT = 5
+
+
+@dataclass
+class TextFeatures:
+    """文本难度特征"""
+    total_chars: int
+    kanji: int
+    hiragana: int
+    katakana: int
+    latin: int
+    sentence_count: int
+    basic_kanji: int
+
+    @property
+    def kanji_ratio(self) -> float:
+        """汉字占全部字符的比例"""
+        return self.kanji / self.total_chars if self.total_chars else 0.0
+
+    @property
+    def avg_sentence_length(self) -> float:
+        """平均句长（字符数）"""
+        return self.total_chars / max(1, self.sentence_count)
+
+    @property
+    def basic_kanji_ratio(self) -> float:
+        """小学1-2年级汉字在全部汉字中的比例"""
+        return self.basic_kanji / self.kanji if self.kanji else 1.0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.update({
+            'kanji_ratio': round(self.kanji_ratio, 4),
+            'avg_sentence_length': round(self.avg_sentence_length, 2),
+            'basic_kanji_ratio': round(self.basic_kanji_ratio, 4)
+        })
+        return data
+
+
+class DifficultyScorer:
+    """批量难度特征计算器"""
+
+    def __init__(self):
+        self._cache: Dict[str, TextFeatures] = {}
+
+    @staticmethod
+    def document_hash(text: str) -> str:
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def features(self, text: str) -> TextFeatures:
+        """获取单篇文档的特征（命中缓存时不再扫描文本）"""
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts: List[str]) -> List[TextFeatures]:
+        """批量计算特征，只扫描缓存中没有的文档"""
+        hashes = [self.document_hash(text) for text in texts]
+
+        pending = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in self._cache and digest not in pending:
+                pending[digest] = text
+
+        if pending:
+            for digest, features in zip(pending, self._compute(list(pending.values()))):
+                self._cache[digest] = features
+            logger.debug(f"计算了 {len(pending)} 篇文档的难度特征")
+
+        return [self._cache[digest] for digest in hashes]
+
+    def _compute(self, texts: List[str]) -> List[TextFeatures]:
+        """对所有文档的码点数组做一次向量化统计"""
+        doc_count = len(texts)
+        encoded = ''.join(texts).encode('utf-32-le', 'surrogatepass')
+        codes = np.frombuffer(encoded, dtype=np.uint32)
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=doc_count)
+        doc_index = np.repeat(np.arange(doc_count), lengths)
+
+        classes = np.full(codes.shape, OTHER, dtype=np.int64)
+        classes[(codes >= 0x4E00) & (codes <= 0x9FAF)] = KANJI
+        classes[(codes >= 0x3040) & (codes <= 0x309F)] = HIRAGANA
+        classes[(codes >= 0x30A0) & (codes <= 0x30FF)] = KATAKANA
+        classes[((codes >= 0x41) & (codes <= 0x5A)) | ((codes >= 0x61) & (codes <= 0x7A))
+                | ((codes >= 0xFF21) & (codes <= 0xFF3A)) | ((codes >= 0xFF41) & (codes <= 0xFF5A))] = LATIN
+
+        histogram = np.bincount(
+            doc_index * CLASS_COUNT + classes, minlength=doc_count * CLASS_COUNT
+        ).reshape(doc_count, CLASS_COUNT)
+        sentence_ends = np.bincount(
+            doc_index[np.isin(codes, SENTENCE_END_CODES)], minlength=doc_count
+        )
+        basic_kanji = np.bincount(
+            doc_index[np.isin(codes, BASIC_KANJI_CODES)], minlength=doc_count
+        )
+
+        # 没有结束符但有内容的文档也算作一个句子
+        sentence_counts = np.maximum(sentence_ends, (lengths > 0).astype(np.int64))
+
+        return [
+            TextFeatures(
+                total_chars=int(lengths[i]),
+                kanji=int(histogram[i, KANJI]),
+                hiragana=int(histogram[i, HIRAGANA]),
+                katakana=int(histogram[i, KATAKANA]),
+                latin=int(histogram[i, LATIN]),
+                sentence_count=int(sentence_counts[i]),
+                basic_kanji=int(basic_kanji[i])
+            )
+            for i in range(doc_count)
+        ]
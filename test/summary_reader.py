@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+爬取汇总文件流式读写工具
+支持增量解析 summary.json 的 items 数组，以及逐行追加/读取的 summary.jsonl 格式；
+也可以读取抓取器追加写入的结果文件（.jsonl.zst 需要zstandard，.parquet 需要pyarrow）
+"""
+
+import io
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import aiofiles
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖
+    zstandard = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow为可选依赖
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+async def iter_summary_items(summary_file: Path) -> AsyncIterator[Dict]:
+    """逐项产出汇总文件中的内容，.jsonl按行解析，.json增量解析items数组"""
+    summary_file = Path(summary_file)
+    if summary_file.suffix == '.jsonl':
+        async for item in _iter_jsonl(summary_file):
+            yield normalize_result_item(item)
+    elif summary_file.suffix in ('.zst', '.parquet'):
+        async for item in _iter_in_thread(_iter_binary_results(summary_file)):
+            yield normalize_result_item(item)
+    else:
+        async for item in _iter_json_items(summary_file):
+            yield item
+
+
+def normalize_result_item(item: Dict) -> Dict:
+    """把抓取器结果行（name/source_url/content）转换为汇总条目格式，正文直接内联"""
+    if 'source_url' not in item or 'content' not in item:
+        return item
+    metadata = item.get('metadata') or {}
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except json.JSONDecodeError:
+            metadata = {}
+    return {
+        'title': item.get('name', ''),
+        'url': item['source_url'],
+        'content': item['content'],
+        'category': item.get('category', 'news'),
+        'source': metadata.get('source', item.get('source', '')),
+        'metadata': metadata
+    }
+
+
+def _iter_binary_results(summary_file: Path, batch_size: int = 100) -> Iterator[List[Dict]]:
+    """按批次读取压缩JSONL或Parquet结果文件"""
+    if summary_file.suffix == '.parquet':
+        if pq is None:
+            raise ImportError("读取Parquet结果需要安装pyarrow")
+        for batch in pq.ParquetFile(summary_file).iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+        return
+
+    if zstandard is None:
+        raise ImportError("读取zstd结果需要安装zstandard")
+    with open(summary_file, 'rb') as raw:
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        batch = []
+        for line in io.TextIOWrapper(reader, encoding='utf-8'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.warning(f"跳过无法解析的行 {summary_file}: {e}")
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def _iter_in_thread(batches: Iterator[List[Dict]]) -> AsyncIterator[Dict]:
+    """在线程中读取同步的批次迭代器，避免阻塞事件循环"""
+    done = object()
+    while True:
+        batch = await asyncio.to_thread(next, batches, done)
+        if batch is done:
+            return
+        for item in batch:
+            yield item
+
+
+async def _iter_jsonl(summary_file: Path) -> AsyncIterator[Dict]:
+    """逐行读取JSONL，忽略空行和写入中断导致的残缺行"""
+    async with aiofiles.open(summary_file, 'r', encoding='utf-8') as f:
+        line_number = 0
+        async for line in f:
+            line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"跳过无法解析的行 {summary_file}:{line_number}: {e}")
+
+
+async def _iter_json_items(summary_file: Path) -> AsyncIterator[Dict]:
+    """在不载入整个文件的情况下逐个解析 {"items": [...]} 中的元素"""
+    async with aiofiles.open(summary_file, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        eof = False
+
+        async def fill() -> bool:
+            nonlocal buffer, position, eof
+            chunk = await f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        # 1. 定位 "items" 数组的起始位置
+        while True:
+            index = buffer.find('"items"', position)
+            if index >= 0:
+                bracket = buffer.find('[', index)
+                if bracket >= 0:
+                    position = bracket + 1
+                    break
+                position = index
+            else:
+                # 保留末尾几个字符，防止键名被切断在两个分块之间
+                position = max(position, len(buffer) - 8)
+            if not await fill():
+                return
+
+        # 2. 逐个解码数组元素
+        while True:
+            # 跳过空白和分隔符
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer) or not await fill():
+                    break
+
+            if position >= len(buffer) or buffer[position] == ']':
+                return
+
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # 元素被分块截断，读取更多内容后重试
+                if eof or not await fill():
+                    raise
+                continue
+
+            # 元素恰好在分块末尾结束时，数字等值可能尚未读完
+            if end == len(buffer) and not eof and await fill():
+                continue
+
+            position = end
+            yield item
+
+
+class SummaryJsonlWriter:
+    """追加写入 summary.jsonl，每抓取一项写一行"""
+
+    def __init__(self, summary_file: Path):
+        self.summary_file = Path(summary_file)
+        self._file = None
+
+    async def __aenter__(self) -> 'SummaryJsonlWriter':
+        self.summary_file.parent.mkdir(parents=True, exist_ok=True)
+        self._file = await aiofiles.open(self.summary_file, 'a', encoding='utf-8')
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def append(self, item: Dict):
+        await self._file.write(json.dumps(item, ensure_ascii=False) + '\n')
+        await self._file.flush()
+
+    async def close(self):
+        if self._file:
+            await self._file.close()
+            self._file = None
+
+
+def find_summary_file(scraped_dir: Path) -> Optional[Path]:
+    """优先使用 summary.jsonl，其次 summary.json"""
+    for name in ('summary.jsonl', 'summary.json'):
+        candidate = Path(scraped_dir) / name
+        if candidate.exists():
+            return candidate
+    return None
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+合成日语内容语料生成器
+生成任意数量的文章（新闻/课文/读物）和单词发音项，写成导入器可直接读取的 summary.jsonl，
+音频使用少量共享的静音WAV占位文件。同一个seed总是生成相同的语料，用于导入流程的基准测试。
+
+用法:
+    python synthetic_corpus.py --items 10000 --output-dir synthetic_content
+"""
+
+import json
+import wave
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# (表记, 读音)
+NOUNS: List[Tuple[str, str]] = [
+    ('地震', 'じしん'), ('台風', 'たいふう'), ('電車', 'でんしゃ'), ('学校', 'がっこう'),
+    ('天気', 'てんき'), ('野菜', 'やさい'), ('病院', 'びょういん'), ('子ども', 'こども'),
+    ('図書館', 'としょかん'), ('会社', 'かいしゃ'), ('大雨', 'おおあめ'), ('祭り', 'まつり'),
+    ('政府', 'せいふ'), ('選手', 'せんしゅ'), ('試合', 'しあい'), ('値段', 'ねだん'),
+    ('東京', 'とうきょう'), ('大阪', 'おおさか'), ('研究', 'けんきゅう'), ('工場', 'こうじょう'),
+    ('公園', 'こうえん'), ('料理', 'りょうり'), ('旅行', 'りょこう'), ('空港', 'くうこう'),
+    ('警察', 'けいさつ'), ('市役所', 'しやくしょ'), ('大学', 'だいがく'), ('先生', 'せんせい'),
+    ('外国人', 'がいこくじん'), ('観光客', 'かんこうきゃく'), ('お米', 'おこめ'), ('魚', 'さかな'),
+    ('電気', 'でんき'), ('水', 'みず'), ('町', 'まち'), ('家族', 'かぞく'),
+    ('新幹線', 'しんかんせん'), ('技術', 'ぎじゅつ'), ('環境', 'かんきょう'), ('経済', 'けいざい')
+]
+PARTICLES = ['が', 'を', 'で', 'に', 'と', 'の', 'は', 'から', 'まで']
+ADJECTIVES = ['新しい', '大きな', '多くの', '古い', '安全な', '便利な', '有名な', '小さな']
+ENDINGS = ['ありました。', '話しました。', '始まりました。', '増えています。', '考えています。',
+           '発表しました。', '調べています。', '続いています。', '決めました。', '困っています。']
+CATEGORIES = [('news', 0.7), ('article', 0.15), ('lesson', 0.15)]
+SOURCES = ['NHK Easy', 'NHK News', 'Web Japanese', 'Synthetic']
+
+AUDIO_PLACEHOLDERS = 16
+
+
+def write_audio_placeholders(audio_dir: Path, count: int = AUDIO_PLACEHOLDERS) -> List[str]:
+    """写出少量0.1秒的静音WAV，所有内容项轮流引用"""
+    audio_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = audio_dir / f"placeholder_{i:02d}.wav"
+        if not path.exists():
+            with wave.open(str(path), 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(16000)
+                f.writeframes(b'\x00\x00' * 1600)
+        paths.append(str(path))
+    return paths
+
+
+def make_sentence(rng: random.Random, ruby_tokens: List[List[str]]) -> str:
+    """一句话，文节之间用空格分开（分かち書き），导入器按空格计算词数"""
+    phrases = []
+    for _ in range(rng.randint(3, 6)):
+        word, reading = rng.choice(NOUNS)
+        ruby_tokens.append([word, reading])
+        prefix = rng.choice(ADJECTIVES) if rng.random() < 0.2 else ''
+        phrases.append(f"{prefix}{word}{rng.choice(PARTICLES)}")
+    phrases.append(rng.choice(ENDINGS))
+    return ' '.join(phrases)
+
+
+def make_article(rng: random.Random, index: int, audio_files: List[str]) -> Dict:
+    category = rng.choices([c for c, _ in CATEGORIES], [w for _, w in CATEGORIES])[0]
+    ruby_tokens: List[List[str]] = []
+    paragraphs = []
+    for _ in range(rng.randint(2, 5)):
+        paragraphs.append(' '.join(make_sentence(rng, ruby_tokens) for _ in range(rng.randint(2, 5))))
+    title_word, _ = rng.choice(NOUNS)
+    source = rng.choice(SOURCES)
+    item = {
+        'title': f"{title_word}のニュース {index}",
+        'url': f"https://example.com/{category}/{index:07d}.html",
+        'category': category,
+        'source': source,
+        'content': '\n'.join(paragraphs),
+        'audio_file': audio_files[index % len(audio_files)] if rng.random() < 0.5 else None
+    }
+    if source == 'NHK Easy':
+        # 与NHK Easy适配器抓取时保存的读音词元格式一致
+        item['ruby_tokens'] = ruby_tokens
+    return item
+
+
+def make_pronunciation(rng: random.Random, index: int, audio_files: List[str]) -> Dict:
+    word, _ = rng.choice(NOUNS)
+    return {
+        'title': word,
+        'category': 'pronunciation',
+        'source': 'Forvo',
+        'country': 'Japan',
+        'rates': rng.randint(0, 5),
+        'audio_file': audio_files[index % len(audio_files)]
+    }
+
+
+def generate_corpus(output_dir: str, items: int, pronunciation_ratio: float = 0.15, seed: int = 90) -> Path:
+    """生成 items 项内容，返回 summary.jsonl 的路径"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    audio_files = write_audio_placeholders(output_dir / 'audio')
+    rng = random.Random(seed)
+
+    summary_file = output_dir / 'summary.jsonl'
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        for index in range(items):
+            if rng.random() < pronunciation_ratio:
+                item = make_pronunciation(rng, index, audio_files)
+            else:
+                item = make_article(rng, index, audio_files)
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return summary_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成日语内容语料生成器')
+    parser.add_argument('--items', type=int, default=1000, help='内容项总数')
+    parser.add_argument('--output-dir', default='synthetic_content', help='输出目录')
+    parser.add_argument('--pronunciation-ratio', type=float, default=0.15, help='单词发音项的比例')
+    parser.add_argument('--seed', type=int, default=90)
+    args = parser.parse_args()
+
+    summary_file = generate_corpus(args.output_dir, args.items, args.pronunciation_ratio, args.seed)
+    print(f"已生成 {args.items} 项内容: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据库直写器（SQLite替身）
+"""
+
+import json
+
+import pytest
+
+from bulk_loader import PENDING_TAG, DirectDatabaseSink
+from content_importer import ContentTransformer, ImportableContent
+
+
+def make_items(count: int, site: str = 'example.com'):
+    """课程(长文章)和只能作为材料的短内容交替出现"""
+    items = []
+    for i in range(count):
+        words = 60 if i % 3 == 0 else 25
+        items.append({
+            'title': f'記事{i}',
+            'url': f'https://{site}/{i}',
+            'category': 'news',
+            'source': 'test',
+            'content': ' '.join(f'単語{i}_{j}' for j in range(words))
+        })
+    return items
+
+
+def transform_in_batches(transformer: ContentTransformer, items, batch_size: int):
+    courses, materials = [], []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        batch_courses = transformer.transform_to_courses(batch, start_day=len(courses) + 1)
+        materials.extend(transformer.transform_to_materials(batch, batch_courses, start_day=len(courses) + 1))
+        courses.extend(batch_courses)
+    return courses, materials
+
+
+def load_in_batches(sink: DirectDatabaseSink, courses, materials, batch_size: int):
+    course_ids = {}
+    errors = []
+    for start in range(0, max(len(courses), len(materials)), batch_size):
+        results = sink.load_all(courses[start:start + batch_size], materials[start:start + batch_size],
+                                [], course_ids)
+        errors.extend(results['errors'])
+    return errors
+
+
+def material_links(sink: DirectDatabaseSink):
+    return sorted(sink.connection.execute(
+        "SELECT m.title, c.day_number FROM learning_materials m JOIN courses c ON c.id = m.course_id"
+    ).fetchall())
+
+
+def test_material_course_links_do_not_depend_on_batch_size(tmp_path):
+    """分批大小不同时，每个材料关联到同一天的课程"""
+    items = make_items(20)
+    links = []
+    for batch_size in (3, 7, 20):
+        transformer = ContentTransformer(str(tmp_path))
+        courses, materials = transform_in_batches(transformer, items, batch_size)
+        sink = DirectDatabaseSink.from_sqlite(str(tmp_path / f'{batch_size}.sqlite'))
+        assert load_in_batches(sink, courses, materials, batch_size) == []
+        links.append(material_links(sink))
+        sink.close()
+
+    assert links[0] == links[1] == links[2]
+    assert len(links[0]) == 20
+    # 第2个内容之前最近的课程是第1天(記事0)
+    assert ('記事2', 1) in links[0]
+
+
+def test_reimport_updates_instead_of_inserting(tmp_path):
+    transformer = ContentTransformer(str(tmp_path))
+    courses, materials = transform_in_batches(transformer, make_items(12), 5)
+    sink = DirectDatabaseSink.from_sqlite(str(tmp_path / 'db.sqlite'))
+
+    load_in_batches(sink, courses, materials, 5)
+    # 第二次导入使用不同的分批大小，course_ids从空开始
+    load_in_batches(sink, courses, materials, 4)
+
+    count = sink.connection.execute("SELECT COUNT(*) FROM learning_materials").fetchone()[0]
+    assert count == len(materials)
+    assert sink.connection.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == len(courses)
+    sink.close()
+
+
+def test_unlinked_material_fails_loudly(tmp_path):
+    sink = DirectDatabaseSink.from_sqlite(str(tmp_path / 'db.sqlite'))
+    material = ImportableContent(title='孤立した材料', content='x', content_type='material',
+                                 level='beginner', metadata={'course_day': 5})
+
+    results = sink.load_all([], [material], [])
+
+    assert results['materials'] == 0
+    assert len(results['errors']) == 1
+    assert '孤立した材料' in results['errors'][0]
+    sink.close()
+
+
+@pytest.mark.parametrize('count', [120, 500])
+def test_upsert_stays_under_sqlite_parameter_limit(tmp_path, count):
+    """列数 x 批次大小超过999时按参数上限拆分语句"""
+    sink = DirectDatabaseSink.from_sqlite(str(tmp_path / 'db.sqlite'), batch_size=500)
+    sink.max_params = 999
+    vocabulary = [
+        ImportableContent(title=f'単語{i}', content='', content_type='vocabulary', level='beginner',
+                          metadata={'reading': f'たんご{i}'})
+        for i in range(count)
+    ]
+
+    assert sink.load_vocabulary(vocabulary) == count
+    # 重复导入走UPDATE，不产生新行
+    assert sink.load_vocabulary(vocabulary) == count
+    assert sink.connection.execute("SELECT COUNT(*) FROM vocabulary").fetchone()[0] == count
+    sink.close()
+
+
+def test_second_import_directory_does_not_overwrite_existing_courses(tmp_path):
+    """每次导入的课程天数都从1开始，按来源地址区分课程，不按天数覆盖"""
+    sink = DirectDatabaseSink.from_sqlite(str(tmp_path / 'db.sqlite'))
+    first_courses, first_materials = transform_in_batches(ContentTransformer(str(tmp_path)), make_items(6), 6)
+    load_in_batches(sink, first_courses, first_materials, 6)
+    before = sink.connection.execute("SELECT id, title, source_url FROM courses ORDER BY id").fetchall()
+
+    second = make_items(6, site='other.example')
+    for item in second:
+        item['title'] = '別の' + item['title']
+    courses, materials = transform_in_batches(ContentTransformer(str(tmp_path)), second, 6)
+    assert load_in_batches(sink, courses, materials, 6) == []
+
+    rows = sink.connection.execute("SELECT id, title, source_url FROM courses ORDER BY id").fetchall()
+    assert rows[:len(before)] == before
+    assert len(rows) == 2 * len(before)
+    # 第二次导入的材料关联到第二次导入的课程
+    assert ('別の記事2', 1) in material_links(sink)
+    linked = sink.connection.execute(
+        "SELECT c.source_url FROM learning_materials m JOIN courses c ON c.id = m.course_id "
+        "WHERE m.title LIKE '別の%'").fetchall()
+    assert all(url.startswith('https://other.example/') for (url,) in linked)
+    sink.close()
+
+
+def test_vocabulary_placeholders_are_flagged_and_curated_rows_kept(tmp_path):
+    sink = DirectDatabaseSink.from_sqlite(str(tmp_path / 'db.sqlite'))
+    sink.connection.execute(
+        "INSERT INTO vocabulary (word, reading, meaning, part_of_speech, example_sentence, jlpt_level, tags) "
+        "VALUES ('日本', 'にほん', 'Japan', '名詞', '日本に行く。', 'N5', '[]')")
+    vocabulary = [
+        ImportableContent(title=word, content='', content_type='vocabulary', level='beginner',
+                          metadata={'reading': reading})
+        for word, reading in (('日本', 'にほん'), ('東京', 'とうきょう'))
+    ]
+
+    assert sink.load_vocabulary(vocabulary) == 2
+
+    rows = dict((word, (meaning, example, json.loads(tags))) for word, meaning, example, tags in
+                sink.connection.execute("SELECT word, meaning, example_sentence, tags FROM vocabulary"))
+    assert rows['日本'] == ('Japan', '日本に行く。', [])
+    assert rows['東京'][:2] == ('', None)
+    assert PENDING_TAG in rows['東京'][2]
+    sink.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试文本难度特征的批量计算
+"""
+
+from difficulty_scorer import DifficultyScorer
+
+
+def test_character_classes_and_sentences():
+    features = DifficultyScorer().features('山田さんはカメラをABCで買った。本当？')
+
+    assert features.total_chars == 20
+    assert features.kanji == 5
+    assert features.hiragana == 7
+    assert features.katakana == 3
+    assert features.latin == 3
+    assert features.sentence_count == 2
+    # 山田本是1年级汉字，買当是2年级汉字
+    assert features.basic_kanji == 5
+
+
+def test_batch_matches_single_documents_and_handles_empty_text():
+    texts = ['日本語', '', 'テスト😀です', '学校へ行きます。毎日！']
+    scorer = DifficultyScorer()
+
+    batch = scorer.score_batch(texts)
+
+    assert batch == [DifficultyScorer().features(text) for text in texts]
+    assert batch[1].total_chars == 0 and batch[1].sentence_count == 0
+    assert batch[1].kanji_ratio == 0.0 and batch[1].basic_kanji_ratio == 1.0
+    # 多字节的表情符号按一个字符统计，不影响后续文档
+    assert batch[2].total_chars == 6 and batch[3].kanji == 5
+
+
+def test_text_without_sentence_end_counts_as_one_sentence():
+    features = DifficultyScorer().features('今日は晴れ')
+
+    assert features.sentence_count == 1
+    assert features.avg_sentence_length == 5
+
+
+def test_cached_documents_are_not_rescanned(monkeypatch):
+    scorer = DifficultyScorer()
+    scorer.score_batch(['日本', '東京'])
+    scanned = []
+    original = scorer._compute
+    monkeypatch.setattr(scorer, '_compute', lambda texts: scanned.extend(texts) or original(texts))
+
+    scorer.score_batch(['東京', '大阪', '大阪'])
+
+    assert scanned == ['大阪']
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试汇总文件的流式读取
+"""
+
+import json
+import asyncio
+
+import summary_reader
+from summary_reader import SummaryJsonlWriter, find_summary_file, iter_summary_items, normalize_result_item
+
+ITEMS = [{'title': f'記事{i}', 'url': f'https://example.com/{i}', 'content': 'あ' * (i * 7), 'score': i * 1.5}
+         for i in range(20)]
+
+
+def read_all(path):
+    async def run():
+        return [item async for item in iter_summary_items(path)]
+    return asyncio.run(run())
+
+
+def test_json_items_are_parsed_across_small_chunks(tmp_path, monkeypatch):
+    """分块边界落在元素、数字和 "items" 键名中间时也能完整解析"""
+    path = tmp_path / 'summary.json'
+    path.write_text(json.dumps({'total': 20, 'padding': 'x' * 5, 'items': ITEMS}, ensure_ascii=False),
+                    encoding='utf-8')
+
+    for chunk_size in (3, 7, 64, 1 << 16):
+        monkeypatch.setattr(summary_reader, 'READ_CHUNK_SIZE', chunk_size)
+        assert read_all(path) == ITEMS
+
+
+def test_json_without_items_yields_nothing(tmp_path):
+    path = tmp_path / 'summary.json'
+    path.write_text('{"total": 0}', encoding='utf-8')
+
+    assert read_all(path) == []
+
+
+def test_jsonl_writer_and_reader_skip_truncated_line(tmp_path):
+    path = tmp_path / 'summary.jsonl'
+
+    async def write():
+        async with SummaryJsonlWriter(path) as writer:
+            for item in ITEMS[:3]:
+                await writer.append(item)
+    asyncio.run(write())
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('\n{"title": "途中')
+
+    assert read_all(path) == ITEMS[:3]
+    assert find_summary_file(tmp_path) == path
+
+
+def test_scraper_result_rows_are_normalized():
+    row = {'name': '記事', 'source_url': 'https://example.com/a', 'content': '本文',
+           'metadata': '{"source": "NHK Easy News"}'}
+
+    item = normalize_result_item(row)
+
+    assert item == {'title': '記事', 'url': 'https://example.com/a', 'content': '本文', 'category': 'news',
+                    'source': 'NHK Easy News', 'metadata': {'source': 'NHK Easy News'}}
+    # 已经是汇总条目格式的不变
+    assert normalize_result_item(ITEMS[0]) is ITEMS[0]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试合成语料生成器
+"""
+
+import json
+import wave
+
+from synthetic_corpus import AUDIO_PLACEHOLDERS, generate_corpus
+
+
+def load(summary_file):
+    return [json.loads(line) for line in summary_file.read_text(encoding='utf-8').splitlines()]
+
+
+def without_audio(items):
+    """音频占位文件的路径随输出目录变化"""
+    return [{key: value for key, value in item.items() if key != 'audio_file'} for item in items]
+
+
+def test_same_seed_generates_same_corpus(tmp_path):
+    first = load(generate_corpus(str(tmp_path / 'a'), 200))
+    second = load(generate_corpus(str(tmp_path / 'b'), 200))
+
+    assert without_audio(first) == without_audio(second)
+    assert without_audio(first) != without_audio(load(generate_corpus(str(tmp_path / 'c'), 200, seed=1)))
+
+
+def test_corpus_mixes_articles_and_pronunciations(tmp_path):
+    items = load(generate_corpus(str(tmp_path), 1000, pronunciation_ratio=0.2))
+
+    pronunciations = [item for item in items if item['category'] == 'pronunciation']
+    assert len(items) == 1000
+    assert 150 < len(pronunciations) < 250
+    # 只有NHK Easy来源的文章带读音词元，且词元都出现在正文中
+    nhk = [item for item in items if item.get('source') == 'NHK Easy']
+    assert nhk and all('ruby_tokens' in item for item in nhk)
+    assert all(surface in item['content'] for item in nhk for surface, _ in item['ruby_tokens'])
+    assert not any('ruby_tokens' in item for item in items if item.get('source') != 'NHK Easy')
+
+
+def test_audio_placeholders_are_shared_silent_wavs(tmp_path):
+    items = load(generate_corpus(str(tmp_path), 300))
+
+    audio_files = {item['audio_file'] for item in items if item.get('audio_file')}
+    assert len(audio_files) == AUDIO_PLACEHOLDERS
+    with wave.open(sorted(audio_files)[0], 'rb') as f:
+        assert f.getnframes() == 1600
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试词汇去重（临时目录中的SQLite索引）
+"""
+
+import sqlite3
+
+from content_importer import ContentImporter, ImportableContent
+from vocabulary_dedup import VocabularyDeduplicator
+
+
+def vocab(word: str, reading: str = '', source: str = '', audio_file=None) -> ImportableContent:
+    metadata = {'reading': reading}
+    if source:
+        metadata['source'] = source
+    return ImportableContent(title=word, content='', content_type='vocabulary', level='beginner',
+                             metadata=metadata, audio_file=audio_file)
+
+
+def test_duplicates_within_run_are_merged(tmp_path):
+    dedup = VocabularyDeduplicator(str(tmp_path / 'index.sqlite'))
+
+    result = dedup.deduplicate([
+        vocab('日本', 'にほん', 'a'),
+        vocab('日本', 'にほん', 'b', audio_file='nihon.mp3'),
+        vocab('日本', 'にっぽん', 'a'),
+        vocab('日本', 'にほん', 'a'),
+    ])
+
+    assert [(item.title, item.metadata['reading']) for item in result] == [('日本', 'にほん'), ('日本', 'にっぽん')]
+    assert result[0].metadata['sources'] == ['a', 'b']
+    assert result[0].metadata['occurrences'] == 3
+    assert result[0].audio_file == 'nihon.mp3'
+    dedup.close()
+
+
+def test_imported_words_are_skipped_in_later_runs(tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+    dedup = VocabularyDeduplicator(path)
+    dedup.mark_imported(dedup.deduplicate([vocab('日本', 'にほん'), vocab('東京', 'とうきょう')]))
+    dedup.close()
+
+    # 新的运行（新进程）从索引文件读取
+    dedup = VocabularyDeduplicator(path)
+    result = dedup.deduplicate([vocab('日本', 'にほん'), vocab('大阪', 'おおさか')])
+
+    assert [item.title for item in result] == ['大阪']
+    occurrences = dedup.connection.execute(
+        "SELECT occurrences FROM vocabulary_keys WHERE word = '日本'").fetchone()[0]
+    assert occurrences == 2
+    dedup.close()
+
+
+def test_seed_from_platform_marks_existing_vocabulary(tmp_path):
+    platform = sqlite3.connect(str(tmp_path / 'platform.sqlite'))
+    platform.execute("CREATE TABLE vocabulary (word TEXT, reading TEXT)")
+    platform.executemany("INSERT INTO vocabulary VALUES (?, ?)", [('日本', 'にほん'), ('猫', None)])
+    dedup = VocabularyDeduplicator(str(tmp_path / 'index.sqlite'))
+
+    assert dedup.seed_from_platform(platform) == 2
+    assert dedup.seed_from_platform(platform) == 0
+    assert [item.title for item in dedup.deduplicate([vocab('猫'), vocab('犬')])] == ['犬']
+    dedup.close()
+    platform.close()
+
+
+def test_seed_keys_from_api_marks_existing_vocabulary(tmp_path):
+    dedup = VocabularyDeduplicator(str(tmp_path / 'index.sqlite'))
+
+    assert dedup.seed_keys([('日本', 'にほん'), ('猫', None)]) == 2
+    assert [item.title for item in dedup.deduplicate([vocab('日本', 'にほん'), vocab('猫'), vocab('犬')])] == ['犬']
+    dedup.close()
+
+
+def test_only_vocabulary_confirmed_by_api_is_marked(tmp_path):
+    importer = ContentImporter(str(tmp_path), str(tmp_path / 'out'), vocabulary_index=str(tmp_path / 'index.sqlite'))
+    words = [vocab('日本', 'にほん'), vocab('東京', 'とうきょう'), vocab('大阪', 'おおさか')]
+    response = {'success': True, 'data': {'success_count': 2, 'error_count': 1, 'errors': ['第2行: 重复的词汇']}}
+    importer.importer.failed_rows['vocabulary'] = importer.importer._failed_rows(response)
+
+    assert importer.importer._imported_count(response) == 2
+    assert [item.title for item in importer._confirmed_vocabulary(words, {'vocabulary': 2})] == ['日本', '大阪']
+    assert importer._confirmed_vocabulary(words, {'vocabulary': 0, 'errors': ['词汇导入失败']}) == []
+    importer.deduplicator.close()
+
+
+def test_large_batches_are_looked_up_in_chunks(tmp_path):
+    dedup = VocabularyDeduplicator(str(tmp_path / 'index.sqlite'))
+    words = [vocab(f'単語{i}', f'たんご{i}') for i in range(1000)]
+    dedup.mark_imported(words[::2])
+
+    result = dedup.deduplicate(words)
+
+    assert len(result) == 500
+    dedup.close()
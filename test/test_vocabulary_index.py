@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试词汇索引和分词器读音
+形态素分析器用最小的替身代替，只提供分词器实际调用的接口
+"""
+
+from vocabulary_index import MeCabTokenizer, RegexTokenizer, SudachiTokenizer, VocabularyIndex, ruby_readings
+
+# 表层形 -> (原形, 品词, 表层形读音)
+DICTIONARY = {
+    '食べ': ('食べる', '動詞', 'タベ'),
+    '食べる': ('食べる', '動詞', 'タベル'),
+    'た': ('た', '助動詞', 'タ'),
+    'パン': ('パン', '名詞', 'パン'),
+    'を': ('を', '助詞', 'ヲ'),
+}
+
+
+def split(text: str):
+    """按替身辞书做最长匹配"""
+    words = []
+    while text:
+        for length in range(len(text), 0, -1):
+            if text[:length] in DICTIONARY:
+                words.append(text[:length])
+                text = text[length:]
+                break
+        else:
+            raise ValueError(text)
+    return words
+
+
+class FakeMorpheme:
+    def __init__(self, surface: str):
+        self._surface = surface
+        self._lemma, self._pos, self._reading = DICTIONARY[surface]
+
+    def surface(self):
+        return self._surface
+
+    def dictionary_form(self):
+        return self._lemma
+
+    def reading_form(self):
+        return self._reading
+
+    def part_of_speech(self):
+        return (self._pos, '*')
+
+
+class FakeSudachi:
+    def tokenize(self, text, mode=None):
+        return [FakeMorpheme(word) for word in split(text)]
+
+
+class FakeNode:
+    def __init__(self, surface: str, next_node=None):
+        self.surface = surface
+        self.next = next_node
+        if surface:
+            lemma, pos, reading = DICTIONARY[surface]
+            self.feature = ','.join([pos, '*', '*', '*', '*', '*', lemma, reading, reading])
+        else:
+            self.feature = 'BOS/EOS,*,*,*,*,*,*,*,*'
+
+
+class FakeTagger:
+    def parseToNode(self, text):
+        node = FakeNode('')
+        for word in reversed(split(text)):
+            node = FakeNode(word, node)
+        return FakeNode('', node)
+
+
+def make_sudachi() -> SudachiTokenizer:
+    tokenizer = SudachiTokenizer.__new__(SudachiTokenizer)
+    tokenizer._tokenizer = FakeSudachi()
+    tokenizer._mode = None
+    tokenizer._lemma_readings = {}
+    return tokenizer
+
+
+def make_mecab() -> MeCabTokenizer:
+    tokenizer = MeCabTokenizer.__new__(MeCabTokenizer)
+    tokenizer._tagger = FakeTagger()
+    tokenizer._lemma_readings = {}
+    return tokenizer
+
+
+def test_sudachi_conjugated_verb_uses_lemma_reading():
+    assert make_sudachi().tokenize('パンを食べた') == [('パン', 'ぱん'), ('食べる', 'たべる')]
+
+
+def test_mecab_conjugated_verb_uses_lemma_reading():
+    assert make_mecab().tokenize('パンを食べた') == [('パン', 'ぱん'), ('食べる', 'たべる')]
+
+
+def test_index_keeps_lemma_reading_from_first_conjugated_occurrence():
+    index = VocabularyIndex(make_sudachi())
+    index.add_document('a', '食べた')
+    index.add_document('b', '食べる')
+
+    assert index.get_reading('食べる') == 'たべる'
+
+
+def test_regex_tokenizer_only_reads_hiragana():
+    assert RegexTokenizer().tokenize('日本 にほん') == [('日本', ''), ('にほん', 'にほん')]
+
+
+def test_top_terms_prefers_terms_unique_to_document():
+    index = VocabularyIndex(RegexTokenizer())
+    index.add_document('a', '日本 東京')
+    index.add_document('b', '日本 大阪')
+
+    top = index.top_terms(1)
+
+    assert top == {'a': ['東京'], 'b': ['大阪']}
+
+
+def test_ruby_readings_extend_over_kana():
+    tokens = [['食', 'た'], ['べる。', ''], ['日本', 'ニホン']]
+
+    readings = ruby_readings(tokens)
+
+    assert readings['食べる'] == 'たべる'
+    assert readings['日本'] == 'にほん'
+    # 标点截断片段，不包含ruby的纯假名片段不记录
+    assert '食べる。' not in readings and 'べる' not in readings
+
+
+def test_ruby_readings_respect_max_length():
+    tokens = [['東京', 'とうきょう'], ['都', 'と']]
+
+    assert set(ruby_readings(tokens, max_length=2)) == {'東京', '都'}
+
+
+def test_page_ruby_reading_overrides_tokenizer():
+    index = VocabularyIndex(RegexTokenizer())
+    index.add_document('a', '今日', ruby_tokens=[['今日', 'きょう']])
+    index.add_document('b', '今日 明日')
+
+    assert index.get_reading('今日') == 'きょう'
+    assert index.get_reading('明日') == ''
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+词汇去重工具
+基于磁盘上的 (word, reading) 键索引，合并同一次运行中的重复词汇，并跳过以往已导入的词汇
+"""
+
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class VocabularyDeduplicator:
+    """词汇去重器"""
+
+    def __init__(self, index_path: str):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.index_path))
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS vocabulary_keys (
+                word TEXT NOT NULL,
+                reading TEXT NOT NULL,
+                occurrences INTEGER NOT NULL DEFAULT 0,
+                first_imported_at TEXT,
+                last_seen_at TEXT,
+                PRIMARY KEY (word, reading)
+            )
+        """)
+        self.connection.commit()
+
+    def close(self):
+        """关闭索引文件"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def seed_from_platform(self, platform_connection) -> int:
+        """将平台vocabulary表中已有的词汇写入索引，返回新增的键数量"""
+        cursor = platform_connection.cursor()
+        try:
+            cursor.execute("SELECT word, reading FROM vocabulary")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return self.seed_keys(rows)
+
+    def seed_keys(self, keys: Iterable[Tuple[str, Optional[str]]]) -> int:
+        """将平台上已有的 (word, reading) 键写入索引，返回新增的键数量"""
+        before = self._count()
+        now = self._now()
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO vocabulary_keys (word, reading, first_imported_at, last_seen_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(word, reading or '', now, now) for word, reading in keys]
+        )
+        self.connection.commit()
+
+        added = self._count() - before
+        logger.info(f"从平台词汇表同步了 {added} 个已有词汇")
+        return added
+
+    def deduplicate(self, vocabulary: List) -> List:
+        """合并本次运行中的重复词汇，并过滤以往已导入的词汇
+
+        每个 (word, reading) 只保留第一次出现的条目，metadata中的来源合并到
+        sources / extracted_from 列表，出现次数记录在 occurrences。
+        """
+        merged: Dict[Tuple[str, str], object] = {}
+        for vocab in vocabulary:
+            metadata = vocab.metadata if vocab.metadata is not None else {}
+            key = (vocab.title, metadata.get('reading', '') or '')
+
+            existing = merged.get(key)
+            if existing is None:
+                metadata['sources'] = [metadata['source']] if metadata.get('source') else []
+                metadata['extracted_from'] = [metadata['extracted_from']] if metadata.get('extracted_from') else []
+                metadata['occurrences'] = 1
+                vocab.metadata = metadata
+                merged[key] = vocab
+                continue
+
+            target = existing.metadata
+            target['occurrences'] += 1
+            if metadata.get('source') and metadata['source'] not in target['sources']:
+                target['sources'].append(metadata['source'])
+            if metadata.get('extracted_from') and metadata['extracted_from'] not in target['extracted_from']:
+                target['extracted_from'].append(metadata['extracted_from'])
+            # 发音项目带有音频，优先保留
+            if not existing.audio_file and vocab.audio_file:
+                existing.audio_file = vocab.audio_file
+
+        known = self._known_keys(list(merged))
+        if known:
+            now = self._now()
+            self.connection.executemany(
+                "UPDATE vocabulary_keys SET occurrences = occurrences + ?, last_seen_at = ? "
+                "WHERE word = ? AND reading = ?",
+                [(merged[key].metadata['occurrences'], now, key[0], key[1]) for key in known]
+            )
+            self.connection.commit()
+
+        result = [vocab for key, vocab in merged.items() if key not in known]
+        logger.info(f"词汇去重: {len(vocabulary)} -> {len(merged)} (本次), 跳过已导入 {len(known)}, 输出 {len(result)}")
+        return result
+
+    def mark_imported(self, vocabulary: List):
+        """导入成功后记录词汇键，之后的运行将跳过这些词汇"""
+        now = self._now()
+        self.connection.executemany(
+            "INSERT INTO vocabulary_keys (word, reading, occurrences, first_imported_at, last_seen_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (word, reading) DO UPDATE SET "
+            "occurrences = occurrences + excluded.occurrences, last_seen_at = excluded.last_seen_at",
+            [
+                (
+                    vocab.title,
+                    (vocab.metadata or {}).get('reading', '') or '',
+                    (vocab.metadata or {}).get('occurrences', 1),
+                    now,
+                    now
+                )
+                for vocab in vocabulary
+            ]
+        )
+        self.connection.commit()
+
+    def _known_keys(self, keys: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """批量查询索引中已存在的键"""
+        known = set()
+        # SQLite单条语句的参数数量有限，按批查询
+        for start in range(0, len(keys), 400):
+            batch = keys[start:start + 400]
+            condition = ' OR '.join(['(word = ? AND reading = ?)'] * len(batch))
+            params = [value for key in batch for value in key]
+            for word, reading in self.connection.execute(
+                f"SELECT word, reading FROM vocabulary_keys WHERE {condition}", params
+            ):
+                known.add((word, reading))
+        return known
+
+    def _count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM vocabulary_keys").fetchone()[0]
+
+    def _now(self) -> str:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
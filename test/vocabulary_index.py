@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+词汇索引工具
+对每篇文档只分词一次，维护语料级词频索引，并用TF-IDF为每篇文档选出Top-K词汇
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy为可选依赖，缺失时退回纯Python计算
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 日语字符范围：汉字、平假名、片假名
+JAPANESE_WORD_PATTERN = re.compile(r'[\u4e00-\u9faf\u3040-\u309f\u30a0-\u30ff]+')
+HIRAGANA_PATTERN = re.compile(r'^[\u3040-\u309f]+$')
+KANA_PATTERN = re.compile(r'^[\u3040-\u309f\u30a0-\u30ff]$')
+
+
+class RegexTokenizer:
+    """基于字符范围的简易分词器（未安装形态素分析器时使用）"""
+
+    name = 'regex'
+
+    def tokenize(self, text: str) -> List[Tuple[str, str]]:
+        """返回 (表层形, 读音) 列表，读音未知时为空字符串"""
+        tokens = []
+        for word in JAPANESE_WORD_PATTERN.findall(text):
+            reading = word if HIRAGANA_PATTERN.match(word) else ''
+            tokens.append((word, reading))
+        return tokens
+
+
+class SudachiTokenizer:
+    """SudachiPy分词器"""
+
+    name = 'sudachi'
+
+    def __init__(self):
+        from sudachipy import dictionary, tokenizer as sudachi_tokenizer
+
+        self._tokenizer = dictionary.Dictionary().create()
+        self._mode = sudachi_tokenizer.Tokenizer.SplitMode.C
+        # 原形 -> 读音，活用形的读音不是原形的读音（食べた: たべた）
+        self._lemma_readings: Dict[str, str] = {}
+
+    def tokenize(self, text: str) -> List[Tuple[str, str]]:
+        tokens = []
+        for morpheme in self._tokenizer.tokenize(text, self._mode):
+            lemma = morpheme.dictionary_form()
+            if not JAPANESE_WORD_PATTERN.fullmatch(lemma):
+                continue
+            # 过滤助词、助动词、符号等功能词
+            if morpheme.part_of_speech()[0] in ('助詞', '助動詞', '補助記号', '記号'):
+                continue
+            if lemma == morpheme.surface():
+                reading = morpheme.reading_form()
+            else:
+                reading = self._lemma_reading(lemma)
+            tokens.append((lemma, _katakana_to_hiragana(reading)))
+        return tokens
+
+    def _lemma_reading(self, lemma: str) -> str:
+        """对原形重新分词取读音"""
+        if lemma not in self._lemma_readings:
+            self._lemma_readings[lemma] = ''.join(
+                m.reading_form() for m in self._tokenizer.tokenize(lemma, self._mode)
+            )
+        return self._lemma_readings[lemma]
+
+
+class MeCabTokenizer:
+    """MeCab分词器"""
+
+    name = 'mecab'
+
+    def __init__(self):
+        import MeCab
+
+        self._tagger = MeCab.Tagger()
+        # 原形 -> 读音，IPA辞书的读音列是表层形（活用形）的读音
+        self._lemma_readings: Dict[str, str] = {}
+
+    def tokenize(self, text: str) -> List[Tuple[str, str]]:
+        tokens = []
+        node = self._tagger.parseToNode(text)
+        while node:
+            surface = node.surface
+            features = node.feature.split(',')
+            if surface and JAPANESE_WORD_PATTERN.fullmatch(surface) and \
+                    features[0] not in ('助詞', '助動詞', '記号'):
+                # IPA辞书: 原形在第7列，读音在第8列
+                base = features[6] if len(features) > 6 and features[6] != '*' else surface
+                if base == surface:
+                    reading = features[7] if len(features) > 7 and features[7] != '*' else ''
+                else:
+                    reading = self._lemma_reading(base)
+                tokens.append((base, _katakana_to_hiragana(reading)))
+            node = node.next
+        return tokens
+
+    def _lemma_reading(self, lemma: str) -> str:
+        """对原形重新分词取读音，有词没有读音时返回空字符串"""
+        if lemma not in self._lemma_readings:
+            readings = []
+            node = self._tagger.parseToNode(lemma)
+            while node:
+                if node.surface:
+                    features = node.feature.split(',')
+                    if len(features) <= 7 or features[7] == '*':
+                        readings = None
+                        break
+                    readings.append(features[7])
+                node = node.next
+            self._lemma_readings[lemma] = ''.join(readings) if readings else ''
+        return self._lemma_readings[lemma]
+
+
+_tokenizer = None
+
+
+def get_tokenizer(preferred: Optional[str] = None):
+    """获取进程内共享的分词器（只加载一次）
+
+    Args:
+        preferred: 'sudachi'、'mecab' 或 'regex'，为空时按 Sudachi -> MeCab -> 正则 顺序选择
+    """
+    global _tokenizer
+
+    if _tokenizer is not None and (preferred is None or _tokenizer.name == preferred):
+        return _tokenizer
+
+    candidates = [preferred] if preferred else ['sudachi', 'mecab', 'regex']
+    for name in candidates:
+        try:
+            if name == 'sudachi':
+                _tokenizer = SudachiTokenizer()
+            elif name == 'mecab':
+                _tokenizer = MeCabTokenizer()
+            else:
+                _tokenizer = RegexTokenizer()
+            logger.info(f"使用分词器: {_tokenizer.name}")
+            return _tokenizer
+        except Exception as e:
+            logger.warning(f"分词器 {name} 不可用: {e}")
+
+    _tokenizer = RegexTokenizer()
+    return _tokenizer
+
+
+def _katakana_to_hiragana(text: str) -> str:
+    """片假名转平假名"""
+    return ''.join(chr(ord(c) - 0x60) if 'ァ' <= c <= 'ヶ' else c for c in text)
+
+
+def ruby_readings(tokens: List[List[str]], max_length: int = 10) -> Dict[str, str]:
+    """根据抓取时提取的 [表层, 读音] 词元推导词语读音
+
+    <ruby>词元直接给出读音，普通文本中的假名读音就是自身；包含至少一个<ruby>词元的
+    连续片段（不超过max_length个字符）都记录读音，例如 食(た) + べる -> 食べる: たべる。
+    没有读音的汉字或标点会截断片段。
+    """
+    units: List[Optional[Tuple[str, str, bool]]] = []
+    for surface, reading in tokens:
+        if reading:
+            units.append((surface, _katakana_to_hiragana(reading), True))
+        else:
+            for char in surface:
+                if KANA_PATTERN.match(char):
+                    units.append((char, _katakana_to_hiragana(char), False))
+                else:
+                    units.append(None)
+
+    readings: Dict[str, str] = {}
+    for start in range(len(units)):
+        surface, reading, has_ruby = '', '', False
+        for unit in units[start:]:
+            if unit is None or len(surface) + len(unit[0]) > max_length:
+                break
+            surface += unit[0]
+            reading += unit[1]
+            has_ruby = has_ruby or unit[2]
+            if has_ruby:
+                readings.setdefault(surface, reading)
+    return readings
+
+
+class VocabularyIndex:
+    """语料级词频索引"""
+
+    def __init__(self, tokenizer=None, min_length: int = 2, max_length: int = 10):
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.min_length = min_length
+        self.max_length = max_length
+
+        # 词项按首次出现的顺序编号，保证结果可复现
+        self.term_ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.readings: Dict[str, str] = {}
+        self.document_frequency: Counter = Counter()
+        self.documents: Dict[str, Counter] = {}
+
+    def add_document(self, doc_id: str, text: str,
+                     ruby_tokens: Optional[List[List[str]]] = None) -> Counter:
+        """分词并记录一篇文档，同一doc_id只处理一次
+
+        提供抓取时的ruby词元时，页面标注的读音优先于分词器给出的读音。
+        """
+        if doc_id in self.documents:
+            return self.documents[doc_id]
+
+        annotated = ruby_readings(ruby_tokens, self.max_length) if ruby_tokens else {}
+
+        counts = Counter()
+        for surface, reading in self.tokenizer.tokenize(text):
+            if not (self.min_length <= len(surface) <= self.max_length):
+                continue
+            term_id = self.term_ids.get(surface)
+            if term_id is None:
+                term_id = len(self.terms)
+                self.term_ids[surface] = term_id
+                self.terms.append(surface)
+            if surface in annotated:
+                self.readings[surface] = annotated[surface]
+            elif reading and surface not in self.readings:
+                self.readings[surface] = reading
+            counts[term_id] += 1
+
+        self.documents[doc_id] = counts
+        self.document_frequency.update(counts.keys())
+        return counts
+
+    def get_reading(self, word: str) -> str:
+        """返回分词器给出的读音，未知时为空字符串"""
+        return self.readings.get(word, '')
+
+    def top_terms(self, k: int = 50) -> Dict[str, List[str]]:
+        """按TF-IDF为每篇文档选出Top-K词汇
+
+        分数相同时按词项首次出现的顺序排列。
+        """
+        if not self.documents:
+            return {}
+
+        if np is None:
+            return self._top_terms_python(k)
+
+        doc_ids = list(self.documents)
+        lengths = np.fromiter((len(self.documents[d]) for d in doc_ids), dtype=np.int64, count=len(doc_ids))
+        total = int(lengths.sum())
+        if total == 0:
+            return {d: [] for d in doc_ids}
+
+        doc_index = np.repeat(np.arange(len(doc_ids)), lengths)
+        term_index = np.empty(total, dtype=np.int64)
+        counts = np.empty(total, dtype=np.float64)
+        position = 0
+        for doc_id in doc_ids:
+            document = self.documents[doc_id]
+            size = len(document)
+            term_index[position:position + size] = np.fromiter(document.keys(), dtype=np.int64, count=size)
+            counts[position:position + size] = np.fromiter(document.values(), dtype=np.float64, count=size)
+            position += size
+
+        df = np.zeros(len(self.terms), dtype=np.float64)
+        for term_id, freq in self.document_frequency.items():
+            df[term_id] = freq
+        idf = np.log((1 + len(doc_ids)) / (1 + df)) + 1.0
+
+        doc_totals = np.bincount(doc_index, weights=counts, minlength=len(doc_ids))
+        scores = counts / doc_totals[doc_index] * idf[term_index]
+
+        # 一次排序：文档升序、分数降序、词项编号升序
+        order = np.lexsort((term_index, -scores, doc_index))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        result = {}
+        for i, doc_id in enumerate(doc_ids):
+            selected = order[starts[i]:starts[i] + min(k, lengths[i])]
+            result[doc_id] = [self.terms[t] for t in term_index[selected]]
+        return result
+
+    def _top_terms_python(self, k: int) -> Dict[str, List[str]]:
+        """无numpy时的TF-IDF计算"""
+        total_docs = len(self.documents)
+        result = {}
+        for doc_id, document in self.documents.items():
+            doc_total = sum(document.values()) or 1
+            scored = [
+                (-(count / doc_total) * (math.log((1 + total_docs) / (1 + self.document_frequency[term_id])) + 1.0),
+                 term_id)
+                for term_id, count in document.items()
+            ]
+            scored.sort()
+            result[doc_id] = [self.terms[term_id] for _, term_id in scored[:k]]
+        return result